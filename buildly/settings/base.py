@@ -332,3 +332,59 @@ DEFAULT_REPLYTO_EMAIL = os.getenv('DEFAULT_REPLYTO_EMAIL')
 SWAGGER_SETTINGS = {
     'DEFAULT_INFO': 'gateway.urls.swagger_info',
 }
+
+# Lists
+
+# Large lists (p.e. CoreUsers or WorkflowLevel2s with `all=true`) are serialized from the values of the queryset,
+# the `fast` query parameter overrides it per request
+FAST_LIST_SERIALIZATION = True if os.getenv('FAST_LIST_SERIALIZATION') == 'True' else False
+
+# Unpaginated lists are streamed as JSON arrays in chunks of this many objects, the `stream` query parameter overrides
+# it per request (newline delimited JSON lists are always streamed)
+STREAM_LIST_RESPONSES = True if os.getenv('STREAM_LIST_RESPONSES') == 'True' else False
+STREAMING_LIST_CHUNK_SIZE = int(os.getenv('STREAMING_LIST_CHUNK_SIZE', 500))
+
+# Gateway
+
+# Parsed Swagger specs of the logic modules are cached per process
+GATEWAY_SPEC_CACHE_TTL = int(os.getenv('GATEWAY_SPEC_CACHE_TTL', 300))
+GATEWAY_SPEC_CACHE_MAX_SIZE = int(os.getenv('GATEWAY_SPEC_CACHE_MAX_SIZE', 64))
+
+# Logic modules and their core groups are cached per process
+GATEWAY_REGISTRY_TTL = int(os.getenv('GATEWAY_REGISTRY_TTL', 300))
+
+# Connection pools for the requests to the logic modules
+GATEWAY_POOL_MAXSIZE = int(os.getenv('GATEWAY_POOL_MAXSIZE', 10))
+GATEWAY_POOL_MAX_RETRIES = int(os.getenv('GATEWAY_POOL_MAX_RETRIES', 2))
+GATEWAY_ASYNC_POOL_LIMIT = int(os.getenv('GATEWAY_ASYNC_POOL_LIMIT', 100))
+GATEWAY_ASYNC_POOL_LIMIT_PER_HOST = int(os.getenv('GATEWAY_ASYNC_POOL_LIMIT_PER_HOST', 20))
+
+# Service responses larger than this (in bytes) are relayed chunk by chunk if they aren't joined or aggregated
+GATEWAY_STREAMING_THRESHOLD = int(os.getenv('GATEWAY_STREAMING_THRESHOLD', 1024 * 1024))
+GATEWAY_STREAMING_CHUNK_SIZE = int(os.getenv('GATEWAY_STREAMING_CHUNK_SIZE', 64 * 1024))
+
+# Responses to GET requests are cached in Django's cache for this many seconds (0 disables the cache)
+GATEWAY_RESPONSE_CACHE_TIMEOUT = int(os.getenv('GATEWAY_RESPONSE_CACHE_TIMEOUT', 0))
+
+# Permissions
+
+# Permission snapshots of the users are cached in Django's cache for this many seconds (0 disables the cache)
+CORE_PERMISSIONS_CACHE_TIMEOUT = int(os.getenv('CORE_PERMISSIONS_CACHE_TIMEOUT', 0))
+
+# Data Mesh
+
+# Max. number of records requested with one bulk request to a logic module
+DATAMESH_BULK_FETCH_CHUNK_SIZE = int(os.getenv('DATAMESH_BULK_FETCH_CHUNK_SIZE', 100))
+
+# Relationship graph of the Data Mesh models is cached per process
+DATAMESH_GRAPH_TTL = int(os.getenv('DATAMESH_GRAPH_TTL', 300))
+
+# Local objects nested by the Data Mesh are cached in Django's cache for this many seconds (0 disables the cache)
+DATAMESH_LOCAL_CACHE_TIMEOUT = int(os.getenv('DATAMESH_LOCAL_CACHE_TIMEOUT', 0))
+
+# Join records are stored in both directions in JoinRecordEdge and looked up from there
+# (run the rebuildjoinrecordedges command after enabling it)
+DATAMESH_JOIN_RECORD_EDGES = True if os.getenv('DATAMESH_JOIN_RECORD_EDGES') == 'True' else False
+
+# Max. number of levels of related records joined with ?join=depth:N
+DATAMESH_MAX_JOIN_DEPTH = int(os.getenv('DATAMESH_MAX_JOIN_DEPTH', 3))
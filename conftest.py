@@ -25,3 +25,20 @@ def wsgi_request_factory():
         return WSGIRequest(environ)
 
     return _make_wsgi_request
+
+
+@pytest.fixture(autouse=True)
+def clear_process_caches():
+    """ Process-wide caches must not leak data between tests (DB changes are rolled back without signals) """
+    yield
+    from django.core.cache import cache
+    from datamesh.graph import relationship_graph
+    from gateway import aio, pool
+    from gateway.registry import logic_module_registry
+    from gateway.specs import spec_cache
+    relationship_graph.invalidate()
+    logic_module_registry.invalidate()
+    spec_cache.invalidate()
+    aio.shutdown()
+    pool.close_sessions()
+    cache.clear()
@@ -7,3 +7,6 @@ ROOT_URLCONF = 'core.urls'
 
 class CoreConfig(AppConfig):
     name = 'core'
+
+    def ready(self):
+        from . import signals  # noqa
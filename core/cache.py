@@ -0,0 +1,76 @@
+"""
+Cache of the permission snapshots of the users (see `core.permissions.EffectivePermissions`), shared between
+requests and processes via Django's cache. A snapshot consists of parts (the global/org masks and the sparse
+per-WorkflowLevel1/WorkflowLevel2 maps) that are cached separately, so the maps are only loaded when they are needed.
+The keys contain a version per user, bumped when the user's groups change, and a global version, bumped when
+permissions of groups or their workflow levels change. The cache is disabled unless CORE_PERMISSIONS_CACHE_TIMEOUT
+is set.
+"""
+import time
+from typing import Any, Iterable
+
+from django.conf import settings
+from django.core.cache import cache
+
+DEFAULT_PERMISSIONS_CACHE_TIMEOUT = 0
+KEY_PREFIX = 'core:permissions'
+
+
+def get_timeout() -> int:
+    return getattr(settings, 'CORE_PERMISSIONS_CACHE_TIMEOUT', DEFAULT_PERMISSIONS_CACHE_TIMEOUT)
+
+
+def is_enabled() -> bool:
+    return get_timeout() > 0
+
+
+def _get_version_key(user_pk: int = None) -> str:
+    return f'{KEY_PREFIX}:version' if user_pk is None else f'{KEY_PREFIX}:{user_pk}:version'
+
+
+def _get_version(version_key: str) -> int:
+    version = cache.get(version_key)
+    if version is None:
+        # start with a unique version, snapshots cached before the version key was evicted must not be valid again
+        cache.add(version_key, int(time.time() * 1000), None)
+        version = cache.get(version_key)
+    return version
+
+
+def _get_key(user_pk: int, part: str) -> str:
+    global_version = _get_version(_get_version_key())
+    user_version = _get_version(_get_version_key(user_pk))
+    return f'{KEY_PREFIX}:{user_pk}:{global_version}:{user_version}:{part}'
+
+
+def get(user_pk: int, part: str) -> Any:
+    """ Get the cached part of the user's permission snapshot """
+    if not is_enabled():
+        return None
+    return cache.get(_get_key(user_pk, part))
+
+
+def set(user_pk: int, part: str, value: Any) -> None:
+    """ Cache the part of the user's permission snapshot """
+    if is_enabled():
+        cache.set(_get_key(user_pk, part), value, get_timeout())
+
+
+def _bump(version_key: str) -> None:
+    try:
+        cache.incr(version_key)
+    except ValueError:
+        cache.set(version_key, int(time.time() * 1000), None)
+
+
+def invalidate_users(user_pks: Iterable[int]) -> None:
+    """ Drop the permission snapshots of the users """
+    if is_enabled():
+        for user_pk in user_pks:
+            _bump(_get_version_key(user_pk))
+
+
+def invalidate() -> None:
+    """ Drop the permission snapshots of all users """
+    if is_enabled():
+        _bump(_get_version_key())
@@ -0,0 +1,102 @@
+"""
+Eager loading of the relations that are serialized by a viewset.
+
+The plan (select_related and prefetch_related lookups) is derived once per serializer class from its fields:
+nested serializers and related fields that aren't rendered by pk only are joined (or prefetched below a to-many
+relation), many related fields and nested list serializers are prefetched.
+"""
+from typing import List, NamedTuple, Optional, Tuple, Type
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Model, QuerySet
+from rest_framework import serializers
+
+_plans = dict()
+
+
+class EagerLoadingPlan(NamedTuple):
+    select_related: Tuple[str, ...] = ()
+    prefetch_related: Tuple[str, ...] = ()
+
+    def apply(self, queryset: QuerySet) -> QuerySet:
+        if self.select_related:
+            queryset = queryset.select_related(*self.select_related)
+        if self.prefetch_related:
+            queryset = queryset.prefetch_related(*self.prefetch_related)
+        return queryset
+
+
+def _resolve_relation(model: Type[Model], attrs: List[str]) -> Optional[Tuple[Type[Model], bool]]:
+    """ Get the model at the end of the relation path and whether the path contains a to-many relation """
+    is_many = False
+    for attr in attrs:
+        try:
+            field = model._meta.get_field(attr)
+        except FieldDoesNotExist:
+            # p.e. a property or a method
+            return None
+        if not field.is_relation or field.related_model is None:
+            return None
+        is_many = is_many or field.many_to_many or field.one_to_many
+        model = field.related_model
+    return model, is_many
+
+
+def _collect(serializer: serializers.BaseSerializer, model: Type[Model], prefix: str, is_prefetched: bool,
+             select_related: list, prefetch_related: list) -> None:
+    for field in serializer.fields.values():
+        if field.write_only or field.source == '*':
+            continue
+
+        attrs = field.source_attrs
+        if isinstance(field, (serializers.ManyRelatedField, serializers.ListSerializer, serializers.BaseSerializer,
+                              serializers.RelatedField)):
+            relation_attrs = attrs
+        else:
+            # a plain field that follows relations, p.e. source='organization.name'
+            relation_attrs = attrs[:-1]
+        if not relation_attrs:
+            continue
+        if isinstance(field, serializers.RelatedField) and len(attrs) == 1 and field.use_pk_only_optimization():
+            # only the value of the foreign key column is rendered
+            continue
+
+        relation = _resolve_relation(model, relation_attrs)
+        if relation is None:
+            continue
+        related_model, is_many = relation
+        is_many = is_many or isinstance(field, (serializers.ManyRelatedField, serializers.ListSerializer))
+        lookup = prefix + '__'.join(relation_attrs)
+        if is_prefetched or is_many:
+            prefetch_related.append(lookup)
+        else:
+            select_related.append(lookup)
+
+        nested = field.child if isinstance(field, serializers.ListSerializer) else field
+        if isinstance(nested, serializers.BaseSerializer) and hasattr(nested, 'fields'):
+            _collect(nested, related_model, f'{lookup}__', is_prefetched or is_many, select_related, prefetch_related)
+
+
+def get_eager_loading_plan(serializer_class: Type[serializers.BaseSerializer],
+                           model: Type[Model]) -> EagerLoadingPlan:
+    """ Get the eager loading plan of the serializer class for querysets of the model """
+    key = (serializer_class, model)
+    plan = _plans.get(key)
+    if plan is None:
+        select_related, prefetch_related = [], []
+        meta = getattr(serializer_class, 'Meta', None)
+        if getattr(meta, 'model', None) is model:
+            _collect(serializer_class(), model, '', False, select_related, prefetch_related)
+        plan = EagerLoadingPlan(tuple(dict.fromkeys(select_related)), tuple(dict.fromkeys(prefetch_related)))
+        _plans[key] = plan
+    return plan
+
+
+class EagerLoadingMixin:
+    """
+    Viewset mixin that loads the relations serialized by the serializer of the action together with the queryset
+    """
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        return get_eager_loading_plan(self.get_serializer_class(), queryset.model).apply(queryset)
@@ -1,43 +1,144 @@
 import logging
+from typing import Dict, Type, Union
 
+from django.db.models import Model
 from rest_framework import permissions
 
-from core.models import Organization
+from core import cache as permissions_cache
+from core.models import CoreGroup, CoreUser, Organization, PERMISSIONS_NO_ACCESS
 
 
 logger = logging.getLogger(__name__)
 
 
+# bits of the CRUD permissions of CoreGroup (p.e. 12 -> 1100 -> CR__)
+PERMISSION_CREATE = 0b1000
+PERMISSION_READ = 0b0100
+PERMISSION_UPDATE = 0b0010
+PERMISSION_DELETE = 0b0001
+PERMISSION_ALL = 0b1111
+
+PERMISSION_BITS = {
+    # HTTP methods
+    'POST': PERMISSION_CREATE,
+    'GET': PERMISSION_READ,
+    'HEAD': PERMISSION_READ,
+    'PUT': PERMISSION_UPDATE,
+    'PATCH': PERMISSION_UPDATE,
+    'DELETE': PERMISSION_DELETE,
+
+    # CRUD actions
+    'create': PERMISSION_CREATE,
+    'list': PERMISSION_READ,
+    'retrieve': PERMISSION_READ,
+    'update': PERMISSION_UPDATE,
+    'partial_update': PERMISSION_UPDATE,
+    'destroy': PERMISSION_DELETE,
+}
+
+
+def get_permission_bits(permissions_: Union[int, str]) -> int:
+    """ Get the CRUD bits of CoreGroup permissions or of their string representation (p.e. '0100') """
+    if isinstance(permissions_, str):
+        return int(permissions_, 2)
+    # values above 15 grant everything like in CoreGroup.display_permissions
+    return permissions_ if permissions_ <= PERMISSION_ALL else PERMISSION_ALL
+
+
 def merge_permissions(permissions1: str, permissions2: str) -> str:
     """ Merge two CRUD permissions string representations"""
-    return ''.join(map(str, [max(int(i), int(j)) for i, j in zip(permissions1, permissions2)]))
-
-
-def has_permission(permissions_: str, method: str) -> bool:
-    """ Check if HTTP method or CRUD action corresponds to permissions"""
-    methods = {
-        # HTTP methods
-        'POST': 0,
-        'GET': 1,
-        'HEAD': 1,
-        'PUT': 2,
-        'PATCH': 2,
-        'DELETE': 3,
-
-        # CRUD actions
-        'create': 0,
-        'list': 1,
-        'retrieve': 1,
-        'update': 2,
-        'partial_update': 2,
-        'destroy': 3,
-    }
+    return '{0:04b}'.format(get_permission_bits(permissions1) | get_permission_bits(permissions2))
+
+
+def has_permission(permissions_: Union[int, str], method: str) -> bool:
+    """ Check if HTTP method or CRUD action corresponds to permissions (bits or their string representation) """
     try:
-        i = methods[method]
+        bit = PERMISSION_BITS[method]
     except KeyError:
         logger.warning(f'No view method with such name: {method}')
         return False
-    return bool(int(permissions_[i]))
+    return bool(get_permission_bits(permissions_) & bit)
+
+
+class EffectivePermissions:
+    """
+    Snapshot of the permissions of the user compiled from all of its core groups.
+    Permissions of global and organization level groups are merged into `global_permissions` and `org_permissions`
+    with one query. Permissions of the groups on workflow levels are merged per WorkflowLevel1/WorkflowLevel2 pk,
+    these sparse maps are only loaded when an object-level check needs them.
+    All parts are cached via `core.cache` if it's enabled.
+    """
+
+    __slots__ = ('user_pk', 'global_permissions', 'org_permissions', 'group_permissions', '_wl1_permissions',
+                 '_wl2_permissions')
+
+    def __init__(self, user_pk: int, global_permissions: int, org_permissions: int, group_permissions: Dict[int, int]):
+        self.user_pk = user_pk
+        self.global_permissions = global_permissions
+        self.org_permissions = org_permissions
+        self.group_permissions = group_permissions
+        self._wl1_permissions = None
+        self._wl2_permissions = None
+
+    @classmethod
+    def for_user(cls, user: CoreUser) -> 'EffectivePermissions':
+        masks = permissions_cache.get(user.pk, 'masks')
+        if masks is None:
+            global_permissions, org_permissions, group_permissions = PERMISSIONS_NO_ACCESS, PERMISSIONS_NO_ACCESS, {}
+            groups = user.core_groups.values_list('pk', 'permissions', 'is_global', 'is_org_level')
+            for group_pk, group_permissions_, is_global, is_org_level in groups:
+                group_permissions[group_pk] = get_permission_bits(group_permissions_)
+                if is_global:
+                    global_permissions |= group_permissions[group_pk]
+                if is_org_level:
+                    org_permissions |= group_permissions[group_pk]
+            masks = (global_permissions, org_permissions, group_permissions)
+            permissions_cache.set(user.pk, 'masks', masks)
+        return cls(user.pk, *masks)
+
+    def _get_workflowlevel_permissions(self, part: str, through: Type[Model], field_name: str) -> Dict[int, int]:
+        workflowlevel_permissions = permissions_cache.get(self.user_pk, part)
+        if workflowlevel_permissions is None:
+            workflowlevel_permissions = dict()
+            if self.group_permissions:
+                links = through.objects.filter(coregroup_id__in=self.group_permissions)\
+                    .values_list(field_name, 'coregroup_id')
+                for pk, group_pk in links:
+                    workflowlevel_permissions[pk] = workflowlevel_permissions.get(pk, PERMISSIONS_NO_ACCESS) | \
+                        self.group_permissions[group_pk]
+            permissions_cache.set(self.user_pk, part, workflowlevel_permissions)
+        return workflowlevel_permissions
+
+    @property
+    def wl1_permissions(self) -> Dict[int, int]:
+        if self._wl1_permissions is None:
+            self._wl1_permissions = self._get_workflowlevel_permissions('wl1', CoreGroup.workflowlevel1s.through,
+                                                                        'workflowlevel1_id')
+        return self._wl1_permissions
+
+    @property
+    def wl2_permissions(self) -> Dict[int, int]:
+        if self._wl2_permissions is None:
+            self._wl2_permissions = self._get_workflowlevel_permissions('wl2', CoreGroup.workflowlevel2s.through,
+                                                                        'workflowlevel2_id')
+        return self._wl2_permissions
+
+    def has_permission(self, method: str, default: int = PERMISSIONS_NO_ACCESS) -> bool:
+        """ Check global and organization level permissions """
+        return has_permission(self.global_permissions | self.org_permissions | default, method)
+
+    def has_wl1_permission(self, wl1_pk: int, method: str, default: int = PERMISSIONS_NO_ACCESS) -> bool:
+        return has_permission(self.wl1_permissions.get(wl1_pk, PERMISSIONS_NO_ACCESS) | default, method)
+
+    def has_wl2_permission(self, wl2_pk: int, method: str, default: int = PERMISSIONS_NO_ACCESS) -> bool:
+        return has_permission(self.wl2_permissions.get(wl2_pk, PERMISSIONS_NO_ACCESS) | default, method)
+
+
+def get_effective_permissions(user: CoreUser) -> EffectivePermissions:
+    """ Get the permission snapshot of the user, it's loaded once per user object (i.e. per request) """
+    if not hasattr(user, '_effective_permissions'):
+        user._effective_permissions = EffectivePermissions.for_user(user)
+    return user._effective_permissions
 
 
 class IsSuperUserBrowseableAPI(permissions.BasePermission):
@@ -0,0 +1,36 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from core import cache as permissions_cache
+from core.models import CoreGroup, CoreUser
+
+# permissions of the user's groups that are compiled once per user object
+USER_PERMISSION_CACHES = ('_effective_permissions', '_is_org_admin', '_is_global_admin')
+
+
+@receiver(m2m_changed, sender=CoreUser.core_groups.through)
+def invalidate_user_permissions(sender, instance, action, reverse, pk_set, **kwargs):
+    """ Compile the permissions of the users again after their group membership was changed """
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+
+    if isinstance(instance, CoreUser):
+        for attr in USER_PERMISSION_CACHES:
+            instance.__dict__.pop(attr, None)
+
+    if not reverse:
+        permissions_cache.invalidate_users([instance.pk])
+    elif pk_set:
+        permissions_cache.invalidate_users(pk_set)
+    else:
+        # the users removed from the group aren't known after clearing it
+        permissions_cache.invalidate()
+
+
+@receiver([post_save, post_delete], sender=CoreGroup)
+@receiver(m2m_changed, sender=CoreGroup.workflowlevel1s.through)
+@receiver(m2m_changed, sender=CoreGroup.workflowlevel2s.through)
+def invalidate_permissions(sender, **kwargs):
+    """ Drop the permission snapshots of all users after permissions of a group or its workflow levels changed """
+    if kwargs.get('action', 'post_').startswith('post_'):
+        permissions_cache.invalidate()
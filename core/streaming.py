@@ -0,0 +1,128 @@
+"""
+Streaming of list responses.
+
+An unpaginated list is serialized and rendered chunk by chunk while the response is sent, so neither the queryset nor
+the serialized list are held in memory as a whole. The rows are read with `QuerySet.iterator()` and the relations of
+each chunk are prefetched (or loaded by the values serializer) before the chunk is serialized. Lists are streamed as
+a JSON array if requested with the `stream` query parameter or enabled by the STREAM_LIST_RESPONSES setting, and
+always as newline delimited JSON (`Accept: application/x-ndjson`). Newline delimited JSON request bodies are parsed
+line by line while the items are consumed.
+"""
+import json
+from itertools import islice
+from typing import Any, Iterable, Iterator
+
+from django.conf import settings
+from django.db.models import QuerySet, prefetch_related_objects
+from django.http import StreamingHttpResponse
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+from core.values_serializers import ValuesListMixin
+
+DEFAULT_STREAM_LIST_RESPONSES = False
+DEFAULT_STREAMING_LIST_CHUNK_SIZE = 500
+
+
+class NDJSONRenderer(JSONRenderer):
+    """ Renderer of newline delimited JSON, the items of a list are rendered one per line """
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, list):
+            return b''.join(self.render_lines(data))
+        return super().render(data) + b'\n'
+
+    def render_lines(self, items: Iterable) -> Iterator[bytes]:
+        for item in items:
+            yield super().render(item) + b'\n'
+
+
+class NDJSONParser(BaseParser):
+    """ Parser of newline delimited JSON, the data is an iterator of the items that are parsed when consumed """
+    media_type = 'application/x-ndjson'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or dict()).get('encoding', settings.DEFAULT_CHARSET)
+        return self.parse_lines(stream, encoding)
+
+    @staticmethod
+    def parse_lines(stream, encoding: str) -> Iterator[Any]:
+        for number, line in enumerate(stream or (), start=1):
+            line = line.decode(encoding)
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError as exc:
+                raise ParseError(f'NDJSON parse error in line {number} - {exc}')
+
+
+def _get_chunks(iterable: Iterable, chunk_size: int) -> Iterator[list]:
+    iterator = iter(iterable)
+    chunk = list(islice(iterator, chunk_size))
+    while chunk:
+        yield chunk
+        chunk = list(islice(iterator, chunk_size))
+
+
+def _render_json_array(chunks: Iterable[list]) -> Iterator[bytes]:
+    renderer = JSONRenderer()
+    separator = b''
+    yield b'['
+    for data in chunks:
+        if data:
+            # the items of the rendered chunk without the brackets of the array
+            yield separator + renderer.render(data)[1:-1]
+            separator = b','
+    yield b']'
+
+
+def _render_ndjson(chunks: Iterable[list]) -> Iterator[bytes]:
+    renderer = NDJSONRenderer()
+    for data in chunks:
+        yield b''.join(renderer.render_lines(data))
+
+
+def use_streaming(request) -> bool:
+    """ Check if a list is streamed as a JSON array, requested with the `stream` query parameter or by setting """
+    stream = request.GET.get('stream')
+    if stream is None:
+        return getattr(settings, 'STREAM_LIST_RESPONSES', DEFAULT_STREAM_LIST_RESPONSES)
+    return stream.lower() == 'true' or stream == '1'
+
+
+class StreamingListMixin(ValuesListMixin):
+    """
+    Viewset mixin for list actions that stream the serialized queryset in chunks if requested
+    """
+
+    def get_renderers(self):
+        return super().get_renderers() + [NDJSONRenderer()]
+
+    def _serialize_chunks(self, queryset: QuerySet) -> Iterator[list]:
+        chunk_size = getattr(settings, 'STREAMING_LIST_CHUNK_SIZE', DEFAULT_STREAMING_LIST_CHUNK_SIZE)
+        values_serializer = self.get_values_serializer()
+        if values_serializer is not None:
+            rows = values_serializer.get_values(queryset).iterator(chunk_size=chunk_size)
+            for chunk in _get_chunks(rows, chunk_size):
+                yield values_serializer.serialize_rows(chunk)
+        else:
+            # iterator() doesn't prefetch related objects, they are prefetched per chunk
+            lookups = queryset._prefetch_related_lookups
+            for chunk in _get_chunks(queryset.iterator(chunk_size=chunk_size), chunk_size):
+                prefetch_related_objects(chunk, *lookups)
+                yield self.get_serializer(chunk, many=True).data
+
+    def get_list_response(self, queryset: QuerySet):
+        renderer = self.request.accepted_renderer
+        if isinstance(renderer, NDJSONRenderer):
+            return StreamingHttpResponse(_render_ndjson(self._serialize_chunks(queryset)),
+                                         content_type=renderer.media_type)
+        if isinstance(renderer, JSONRenderer) and use_streaming(self.request):
+            return StreamingHttpResponse(_render_json_array(self._serialize_chunks(queryset)),
+                                         content_type=renderer.media_type)
+        return Response(self.get_list_data(queryset))
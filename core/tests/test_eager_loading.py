@@ -0,0 +1,88 @@
+import pytest
+from rest_framework.reverse import reverse
+
+import factories
+from core.eager_loading import get_eager_loading_plan
+from core.models import CoreUser
+from core.serializers import CoreUserSerializer, CoreUserWritableSerializer
+from core.tests.fixtures import org, org_member
+from core.tests.utils import assert_list_queries_constant
+from core.views import CoreUserViewSet
+from workflow.models import WorkflowLevel2, WorkflowTeam
+from workflow.serializers import WorkflowLevel2Serializer, WorkflowTeamListFullSerializer
+from workflow.views import WorkflowLevel2ViewSet, WorkflowTeamViewSet
+
+
+def test_eager_loading_plan():
+    plan = get_eager_loading_plan(CoreUserSerializer, CoreUser)
+    assert plan.select_related == ('organization',)
+    assert plan.prefetch_related == ('organization__industries', 'core_groups', 'core_groups__workflowlevel1s',
+                                     'core_groups__workflowlevel2s')
+
+    # foreign keys rendered by pk are read from the row itself
+    plan = get_eager_loading_plan(WorkflowLevel2Serializer, WorkflowLevel2)
+    assert plan.select_related == ()
+    assert plan.prefetch_related == ('core_groups',)
+
+    plan = get_eager_loading_plan(WorkflowTeamListFullSerializer, WorkflowTeam)
+    assert plan.select_related == ('workflowlevel1',)
+    assert set(plan.prefetch_related) == {'workflowlevel1__user_access', 'workflowlevel1__core_groups'}
+
+    # the serializer of a different model isn't used for the plan
+    assert get_eager_loading_plan(WorkflowLevel2Serializer, CoreUser) == ((), ())
+
+
+def test_eager_loading_plan_write_only():
+    plan = get_eager_loading_plan(CoreUserWritableSerializer, CoreUser)
+    # organization_name follows the organization relation
+    assert plan.select_related == ('organization',)
+    assert plan.prefetch_related == ('core_groups',)
+
+
+@pytest.mark.django_db()
+class TestListQueries:
+
+    def test_coreuser_list(self, request_factory, org_member):
+        def create_objects(count):
+            for _ in range(count):
+                user = factories.CoreUser(organization=org_member.organization)
+                group = factories.CoreGroup(organization=org_member.organization)
+                group.workflowlevel1s.add(factories.WorkflowLevel1(organization=org_member.organization))
+                user.core_groups.add(group)
+
+        def request_list():
+            request = request_factory.get(reverse('coreuser-list'))
+            request.user = org_member
+            return CoreUserViewSet.as_view({'get': 'list'})(request)
+
+        assert_list_queries_constant(request_list, create_objects)
+
+    def test_workflowlevel2_list(self, request_factory):
+        superuser = factories.CoreUser(is_superuser=True)
+
+        def create_objects(count):
+            for _ in range(count):
+                wfl2 = factories.WorkflowLevel2()
+                wfl2.core_groups.add(factories.CoreGroup())
+
+        def request_list():
+            request = request_factory.get(reverse('workflowlevel2-list'))
+            request.user = superuser
+            return WorkflowLevel2ViewSet.as_view({'get': 'list'})(request)
+
+        assert_list_queries_constant(request_list, create_objects)
+
+    def test_workflowteam_list_nested(self, request_factory):
+        superuser = factories.CoreUser(is_superuser=True)
+
+        def create_objects(count):
+            for _ in range(count):
+                team = factories.WorkflowTeam()
+                team.workflowlevel1.core_groups.add(factories.CoreGroup())
+
+        def request_list():
+            request = request_factory.get(reverse('workflowteam-list'), {'nested_models': 'true'})
+            request.user = superuser
+            return WorkflowTeamViewSet.as_view({'get': 'list'})(request)
+
+        assert_list_queries_constant(request_list, create_objects)
@@ -1,4 +1,9 @@
-from core.permissions import has_permission, merge_permissions
+import pytest
+
+import factories
+from core.models import CoreUser, PERMISSIONS_NO_ACCESS, PERMISSIONS_VIEW_ONLY, PERMISSIONS_WORKFLOW_TEAM
+from core.permissions import get_effective_permissions, get_permission_bits, has_permission, merge_permissions
+from core.tests.fixtures import org, org_admin
 
 
 class TestMergePermissions:
@@ -30,3 +35,78 @@ class TestHasPermission:
     def test_has_permission_no_method(self):
         result = has_permission('0100', 'CONNECT')
         assert not result
+
+    def test_has_permission_bits(self):
+        assert has_permission(PERMISSIONS_VIEW_ONLY, 'list')
+        assert not has_permission(PERMISSIONS_VIEW_ONLY, 'create')
+        assert has_permission(PERMISSIONS_WORKFLOW_TEAM, 'partial_update')
+        assert not has_permission(PERMISSIONS_WORKFLOW_TEAM, 'destroy')
+        # values above 15 grant everything
+        assert has_permission(16, 'DELETE')
+
+    def test_get_permission_bits(self):
+        assert get_permission_bits('1110') == PERMISSIONS_WORKFLOW_TEAM
+        assert get_permission_bits(PERMISSIONS_VIEW_ONLY) == PERMISSIONS_VIEW_ONLY
+        assert get_permission_bits(20) == 15
+
+
+@pytest.mark.django_db()
+class TestEffectivePermissions:
+
+    def test_effective_permissions(self, org_admin, org, django_assert_num_queries):
+        wfl1 = factories.WorkflowLevel1(organization=org)
+        wfl2 = factories.WorkflowLevel2(workflowlevel1=wfl1)
+        wfl1_group = factories.CoreGroup(organization=org, permissions=PERMISSIONS_VIEW_ONLY)
+        wfl1_group.workflowlevel1s.add(wfl1)
+        wfl2_group = factories.CoreGroup(organization=org, permissions=PERMISSIONS_WORKFLOW_TEAM)
+        wfl2_group.workflowlevel2s.add(wfl2)
+        org_admin.core_groups.add(wfl1_group, wfl2_group)
+
+        # the workflow level maps are only loaded when they are needed
+        with django_assert_num_queries(1):
+            effective_permissions = get_effective_permissions(org_admin)
+            assert get_effective_permissions(org_admin) is effective_permissions
+            assert effective_permissions.has_permission('destroy')
+        with django_assert_num_queries(1):
+            assert effective_permissions.has_wl1_permission(wfl1.pk, 'list')
+        with django_assert_num_queries(1):
+            assert effective_permissions.has_wl2_permission(wfl2.pk, 'update')
+
+        assert effective_permissions.global_permissions == PERMISSIONS_NO_ACCESS
+        assert effective_permissions.has_permission('destroy')
+        assert effective_permissions.has_wl1_permission(wfl1.pk, 'list')
+        assert not effective_permissions.has_wl1_permission(wfl1.pk, 'create')
+        assert effective_permissions.has_wl2_permission(wfl2.pk, 'update')
+        assert not effective_permissions.has_wl2_permission(wfl2.pk + 1, 'list')
+        assert effective_permissions.has_wl2_permission(wfl2.pk + 1, 'list', default=PERMISSIONS_VIEW_ONLY)
+
+    def test_invalidated_on_group_membership_change(self, org_admin, org):
+        effective_permissions = get_effective_permissions(org_admin)
+        org_admin.core_groups.clear()
+        assert get_effective_permissions(org_admin) is not effective_permissions
+        assert not get_effective_permissions(org_admin).has_permission('create')
+
+    def test_cached_snapshot(self, org_admin, org, settings, django_assert_num_queries):
+        settings.CORE_PERMISSIONS_CACHE_TIMEOUT = 60
+        wfl1 = factories.WorkflowLevel1(organization=org)
+        group = factories.CoreGroup(organization=org, permissions=PERMISSIONS_VIEW_ONLY)
+        group.workflowlevel1s.add(wfl1)
+        org_admin.core_groups.add(group)
+
+        assert get_effective_permissions(org_admin).has_wl1_permission(wfl1.pk, 'list')
+
+        # another request of the user gets the snapshot from the cache
+        user = CoreUser.objects.get(pk=org_admin.pk)
+        with django_assert_num_queries(0):
+            assert get_effective_permissions(user).has_permission('create')
+            assert get_effective_permissions(user).has_wl1_permission(wfl1.pk, 'list')
+
+        # changes of workflow levels of groups drop the snapshots
+        group.workflowlevel1s.remove(wfl1)
+        user = CoreUser.objects.get(pk=org_admin.pk)
+        assert not get_effective_permissions(user).has_wl1_permission(wfl1.pk, 'list')
+
+        # changes of group membership drop the snapshot of the user
+        org_admin.core_groups.remove(org_admin.core_groups.get(is_org_level=True))
+        user = CoreUser.objects.get(pk=org_admin.pk)
+        assert not get_effective_permissions(user).has_permission('create')
@@ -0,0 +1,107 @@
+import io
+import json
+
+import pytest
+from rest_framework.exceptions import ParseError
+from rest_framework.reverse import reverse
+
+import factories
+from core.streaming import NDJSONParser, NDJSONRenderer
+from core.tests.fixtures import org, org_member
+from core.tests.utils import assert_list_queries_constant
+from core.views import CoreUserViewSet, OrganizationViewSet
+from workflow.views import WorkflowLevel1ViewSet, WorkflowLevel2ViewSet
+
+
+def test_ndjson_renderer():
+    renderer = NDJSONRenderer()
+    assert renderer.render([{'a': 1}, {'b': 'ä'}]) == b'{"a":1}\n{"b":"\xc3\xa4"}\n'
+    assert renderer.render({'detail': 'Not found.'}) == b'{"detail":"Not found."}\n'
+
+
+def test_ndjson_parser():
+    items = NDJSONParser().parse(io.BytesIO(b'{"a": 1}\n\n{"b": "\xc3\xa4"}\n'), parser_context={})
+    assert list(items) == [{'a': 1}, {'b': 'ä'}]
+
+    items = NDJSONParser().parse(io.BytesIO(b'{"a": 1}\n{"b": \n'), parser_context={})
+    assert next(items) == {'a': 1}
+    with pytest.raises(ParseError):
+        next(items)
+
+
+@pytest.mark.django_db()
+class TestStreamingList:
+
+    def _get_response(self, view, request_factory, url, user, headers=None, **params):
+        request = request_factory.get(url, params, **(headers or {}))
+        request.user = user
+        response = view(request)
+        assert response.status_code == 200
+        return response
+
+    def _get_content(self, *args, **kwargs):
+        response = self._get_response(*args, **kwargs)
+        if response.streaming:
+            return b''.join(response.streaming_content)
+        response.render()
+        return response.content
+
+    @pytest.mark.parametrize('fast', ('false', 'true'))
+    def test_coreuser_list(self, request_factory, org_member, settings, fast):
+        settings.STREAMING_LIST_CHUNK_SIZE = 2
+        for _ in range(4):
+            user = factories.CoreUser(organization=org_member.organization)
+            user.core_groups.add(factories.CoreGroup(organization=org_member.organization))
+        view = CoreUserViewSet.as_view({'get': 'list'})
+        url = reverse('coreuser-list')
+
+        content = self._get_content(view, request_factory, url, org_member, fast=fast)
+        response = self._get_response(view, request_factory, url, org_member, fast=fast, stream='true')
+        assert response.streaming
+        assert response['Content-Type'] == 'application/json'
+        assert b''.join(response.streaming_content) == content
+
+        response = self._get_response(view, request_factory, url, org_member, fast=fast,
+                                      headers={'HTTP_ACCEPT': 'application/x-ndjson'})
+        assert response.streaming
+        assert response['Content-Type'] == 'application/x-ndjson'
+        lines = b''.join(response.streaming_content).splitlines()
+        assert [json.loads(line) for line in lines] == json.loads(content)
+
+    def test_empty_list(self, request_factory, settings):
+        settings.STREAM_LIST_RESPONSES = True
+        superuser = factories.CoreUser(is_superuser=True)
+        view = WorkflowLevel2ViewSet.as_view({'get': 'list'})
+        url = reverse('workflowlevel2-list')
+
+        assert self._get_content(view, request_factory, url, superuser, all='true') == b'[]'
+        assert self._get_content(view, request_factory, url, superuser, all='true',
+                                 headers={'HTTP_ACCEPT': 'application/x-ndjson'}) == b''
+        # paginated lists aren't streamed
+        assert not self._get_response(view, request_factory, url, superuser).streaming
+
+    def test_workflowlevel1_and_organization_list(self, request_factory, settings):
+        settings.STREAMING_LIST_CHUNK_SIZE = 1
+        superuser = factories.CoreUser(is_superuser=True)
+        factories.WorkflowLevel1.create_batch(3)
+        for viewset, url in ((WorkflowLevel1ViewSet, reverse('workflowlevel1-list')),
+                             (OrganizationViewSet, reverse('organization-list'))):
+            view = viewset.as_view({'get': 'list'})
+            content = self._get_content(view, request_factory, url, superuser)
+            assert self._get_content(view, request_factory, url, superuser, stream='1') == content
+
+    def test_queries_per_chunk(self, request_factory, settings):
+        settings.STREAMING_LIST_CHUNK_SIZE = 10
+        superuser = factories.CoreUser(is_superuser=True)
+
+        def create_objects(count):
+            for _ in range(count):
+                factories.WorkflowLevel2().core_groups.add(factories.CoreGroup())
+
+        def request_list():
+            request = request_factory.get(reverse('workflowlevel2-list'), {'all': 'true', 'stream': 'true'})
+            request.user = superuser
+            return WorkflowLevel2ViewSet.as_view({'get': 'list'})(request)
+
+        # the core groups are prefetched for each chunk
+        assert_list_queries_constant(request_list, create_objects)
@@ -0,0 +1,98 @@
+from datetime import datetime
+
+import pytest
+from django.utils import timezone
+from rest_framework.reverse import reverse
+
+import factories
+from core.models import Industry
+from core.serializers import CoreUserSerializer, CoreUserWritableSerializer
+from core.tests.fixtures import org, org_member
+from core.tests.utils import assert_list_queries_constant
+from core.values_serializers import get_values_serializer
+from core.views import CoreUserViewSet
+from workflow.models import WorkflowLevel2
+from workflow.serializers import WorkflowTeamListFullSerializer
+from workflow.views import WorkflowLevel2ViewSet, WorkflowTeamViewSet
+
+
+def test_get_values_serializer():
+    values_serializer = get_values_serializer(CoreUserSerializer)
+    assert values_serializer is not None
+    assert get_values_serializer(CoreUserSerializer) is values_serializer
+    # invitation_token isn't an attribute of a CoreUser, the serializer skips it
+    assert [name for name, _ in values_serializer.readers] == [
+        'id', 'core_user_uuid', 'first_name', 'last_name', 'email', 'username', 'is_active', 'title', 'contact_info',
+        'privacy_disclaimer_accepted', 'organization', 'core_groups']
+
+    assert get_values_serializer(WorkflowTeamListFullSerializer) is not None
+    # organization_name follows a relation
+    assert get_values_serializer(CoreUserWritableSerializer) is None
+
+
+@pytest.mark.django_db()
+class TestValuesSerialization:
+
+    def _get_content(self, view, request_factory, url, user, **params):
+        request = request_factory.get(url, params)
+        request.user = user
+        response = view(request)
+        response.render()
+        assert response.status_code == 200
+        return response.content
+
+    def test_coreuser_list(self, request_factory, org_member):
+        group = factories.CoreGroup(organization=org_member.organization, name='B')
+        group.workflowlevel1s.add(factories.WorkflowLevel1(organization=org_member.organization))
+        org_member.core_groups.add(group, factories.CoreGroup(organization=org_member.organization, name='A'))
+        org_member.organization.industries.add(Industry.objects.create(name='Tech'))
+        factories.CoreUser(organization=org_member.organization, username='another_user', title='mr')
+        view = CoreUserViewSet.as_view({'get': 'list'})
+        url = reverse('coreuser-list')
+
+        content = self._get_content(view, request_factory, url, org_member)
+        assert self._get_content(view, request_factory, url, org_member, fast='true') == content
+
+    def test_workflowlevel2_list(self, request_factory, settings):
+        settings.FAST_LIST_SERIALIZATION = True
+        superuser = factories.CoreUser(is_superuser=True)
+        wfl2 = factories.WorkflowLevel2(name='B', created_by=superuser, type=factories.WorkflowLevelType(),
+                                        start_date=timezone.make_aware(datetime(2020, 1, 1, 12, 30)))
+        wfl2.core_groups.add(factories.CoreGroup(name='B'), factories.CoreGroup(name='A'))
+        factories.WorkflowLevel2(name='A')
+        view = WorkflowLevel2ViewSet.as_view({'get': 'list'})
+        url = reverse('workflowlevel2-list')
+
+        content = self._get_content(view, request_factory, url, superuser, all='true', fast='false')
+        assert self._get_content(view, request_factory, url, superuser, all='true') == content
+        # only the complete list is serialized from values
+        assert self._get_content(view, request_factory, url, superuser).startswith(b'{"count":2')
+
+    def test_workflowteam_list(self, request_factory):
+        superuser = factories.CoreUser(is_superuser=True)
+        team = factories.WorkflowTeam(status='active')
+        team.workflowlevel1.core_groups.add(factories.CoreGroup())
+        team.workflowlevel1.user_access.add(superuser)
+        factories.WorkflowTeam(workflowlevel1=None)
+        view = WorkflowTeamViewSet.as_view({'get': 'list'})
+        url = reverse('workflowteam-list')
+
+        for nested_models in ('false', 'true'):
+            content = self._get_content(view, request_factory, url, superuser, nested_models=nested_models)
+            assert self._get_content(view, request_factory, url, superuser, nested_models=nested_models,
+                                     fast='1') == content
+
+    def test_queries(self, request_factory):
+        superuser = factories.CoreUser(is_superuser=True)
+
+        def create_objects(count):
+            for _ in range(count):
+                factories.WorkflowLevel2().core_groups.add(factories.CoreGroup())
+
+        def request_list():
+            request = request_factory.get(reverse('workflowlevel2-list'), {'all': 'true', 'fast': 'true'})
+            request.user = superuser
+            return WorkflowLevel2ViewSet.as_view({'get': 'list'})(request)
+
+        assert_list_queries_constant(request_list, create_objects)
+        assert len(request_list().data) == WorkflowLevel2.objects.count() == 5
@@ -0,0 +1,26 @@
+from typing import Callable, Iterable
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+def assert_list_queries_constant(request_list: Callable, create_objects: Callable[[int], None],
+                                 sizes: Iterable[int] = (1, 5)) -> None:
+    """
+    Assert that the number of queries of a list request doesn't depend on the number of listed objects.
+    `create_objects(n)` creates n more objects before `request_list()` is called for each size.
+    """
+    counts = dict()
+    created = 0
+    for size in sizes:
+        create_objects(size - created)
+        created = size
+        with CaptureQueriesContext(connection) as context:
+            response = request_list()
+            if response.streaming:
+                b''.join(response.streaming_content)
+            else:
+                response.render()
+        assert response.status_code == 200
+        counts[size] = len(context.captured_queries)
+    assert len(set(counts.values())) == 1, f'Number of queries per number of objects: {counts}'
@@ -0,0 +1,214 @@
+"""
+Fast serialization of lists from the values of a queryset.
+
+DRF's serializers resolve every field of every object through model instances, which dominates the response time of
+large lists. A `ValuesSerializer` is derived once from a `ModelSerializer` class: it loads the rows with
+`QuerySet.values()` and converts them with precomputed converters of the serializer fields. The pks of many related
+fields are aggregated in SQL (`ArrayAgg`) and nested serializers are loaded from values too, with one query per
+relation. The output is the same as the output of the serializer. Serializers with fields that can't be read from
+the values (p.e. method fields or sources following relations) aren't supported.
+"""
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Type, Union
+
+from django.conf import settings
+from django.contrib.postgres.aggregates import ArrayAgg
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import ManyToManyField, ManyToManyRel, Model, QuerySet
+from rest_framework import serializers
+from rest_framework.fields import empty
+from rest_framework.relations import PKOnlyObject
+
+DEFAULT_FAST_LIST_SERIALIZATION = False
+
+_values_serializers = dict()
+
+# converters of fields whose representation of database values is a plain type conversion
+_CONVERTERS = {
+    serializers.CharField.to_representation: str,
+    serializers.IntegerField.to_representation: int,
+    serializers.BooleanField.to_representation: bool,
+}
+
+
+class UnsupportedField(Exception):
+    pass
+
+
+def _get_converter(field: serializers.Field) -> Callable[[Any], Any]:
+    return _CONVERTERS.get(type(field).to_representation, field.to_representation)
+
+
+def _get_pk_converter(field: serializers.RelatedField) -> Callable[[Any], Any]:
+    if not isinstance(field, serializers.PrimaryKeyRelatedField):
+        raise UnsupportedField(field.field_name)
+    if type(field) is serializers.PrimaryKeyRelatedField and field.pk_field is None:
+        return lambda pk: pk
+    to_representation = field.to_representation
+    return lambda pk: to_representation(PKOnlyObject(pk=pk))
+
+
+def _get_related_pks(model_field: Union[ManyToManyField, ManyToManyRel], pks: list) -> Dict[Any, list]:
+    """ Get the pks of the objects related to each of the objects, in the default order of the related model """
+    if not pks:
+        return dict()
+    if isinstance(model_field, ManyToManyField):
+        through = model_field.remote_field.through
+        source, target = model_field.m2m_field_name(), model_field.m2m_reverse_field_name()
+    else:
+        through = model_field.through
+        source, target = model_field.field.m2m_reverse_field_name(), model_field.field.m2m_field_name()
+    ordering = [f'-{target}__{o[1:]}' if o.startswith('-') else f'{target}__{o}'
+                for o in model_field.related_model._meta.ordering] or [target]
+    rows = through._default_manager.filter(**{f'{source}__in': pks})\
+        .values(source).annotate(related_pks=ArrayAgg(target, ordering=ordering)).order_by()
+    return {row[source]: row['related_pks'] for row in rows}
+
+
+class ValuesSerializer:
+    """ Serializer of a list of objects from the values of a queryset, with the output of a `ModelSerializer` """
+
+    def __init__(self, serializer: serializers.ModelSerializer):
+        self.model = serializer.Meta.model
+        self.columns = ['pk']
+        self.readers = []  # (field name, function of the row and the loaded relations)
+        self.loaders = dict()  # relation name -> function of the rows and their pks
+        for field_name, field in serializer.fields.items():
+            if not field.write_only:
+                self._add_field(field_name, field)
+
+    def _add_field(self, field_name: str, field: serializers.Field) -> None:
+        if field.source == '*' or len(field.source_attrs) != 1 or isinstance(field, serializers.ModelField):
+            raise UnsupportedField(field_name)
+        source = field.source_attrs[0]
+        try:
+            model_field = self.model._meta.pk if source == 'pk' else self.model._meta.get_field(source)
+        except FieldDoesNotExist:
+            model_field = None
+
+        if model_field is None or not (model_field.concrete or model_field.many_to_many):
+            if model_field is not None or hasattr(self.model, source) or field.default is not empty:
+                raise UnsupportedField(field_name)
+            # the serializer handles the missing attribute
+            if field.allow_null:
+                self.readers.append((field_name, lambda row, loaded: None))
+            elif field.required:
+                raise UnsupportedField(field_name)
+            return
+
+        if not model_field.is_relation:
+            convert = _get_converter(field)
+            self.columns.append(source)
+            self.readers.append((field_name, lambda row, loaded: None if row[source] is None else convert(row[source])))
+        elif model_field.many_to_many:
+            self._add_many_related_field(field_name, field, model_field)
+        elif model_field.many_to_one or model_field.one_to_one:
+            self._add_related_field(field_name, field, source, model_field)
+        else:
+            raise UnsupportedField(field_name)
+
+    def _add_related_field(self, field_name: str, field: serializers.Field, source: str, model_field) -> None:
+        self.columns.append(source)
+        if isinstance(field, serializers.ModelSerializer):
+            nested = _get_nested_values_serializer(field, model_field.related_model)
+
+            def load(rows, pks):
+                return nested.serialize_pks(model_field.related_model._base_manager, {row[source] for row in rows})
+
+            self.loaders[field_name] = load
+            self.readers.append((field_name, lambda row, loaded: None if row[source] is None
+                                 else loaded[field_name][row[source]]))
+        else:
+            convert = _get_pk_converter(field)
+            self.readers.append((field_name, lambda row, loaded: None if row[source] is None else convert(row[source])))
+
+    def _add_many_related_field(self, field_name: str, field: serializers.Field,
+                                model_field: Union[ManyToManyField, ManyToManyRel]) -> None:
+        if isinstance(field, serializers.ManyRelatedField):
+            convert = _get_pk_converter(field.child_relation)
+            self.loaders[field_name] = lambda rows, pks: _get_related_pks(model_field, pks)
+            self.readers.append((field_name, lambda row, loaded: [
+                convert(pk) for pk in loaded[field_name].get(row['pk'], ())]))
+        elif isinstance(field, serializers.ListSerializer) and isinstance(field.child, serializers.ModelSerializer):
+            nested = _get_nested_values_serializer(field.child, model_field.related_model)
+
+            def load(rows, pks):
+                related_pks = _get_related_pks(model_field, pks)
+                objects = nested.serialize_pks(model_field.related_model._default_manager,
+                                               {pk for object_pks in related_pks.values() for pk in object_pks})
+                return {pk: [objects[related_pk] for related_pk in object_pks]
+                        for pk, object_pks in related_pks.items()}
+
+            self.loaders[field_name] = load
+            self.readers.append((field_name, lambda row, loaded: loaded[field_name].get(row['pk'], [])))
+        else:
+            raise UnsupportedField(field_name)
+
+    def serialize_rows(self, rows: List[dict]) -> List[OrderedDict]:
+        pks = [row['pk'] for row in rows]
+        loaded = {name: load(rows, pks) for name, load in self.loaders.items()}
+        return [OrderedDict((name, read(row, loaded)) for name, read in self.readers) for row in rows]
+
+    def serialize_pks(self, manager, pks: set) -> Dict[Any, OrderedDict]:
+        """ Serialize the objects with the pks by their pk """
+        pks.discard(None)
+        if not pks:
+            return dict()
+        rows = list(manager.filter(pk__in=pks).order_by().values(*self.columns))
+        return {row['pk']: data for row, data in zip(rows, self.serialize_rows(rows))}
+
+    def get_values(self, queryset: QuerySet) -> QuerySet:
+        """ Get the rows of the objects of the queryset to serialize """
+        return queryset.select_related(None).prefetch_related(None).values(*self.columns)
+
+    def serialize(self, queryset: QuerySet) -> List[OrderedDict]:
+        """ Serialize the objects of the queryset in its order """
+        return self.serialize_rows(list(self.get_values(queryset)))
+
+
+def _get_nested_values_serializer(serializer: serializers.ModelSerializer, model: Type[Model]) -> ValuesSerializer:
+    if serializer.Meta.model is not model:
+        raise UnsupportedField(serializer.field_name)
+    return ValuesSerializer(serializer)
+
+
+def get_values_serializer(serializer_class: Type[serializers.BaseSerializer]) -> Optional[ValuesSerializer]:
+    """ Get the values serializer with the output of the serializer class, None if the serializer isn't supported """
+    if serializer_class not in _values_serializers:
+        values_serializer = None
+        if issubclass(serializer_class, serializers.ModelSerializer):
+            try:
+                values_serializer = ValuesSerializer(serializer_class())
+            except UnsupportedField:
+                pass
+        _values_serializers[serializer_class] = values_serializer
+    return _values_serializers[serializer_class]
+
+
+def use_values_serialization(request) -> bool:
+    """
+    Check if a list is serialized from values, requested with the `fast` query parameter
+    or enabled by the FAST_LIST_SERIALIZATION setting
+    """
+    fast = request.GET.get('fast')
+    if fast is None:
+        return getattr(settings, 'FAST_LIST_SERIALIZATION', DEFAULT_FAST_LIST_SERIALIZATION)
+    return fast.lower() == 'true' or fast == '1'
+
+
+class ValuesListMixin:
+    """
+    Viewset mixin for list actions that serialize the queryset from its values if requested
+    and supported by the serializer of the action
+    """
+
+    def get_values_serializer(self) -> Optional[ValuesSerializer]:
+        if use_values_serialization(self.request):
+            return get_values_serializer(self.get_serializer_class())
+        return None
+
+    def get_list_data(self, queryset: QuerySet) -> list:
+        values_serializer = self.get_values_serializer()
+        if values_serializer is not None:
+            return values_serializer.serialize(queryset)
+        return self.get_serializer(queryset, many=True).data
@@ -1,12 +1,13 @@
 from rest_framework import viewsets
 from rest_framework.response import Response
 
+from core.eager_loading import EagerLoadingMixin
 from core.models import CoreGroup
 from core.serializers import CoreGroupSerializer
 from core.permissions import IsOrgMember
 
 
-class CoreGroupViewSet(viewsets.ModelViewSet):
+class CoreGroupViewSet(EagerLoadingMixin, viewsets.ModelViewSet):
     """
     CoreGroup is similar to Django Group, but it is associated with an organization.
     It's used for creating groups of Core Users inside an organization and defining model level permissions
@@ -10,18 +10,21 @@ import django_filters
 import jwt
 from drf_yasg.utils import swagger_auto_schema
 
+from core.eager_loading import EagerLoadingMixin
 from core.models import CoreUser, Organization
 from core.serializers import (CoreUserSerializer, CoreUserWritableSerializer, CoreUserInvitationSerializer,
                               CoreUserResetPasswordSerializer, CoreUserResetPasswordCheckSerializer,
                               CoreUserResetPasswordConfirmSerializer)
 from core.permissions import AllowAuthenticatedRead, AllowOnlyOrgAdmin, IsOrgMember
+from core.streaming import StreamingListMixin
 from core.swagger import (COREUSER_INVITE_RESPONSE, COREUSER_INVITE_CHECK_RESPONSE, COREUSER_RESETPASS_RESPONSE,
                           DETAIL_RESPONSE, SUCCESS_RESPONSE, TOKEN_QUERY_PARAM)
 from core.jwt_utils import create_invitation_token
 from core.email_utils import send_email
+from workflow.pagination import KeysetPagination
 
 
-class CoreUserViewSet(mixins.ListModelMixin, mixins.RetrieveModelMixin,
+class CoreUserViewSet(EagerLoadingMixin, StreamingListMixin, mixins.ListModelMixin, mixins.RetrieveModelMixin,
                       mixins.CreateModelMixin, mixins.UpdateModelMixin,
                       viewsets.GenericViewSet):
     """
@@ -64,12 +67,15 @@ class CoreUserViewSet(mixins.ListModelMixin, mixins.RetrieveModelMixin,
         if not request.user.is_global_admin:
             organization_id = request.user.organization_id
             queryset = queryset.filter(organization_id=organization_id)
-        serializer = self.get_serializer(
-            instance=queryset, context={'request': request}, many=True)
-        return Response(serializer.data)
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+        return self.get_list_response(queryset)
 
     def retrieve(self, request, *args, **kwargs):
-        queryset = self.queryset
+        queryset = self.get_queryset()
         user = get_object_or_404(queryset, pk=kwargs.get('pk'))
         serializer = self.get_serializer(instance=user, context={'request': request})
         return Response(serializer.data)
@@ -249,3 +255,4 @@ class CoreUserViewSet(mixins.ListModelMixin, mixins.RetrieveModelMixin,
     filter_backends = (django_filters.rest_framework.DjangoFilterBackend,)
     queryset = CoreUser.objects.all()
     permission_classes = (AllowAuthenticatedRead,)
+    pagination_class = KeysetPagination
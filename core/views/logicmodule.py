@@ -4,6 +4,7 @@ from rest_framework import viewsets
 
 from django_filters.rest_framework import DjangoFilterBackend
 
+from core.eager_loading import EagerLoadingMixin
 from core.permissions import IsSuperUser
 from core.models import LogicModule
 from core.serializers import LogicModuleSerializer
@@ -11,7 +12,7 @@ from core.serializers import LogicModuleSerializer
 logger = logging.getLogger(__name__)
 
 
-class LogicModuleViewSet(viewsets.ModelViewSet):
+class LogicModuleViewSet(EagerLoadingMixin, viewsets.ModelViewSet):
     """
     title:
     LogicModule of the application
@@ -3,11 +3,12 @@ import django_filters
 
 from oauth2_provider.models import AccessToken, Application, RefreshToken
 
+from core.eager_loading import EagerLoadingMixin
 from core.serializers import AccessTokenSerializer, ApplicationSerializer, RefreshTokenSerializer
 from core.permissions import IsSuperUser
 
 
-class AccessTokenViewSet(mixins.ListModelMixin, mixins.RetrieveModelMixin,
+class AccessTokenViewSet(EagerLoadingMixin, mixins.ListModelMixin, mixins.RetrieveModelMixin,
                          mixins.DestroyModelMixin,
                          viewsets.GenericViewSet):
     """
@@ -40,7 +41,7 @@ class AccessTokenViewSet(mixins.ListModelMixin, mixins.RetrieveModelMixin,
     serializer_class = AccessTokenSerializer
 
 
-class ApplicationViewSet(viewsets.ModelViewSet):
+class ApplicationViewSet(EagerLoadingMixin, viewsets.ModelViewSet):
     """
     title:
     Clients on the authorization server
@@ -79,7 +80,7 @@ class ApplicationViewSet(viewsets.ModelViewSet):
     serializer_class = ApplicationSerializer
 
 
-class RefreshTokenViewSet(mixins.ListModelMixin, mixins.RetrieveModelMixin,
+class RefreshTokenViewSet(EagerLoadingMixin, mixins.ListModelMixin, mixins.RetrieveModelMixin,
                           mixins.DestroyModelMixin,
                           viewsets.GenericViewSet):
     """
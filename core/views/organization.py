@@ -2,17 +2,18 @@ import logging
 
 import django_filters
 from rest_framework import viewsets
-from rest_framework.response import Response
 
+from core.eager_loading import EagerLoadingMixin
 from core.models import Organization
 from core.serializers import OrganizationSerializer
 from core.permissions import IsOrgMember
+from core.streaming import StreamingListMixin
 
 
 logger = logging.getLogger(__name__)
 
 
-class OrganizationViewSet(viewsets.ModelViewSet):
+class OrganizationViewSet(EagerLoadingMixin, StreamingListMixin, viewsets.ModelViewSet):
     """
     Organization is a collection of CoreUsers An organization is also the primary relationship for a user.
     They are associated with an organization that then provides them access to join a workflow team.
@@ -40,8 +41,7 @@ class OrganizationViewSet(viewsets.ModelViewSet):
         if not request.user.is_global_admin:
             organization_id = request.user.organization_id
             queryset = queryset.filter(pk=organization_id)
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+        return self.get_list_response(queryset)
 
     filter_backends = (django_filters.rest_framework.DjangoFilterBackend,)
     permission_classes = (IsOrgMember,)
@@ -0,0 +1,68 @@
+"""
+Cache of local (Buildly) objects nested into responses by the Data Mesh, shared between requests and processes
+via Django's cache. Objects are stored together with their dict representation, so that the access to them can
+still be validated per request. Each model has a version that is part of the keys: changing an object of the model
+bumps the version and thereby drops all cached objects of it. The cache is disabled unless
+DATAMESH_LOCAL_CACHE_TIMEOUT is set.
+"""
+import time
+from typing import Dict, Iterable, Tuple, Type
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Model
+
+DEFAULT_LOCAL_CACHE_TIMEOUT = 0
+KEY_PREFIX = 'datamesh:local'
+
+
+def get_timeout() -> int:
+    return getattr(settings, 'DATAMESH_LOCAL_CACHE_TIMEOUT', DEFAULT_LOCAL_CACHE_TIMEOUT)
+
+
+def is_enabled() -> bool:
+    return get_timeout() > 0
+
+
+def _get_version_key(model: Type[Model]) -> str:
+    return f'{KEY_PREFIX}:{model._meta.label_lower}:version'
+
+
+def _get_version(model: Type[Model]) -> int:
+    version_key = _get_version_key(model)
+    version = cache.get(version_key)
+    if version is None:
+        # start with a unique version, objects cached before the version key was evicted must not be valid again
+        cache.add(version_key, int(time.time() * 1000), None)
+        version = cache.get(version_key)
+    return version
+
+
+def _get_key(model: Type[Model], version: int, pk_name: str, pk: str) -> str:
+    return f'{KEY_PREFIX}:{model._meta.label_lower}:{version}:{pk_name}:{pk}'
+
+
+def get_many(model: Type[Model], pk_name: str, pks: Iterable[str]) -> Dict[str, Tuple[Model, dict]]:
+    """ Get cached objects with their dicts by the values of the lookup field """
+    if not is_enabled():
+        return dict()
+    version = _get_version(model)
+    keys = {_get_key(model, version, pk_name, pk): pk for pk in pks}
+    return {keys[key]: value for key, value in cache.get_many(list(keys)).items()}
+
+
+def set_many(model: Type[Model], pk_name: str, objects: Dict[str, Tuple[Model, dict]]) -> None:
+    """ Cache objects with their dicts by the values of the lookup field """
+    if not is_enabled() or not objects:
+        return
+    version = _get_version(model)
+    cache.set_many({_get_key(model, version, pk_name, pk): value for pk, value in objects.items()}, get_timeout())
+
+
+def invalidate(model: Type[Model]) -> None:
+    """ Drop all cached objects of the model """
+    version_key = _get_version_key(model)
+    try:
+        cache.incr(version_key)
+    except ValueError:
+        cache.set(version_key, int(time.time() * 1000), None)
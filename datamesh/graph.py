@@ -0,0 +1,148 @@
+import logging
+import threading
+import time
+from typing import Any, Dict, List, Optional, Set, Tuple, Type
+
+from django.apps import apps
+from django.conf import settings
+from django.db import models
+
+from .models import LogicModuleModel, Relationship
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_GRAPH_TTL = 300
+
+
+class ModelNode:
+    """
+    Logic module model together with its relationships and their direction (True = forwards, False = backwards)
+    """
+    __slots__ = ('model', 'relationships')
+
+    def __init__(self, model: LogicModuleModel):
+        self.model = model
+        self.relationships = list()
+
+    def add_relationship(self, relationship: Relationship, is_forward_lookup: bool) -> None:
+        self.relationships.append((relationship, is_forward_lookup))
+
+
+class RelationshipGraph:
+    """
+    Process-wide graph of all logic module models and relationships between them, compiled with two queries.
+    The graph is keyed by (logic_module_endpoint_name, endpoint) and rebuilt lazily after invalidation
+    (on changes of the Data Mesh models in this process) or after a TTL (on changes made by other processes).
+    The compiled models and relationships are shared between requests and must not be changed.
+    """
+
+    def __init__(self, ttl: float = None):
+        self._ttl = ttl
+        self._nodes = None
+        self._index = None
+        self._local_models = None
+        self._expires_at = 0
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    @property
+    def ttl(self) -> float:
+        if self._ttl is not None:
+            return self._ttl
+        return getattr(settings, 'DATAMESH_GRAPH_TTL', DEFAULT_GRAPH_TTL)
+
+    def get_node(self, logic_module_endpoint: str, model_endpoint: str) -> ModelNode:
+        """ Get the model with its relationships, raises LogicModuleModel.DoesNotExist like a model lookup """
+        node = self._get_nodes().get((logic_module_endpoint, model_endpoint))
+        if node is None:
+            raise LogicModuleModel.DoesNotExist(
+                f'LogicModuleModel matching endpoint "{model_endpoint}" of "{logic_module_endpoint}" does not exist.'
+            )
+        return node
+
+    @property
+    def is_compiled(self) -> bool:
+        """ Check if the graph is compiled and fresh, so accessing it doesn't query the database """
+        return self._nodes is not None and time.monotonic() < self._expires_at
+
+    def get_local_models(self) -> Set[Type[models.Model]]:
+        """ Get Django models of the local logic module models, resolved once per compiled graph """
+        nodes = self._get_nodes()
+        local_models = self._local_models
+        if local_models is None or local_models[0] is not nodes:
+            resolved = set()
+            for node in nodes.values():
+                if node.model.is_local:
+                    try:
+                        resolved.add(apps.get_model(app_label=node.model.logic_module_endpoint_name,
+                                                    model_name=node.model.endpoint.strip('/')))
+                    except LookupError:
+                        continue
+            local_models = (nodes, frozenset(resolved))
+            self._local_models = local_models
+        return local_models[1]
+
+    def get_model_names(self) -> List[str]:
+        """ Get the concatenated names (logic module endpoint name and model name) of all models """
+        return list(self._get_index()[0])
+
+    def get_model_by_name(self, concatenated_model_name: str) -> Optional[LogicModuleModel]:
+        """ Get a model by its concatenated name, p.e. 'locationSiteProfile', None if it doesn't exist """
+        return self._get_index()[0].get(concatenated_model_name)
+
+    def get_relationship(self, pk: Any) -> Optional[Relationship]:
+        """ Get a relationship with its models by its pk, None if it doesn't exist """
+        return self._get_index()[1].get(pk)
+
+    def invalidate(self) -> None:
+        """ Drop the compiled graph, it's rebuilt on the next access """
+        with self._lock:
+            self._nodes = None
+            self._index = None
+            self._local_models = None
+            self._generation += 1
+
+    def _get_index(self) -> Tuple[Dict[str, LogicModuleModel], Dict[Any, Relationship]]:
+        """ Get the models by concatenated name and the relationships by pk, indexed once per compiled graph """
+        nodes = self._get_nodes()
+        index = self._index
+        if index is None or index[0] is not nodes:
+            models_by_name = {node.model.concatenated_model_name: node.model for node in nodes.values()}
+            relationships = {relationship.pk: relationship
+                             for node in nodes.values() for relationship, _ in node.relationships}
+            index = (nodes, models_by_name, relationships)
+            self._index = index
+        return index[1:]
+
+    def _get_nodes(self) -> Dict[Tuple[str, str], ModelNode]:
+        nodes = self._nodes
+        if nodes is not None and time.monotonic() < self._expires_at:
+            return nodes
+
+        with self._lock:
+            generation = self._generation
+        nodes = self._build()
+        with self._lock:
+            # don't store a graph that was invalidated while it was being built
+            if generation == self._generation:
+                self._nodes = nodes
+                self._expires_at = time.monotonic() + self.ttl
+        return nodes
+
+    @staticmethod
+    def _build() -> Dict[Tuple[str, str], ModelNode]:
+        models = {model.pk: model for model in LogicModuleModel.objects.all()}
+        nodes = {model.pk: ModelNode(model) for model in models.values()}
+        for relationship in Relationship.objects.all():
+            # share the model instances between the relationships instead of loading them per relationship
+            relationship.origin_model = models[relationship.origin_model_id]
+            relationship.related_model = models[relationship.related_model_id]
+            nodes[relationship.origin_model_id].add_relationship(relationship, True)
+            if relationship.related_model_id != relationship.origin_model_id:
+                nodes[relationship.related_model_id].add_relationship(relationship, False)
+
+        logger.debug(f'Built Data Mesh relationship graph of {len(models)} models')
+        return {(node.model.logic_module_endpoint_name, node.model.endpoint): node for node in nodes.values()}
+
+
+relationship_graph = RelationshipGraph()
@@ -0,0 +1,344 @@
+"""
+Bulk import and bulk writes of join records.
+
+The records of a dump are parsed incrementally (a JSON array or newline delimited JSON), so the dump isn't held in
+memory. The join records are created with `bulk_create(..., ignore_conflicts=True)` in batches, each batch in its own
+transaction. The pairs of the imported records are copied into a temporary staging table as well; after the import the
+join records of the relationship that aren't in the staging table are deleted.
+
+Bulk writes of the API are batches of create and delete operations. The models are taken from the relationship
+graph, the relationships of a batch are resolved with one query and its existing join records are looked up with one
+query per combination of record pk columns. The join records are deleted with one query and created with one
+`bulk_create`, unless a join record is created and deleted in the same batch.
+"""
+import json
+import re
+from collections import defaultdict
+from itertools import islice
+from typing import Any, Callable, Dict, IO, Iterable, Iterator, List, Optional, Tuple
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import connection, transaction
+from django.db.models import Q
+from rest_framework.exceptions import ValidationError
+
+from gateway.utils import valid_uuid4
+
+from .graph import relationship_graph
+from .managers import join_record_edges_enabled
+from .models import JoinRecord, JoinRecordEdge, Relationship
+from .serializers import JoinRecordOperationSerializer
+from .utils import get_origin_pk, normalize_pk
+
+DEFAULT_IMPORT_BATCH_SIZE = 1000
+DEFAULT_READ_BUFFER_SIZE = 64 * 1024
+DEFAULT_BULK_WRITE_BATCH_SIZE = 1000
+
+STAGING_TABLE = 'datamesh_joinrecord_import'
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+# the key of a record is its id or uuid as text, a record has either of them
+_RECORD_KEY_SQL = 'coalesce({alias}{prefix}record_id::text, {alias}{prefix}record_uuid::text)'
+
+CREATE_STAGING_TABLE_SQL = f"""
+    CREATE TEMPORARY TABLE {STAGING_TABLE} (record_key text NOT NULL, related_record_key text NOT NULL)
+"""
+
+INSERT_STAGING_SQL = f"""
+    INSERT INTO {STAGING_TABLE} (record_key, related_record_key)
+    SELECT * FROM unnest(%s::text[], %s::text[])
+"""
+
+STALE_JOIN_RECORDS_SQL = f"""
+    SELECT j.{JoinRecord._meta.pk.column} FROM {JoinRecord._meta.db_table} j
+    WHERE j.{JoinRecord._meta.get_field('relationship').column} = %s AND NOT EXISTS (
+        SELECT 1 FROM {STAGING_TABLE} s
+        WHERE s.record_key = {_RECORD_KEY_SQL.format(alias='j.', prefix='')}
+          AND s.related_record_key = {_RECORD_KEY_SQL.format(alias='j.', prefix='related_')}
+    )
+"""
+
+
+def iter_json_items(file: IO[str], buffer_size: int = DEFAULT_READ_BUFFER_SIZE) -> Iterator[Any]:
+    """
+    Parse the items of a JSON array or of newline delimited JSON from a file incrementally,
+    only the current buffer is held in memory.
+    """
+    decoder = json.JSONDecoder()
+    buffer, position, is_eof = '', 0, False
+    is_array = None
+    while True:
+        position = _WHITESPACE.match(buffer, position).end()
+        if is_array is not None and position < len(buffer):
+            if is_array and buffer[position] == ']':
+                return
+            if is_array and buffer[position] == ',':
+                position = _WHITESPACE.match(buffer, position + 1).end()
+
+        item, end = None, None
+        if position < len(buffer):
+            if is_array is None:
+                is_array = buffer[position] == '['
+                position += int(is_array)
+                continue
+            try:
+                item, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if is_eof:
+                    raise
+            # a number at the end of the buffer may continue in the next read
+            if end == len(buffer) and not is_eof and not isinstance(item, (dict, list, str)):
+                end = None
+
+        if end is not None:
+            yield item
+            position = end
+        elif is_eof:
+            if is_array:
+                raise ValueError('Unterminated JSON array')
+            return
+        else:
+            chunk = file.read(buffer_size)
+            is_eof = not chunk
+            buffer = buffer[position:] + chunk
+            position = 0
+
+
+def _get_pk_fields(pk: Any, prefix: str = '') -> Optional[Dict[str, Any]]:
+    """ Get the field of the join record for the pk (id or uuid) of a record, None if it isn't a valid pk """
+    pk = normalize_pk(pk)
+    if valid_uuid4(pk):
+        return {f'{prefix}record_uuid': pk}
+    if pk.isdigit():
+        return {f'{prefix}record_id': int(pk)}
+    return None
+
+
+class JoinRecordImporter:
+    """
+    Importer of the join records of a relationship from pairs of record pks.
+    The join records of the relationship that aren't imported are deleted when the import is finished.
+    """
+
+    def __init__(self, relationship: Relationship, batch_size: int = DEFAULT_IMPORT_BATCH_SIZE,
+                 progress: Optional[Callable[['JoinRecordImporter'], None]] = None):
+        self.relationship = relationship
+        self.batch_size = batch_size
+        self.progress = progress
+        self.imported = 0
+        self.skipped = 0
+        self.created = 0
+        self.deleted = 0
+
+    def run(self, pairs: Iterable[Tuple[Any, Any, Any]], delete_stale: bool = True) -> None:
+        """
+        Import the join records of the pairs of the pk of a record, the pk of the related record
+        and the organization uuid (or None)
+        """
+        count_before = JoinRecord.objects.filter(relationship=self.relationship).count()
+        with connection.cursor() as cursor:
+            cursor.execute(CREATE_STAGING_TABLE_SQL)
+        try:
+            batch = []
+            for record_pk, related_record_pk, organization_uuid in pairs:
+                join_record = self._build_join_record(record_pk, related_record_pk, organization_uuid)
+                if join_record is None:
+                    self.skipped += 1
+                    continue
+                batch.append(join_record)
+                if len(batch) >= self.batch_size:
+                    self._import_batch(batch)
+                    batch = []
+            if batch:
+                self._import_batch(batch)
+            self.created = JoinRecord.objects.filter(relationship=self.relationship).count() - count_before
+            if delete_stale:
+                self._delete_stale_join_records()
+        finally:
+            with connection.cursor() as cursor:
+                cursor.execute(f'DROP TABLE IF EXISTS {STAGING_TABLE}')
+
+    def _build_join_record(self, record_pk: Any, related_record_pk: Any,
+                           organization_uuid: Any) -> Optional[JoinRecord]:
+        record_fields = _get_pk_fields(record_pk)
+        related_record_fields = _get_pk_fields(related_record_pk, 'related_')
+        if record_fields is None or related_record_fields is None:
+            return None
+        return JoinRecord(relationship=self.relationship, organization_id=organization_uuid,
+                          **record_fields, **related_record_fields)
+
+    def _import_batch(self, batch: List[JoinRecord]) -> None:
+        record_keys = [get_origin_pk(True, join_record) for join_record in batch]
+        related_record_keys = [get_origin_pk(False, join_record) for join_record in batch]
+        with transaction.atomic():
+            JoinRecord.objects.bulk_create(batch, ignore_conflicts=True)
+            if join_record_edges_enabled():
+                # bulk_create doesn't send post_save
+                JoinRecordEdge.objects.sync(join_record.pk for join_record in batch)
+            with connection.cursor() as cursor:
+                cursor.execute(INSERT_STAGING_SQL, [record_keys, related_record_keys])
+        self.imported += len(batch)
+        if self.progress is not None:
+            self.progress(self)
+
+    def _delete_stale_join_records(self) -> None:
+        with connection.cursor() as cursor:
+            cursor.execute(f'ANALYZE {STAGING_TABLE}')
+            cursor.execute(STALE_JOIN_RECORDS_SQL, [self.relationship.pk])
+            pks = [row[0] for row in cursor.fetchall()]
+        # deleted through the ORM in batches, so that the deletion signals are sent
+        for start in range(0, len(pks), self.batch_size):
+            with transaction.atomic():
+                _, deleted = JoinRecord.objects.filter(pk__in=pks[start:start + self.batch_size]).delete()
+            self.deleted += deleted.get(JoinRecord._meta.label, 0)
+
+
+class JoinRecordBulkWriter:
+    """
+    Writer of batches of create and delete operations of join records (see `JoinRecordOperationSerializer`)
+    with a result per operation. Join records are created in the organization and only join records of the
+    organization are deleted. Each batch is written in one transaction.
+    """
+
+    def __init__(self, organization_uuid: Any = None, batch_size: int = DEFAULT_BULK_WRITE_BATCH_SIZE):
+        self.organization_uuid = None if organization_uuid is None else str(organization_uuid)
+        self.batch_size = batch_size
+        self.operation_serializer = JoinRecordOperationSerializer()
+
+    def write(self, operations: Iterable[Any]) -> Iterator[List[dict]]:
+        """ Write the operations batch by batch, the results of each batch are yielded when it's written """
+        operations = enumerate(operations)
+        batch = list(islice(operations, self.batch_size))
+        while batch:
+            yield self._write_batch(batch)
+            batch = list(islice(operations, self.batch_size))
+
+    def _write_batch(self, batch: List[Tuple[int, Any]]) -> List[dict]:
+        results, valid = [], []
+        for index, operation in batch:
+            try:
+                valid.append((len(results), self.operation_serializer.run_validation(operation)))
+                results.append({'index': index})
+            except ValidationError as exc:
+                results.append({'index': index, 'status': 'error', 'errors': exc.detail})
+
+        model_pairs = dict()
+        for position, data in valid:
+            names = (data['origin_model_name'], data['related_model_name'])
+            models = [relationship_graph.get_model_by_name(name) for name in names]
+            if None in models:
+                results[position].update(status='error', errors={'non_field_errors': [
+                    f'LogicModuleModel {name} not found.' for name, model in zip(names, models) if model is None]})
+            else:
+                model_pairs[position] = (models[0].pk, models[1].pk)
+
+        with transaction.atomic():
+            relationships = self._get_relationships(valid, model_pairs, results)
+            keys = {position: self._get_key(relationships[position], data)
+                    for position, data in valid if position in relationships}
+            self._apply(valid, keys, results)
+        return results
+
+    def _get_relationships(self, valid: List[Tuple[int, dict]], model_pairs: Dict[int, Tuple[Any, Any]],
+                           results: List[dict]) -> Dict[int, Relationship]:
+        """ Get the relationships of the operations by the models, missing relationships are created for creations """
+        condition = Q()
+        for origin_model_pk, related_model_pk in set(model_pairs.values()):
+            condition |= Q(origin_model_id=origin_model_pk, related_model_id=related_model_pk)
+        by_models = dict()
+        if condition:
+            for relationship in Relationship.objects.filter(condition).order_by('pk'):
+                by_models.setdefault((relationship.origin_model_id, relationship.related_model_id), relationship)
+
+        relationships = dict()
+        for position, data in valid:
+            if position not in model_pairs:
+                continue
+            model_pair = model_pairs[position]
+            if model_pair not in by_models and data['op'] == 'create':
+                relationship = Relationship(origin_model_id=model_pair[0], related_model_id=model_pair[1])
+                try:
+                    relationship.save()
+                except DjangoValidationError as exc:
+                    results[position].update(status='error', errors={'non_field_errors': exc.messages})
+                    continue
+                by_models[model_pair] = relationship
+            if model_pair in by_models:
+                relationships[position] = by_models[model_pair]
+            else:
+                results[position]['status'] = 'not_found'
+        return relationships
+
+    @staticmethod
+    def _get_key(relationship: Relationship, data: dict) -> tuple:
+        """ Get the key of a join record: its relationship and the columns and values of the pks of its records """
+        key = [relationship.pk]
+        for prefix in ('', 'related_'):
+            column = f'{prefix}record_id' if data.get(f'{prefix}record_id') is not None else f'{prefix}record_uuid'
+            key.extend((column, data[column]))
+        return tuple(key)
+
+    def _get_existing(self, keys: Iterable[tuple]) -> Dict[tuple, Tuple[Any, Optional[str]]]:
+        """ Get the pks and organizations of the existing join records by their keys """
+        groups = defaultdict(lambda: (set(), set()))
+        for relationship_pk, column, value, related_column, related_value in keys:
+            values, related_values = groups[(relationship_pk, column, related_column)]
+            values.add(value)
+            related_values.add(related_value)
+
+        existing = dict()
+        for (relationship_pk, column, related_column), (values, related_values) in groups.items():
+            rows = JoinRecord.objects.filter(**{
+                'relationship_id': relationship_pk, f'{column}__in': values, f'{related_column}__in': related_values,
+            }).values_list('pk', 'organization_id', column, related_column)
+            for pk, organization_uuid, value, related_value in rows:
+                key = (relationship_pk, column, value, related_column, related_value)
+                existing[key] = (pk, None if organization_uuid is None else str(organization_uuid))
+        return existing
+
+    def _apply(self, valid: List[Tuple[int, dict]], keys: Dict[int, tuple], results: List[dict]) -> None:
+        """ Apply the operations in their order to the existing join records and write the changes """
+        existing = self._get_existing(keys.values())
+        to_create, to_delete = dict(), set()
+        for position, data in valid:
+            key = keys.get(position)
+            if key is None:
+                continue
+            result = results[position]
+            if data['op'] == 'create':
+                if key in existing:
+                    result['status'] = 'exists'
+                    pk, organization_uuid = existing[key]
+                    if organization_uuid == self.organization_uuid:
+                        result['join_record_uuid'] = pk
+                else:
+                    relationship_pk, column, value, related_column, related_value = key
+                    join_record = JoinRecord(relationship_id=relationship_pk, organization_id=self.organization_uuid,
+                                             **{column: value, related_column: related_value})
+                    to_create[key] = join_record
+                    existing[key] = (join_record.pk, self.organization_uuid)
+                    result.update(status='created', join_record_uuid=join_record.pk)
+            # the same restriction as OrganizationQuerySetMixin: without organization nothing can be deleted
+            elif key in existing and self.organization_uuid and existing[key][1] == self.organization_uuid:
+                if key in to_create:
+                    # the join record is created before it's deleted
+                    self._flush(to_create, to_delete)
+                pk, _ = existing.pop(key)
+                to_delete.add(pk)
+                result.update(status='deleted', join_record_uuid=pk)
+            else:
+                result['status'] = 'not_found'
+        self._flush(to_create, to_delete)
+
+    @staticmethod
+    def _flush(to_create: Dict[tuple, JoinRecord], to_delete: set) -> None:
+        if to_delete:
+            JoinRecord.objects.filter(pk__in=to_delete).delete()
+            to_delete.clear()
+        if to_create:
+            JoinRecord.objects.bulk_create(to_create.values(), ignore_conflicts=True)
+            if join_record_edges_enabled():
+                # bulk_create doesn't send post_save
+                JoinRecordEdge.objects.sync(join_record.pk for join_record in to_create.values())
+            to_create.clear()
@@ -0,0 +1,129 @@
+import random
+import statistics
+import time
+from typing import Callable, List
+
+from django.core.management import BaseCommand
+from django.db import connection, transaction
+
+from datamesh.models import JoinRecord, LogicModuleModel, Relationship
+
+# random version 4 UUIDs from md5 hashes (gen_random_uuid() isn't available in all PostgreSQL versions)
+UUID4_SQL = """(
+    substr({hash}, 1, 8) || '-' || substr({hash}, 9, 4) || '-4' || substr({hash}, 14, 3) || '-8' ||
+    substr({hash}, 18, 3) || '-' || substr({hash}, 21, 12)
+)::uuid"""
+
+INSERT_SQL = """
+    INSERT INTO {table} ({pk}, {relationship}, {record}, {related_record})
+    SELECT {uuid}, %s, {record_value}, {related_record_value}
+    FROM (SELECT i, md5(random()::text || i) AS h, md5(random()::text || i || 'r') AS rh
+          FROM generate_series(1, %s) AS i) AS numbers
+"""
+
+
+class Command(BaseCommand):
+    help = """
+    Benchmark the lookups of join records of the Data Mesh. Join records of two relationships (ids to uuids and uuids
+    to ids) are created, the latencies of the lookups by one record in both directions and of bulk lookups are
+    measured. The created records are removed afterwards unless --keep is passed.
+
+    Example:
+    python manage.py benchmarkjoinrecords --count 1000000 --lookups 500
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=1000000, help='Number of join records to create.')
+        parser.add_argument('--lookups', type=int, default=200, help='Number of lookups of each kind.')
+        parser.add_argument('--bulk-size', type=int, default=100, help='Number of records of a bulk lookup.')
+        parser.add_argument('--keep', action='store_true', help='Keep the created join records.')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            id_relationship, uuid_relationship = self._create_relationships()
+            self._create_join_records(id_relationship, options['count'] // 2, 'i', UUID4_SQL.format(hash='rh'))
+            self._create_join_records(uuid_relationship, options['count'] - options['count'] // 2,
+                                      UUID4_SQL.format(hash='h'), 'i')
+            with connection.cursor() as cursor:
+                cursor.execute(f'ANALYZE {JoinRecord._meta.db_table}')
+            self.stdout.write(f'{JoinRecord.objects.count()} join records\n')
+
+            self._run_benchmarks(id_relationship, uuid_relationship, options['lookups'], options['bulk_size'])
+            transaction.set_rollback(not options['keep'])
+
+    def _create_relationships(self) -> List[Relationship]:
+        relationships = []
+        for key in ('benchmark_id_relationship', 'benchmark_uuid_relationship'):
+            origin_model = LogicModuleModel.objects.create(logic_module_endpoint_name='benchmark',
+                                                           model=f'{key}_origin', endpoint=f'/{key}/origins/')
+            related_model = LogicModuleModel.objects.create(logic_module_endpoint_name='benchmark',
+                                                            model=f'{key}_related', endpoint=f'/{key}/relateds/')
+            relationships.append(Relationship.objects.create(origin_model=origin_model, related_model=related_model,
+                                                             key=key))
+        return relationships
+
+    def _create_join_records(self, relationship: Relationship, count: int, record_value: str,
+                             related_record_value: str) -> None:
+        is_id = record_value == 'i'
+        sql = INSERT_SQL.format(
+            table=JoinRecord._meta.db_table,
+            pk=JoinRecord._meta.pk.column,
+            relationship=JoinRecord._meta.get_field('relationship').column,
+            record=JoinRecord._meta.get_field('record_id' if is_id else 'record_uuid').column,
+            related_record=JoinRecord._meta.get_field('related_record_uuid' if is_id else 'related_record_id').column,
+            uuid=UUID4_SQL.format(hash="md5(h || 'pk')"),
+            record_value=record_value,
+            related_record_value=related_record_value,
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [relationship.pk, count])
+
+    def _sample(self, relationship: Relationship, field: str, size: int) -> list:
+        return list(JoinRecord.objects.filter(relationship=relationship).order_by('?')
+                    .values_list(field, flat=True)[:size])
+
+    def _run_benchmarks(self, id_relationship: Relationship, uuid_relationship: Relationship,
+                        lookups: int, bulk_size: int) -> None:
+        benchmarks = []
+        for relationship, forward_field, reverse_field in ((id_relationship, 'record_id', 'related_record_uuid'),
+                                                           (uuid_relationship, 'record_uuid', 'related_record_id')):
+            for field, is_forward in ((forward_field, True), (reverse_field, False)):
+                pks = self._sample(relationship, field, lookups)
+                benchmarks.append((
+                    f'{relationship.key} by {field}',
+                    [lambda pk=pk, relationship=relationship, is_forward=is_forward: list(
+                        JoinRecord.objects.get_join_records(pk, relationship, is_forward)) for pk in pks],
+                ))
+
+            pks = self._sample(relationship, forward_field, lookups)
+            chunks = [pks[i:i + bulk_size] for i in range(0, len(pks), bulk_size)]
+            benchmarks.append((
+                f'{relationship.key} bulk of {bulk_size}',
+                [lambda chunk=chunk, relationship=relationship: list(
+                    JoinRecord.objects.get_join_records_bulk(chunk, [(relationship, True), (relationship, False)])
+                    .values_list('relationship_id', 'record_id', 'record_uuid', 'related_record_id',
+                                 'related_record_uuid')) for chunk in chunks],
+            ))
+
+        self.stdout.write(f'{"lookup":<60}{"n":>6}{"mean ms":>10}{"p50 ms":>10}{"p95 ms":>10}{"max ms":>10}')
+        for name, calls in benchmarks:
+            latencies = self._measure(calls)
+            if latencies:
+                p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+                self.stdout.write(f'{name:<60}{len(latencies):>6}{statistics.mean(latencies):>10.3f}'
+                                  f'{statistics.median(latencies):>10.3f}{p95:>10.3f}{latencies[-1]:>10.3f}')
+
+        pk = self._sample(id_relationship, 'related_record_uuid', 1)
+        if pk:
+            self.stdout.write('\nQuery plan of a reverse lookup:')
+            self.stdout.write(JoinRecord.objects.get_join_records(pk[0], id_relationship, False).explain())
+
+    @staticmethod
+    def _measure(calls: List[Callable]) -> List[float]:
+        random.shuffle(calls)
+        latencies = []
+        for call in calls:
+            start = time.perf_counter()
+            call()
+            latencies.append((time.perf_counter() - start) * 1000)
+        return sorted(latencies)
@@ -0,0 +1,36 @@
+from django.apps import apps
+from django.core.management import BaseCommand
+from django.db import connection
+
+INDEX_USAGE_QUERY = """
+    SELECT s.relname, s.indexrelname, s.idx_scan, s.idx_tup_read, s.idx_tup_fetch,
+           pg_size_pretty(pg_relation_size(s.indexrelid)), t.seq_scan
+    FROM pg_stat_user_indexes s JOIN pg_stat_user_tables t ON t.relid = s.relid
+    WHERE s.relname = ANY(%s)
+    ORDER BY s.relname, s.idx_scan DESC, s.indexrelname
+"""
+
+
+class Command(BaseCommand):
+    help = """
+    Report the usage of the indexes of the tables of an app (datamesh by default) from pg_stat_user_indexes.
+    Indexes without scans since the statistics were reset are candidates for removal, tables with many sequential
+    scans are missing an index.
+
+    Example:
+    python manage.py indexusage --app datamesh
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument('--app', default='datamesh', help='Label of the app of the tables.')
+
+    def handle(self, *args, **options):
+        tables = [model._meta.db_table for model in apps.get_app_config(options['app']).get_models()]
+        with connection.cursor() as cursor:
+            cursor.execute(INDEX_USAGE_QUERY, [tables])
+            rows = cursor.fetchall()
+
+        columns = ('table', 'index', 'scans', 'tuples read', 'tuples fetched', 'size', 'table seq scans')
+        widths = [max([len(column)] + [len(str(row[i])) for row in rows]) for i, column in enumerate(columns)]
+        for row in [columns] + rows:
+            self.stdout.write('  '.join(str(value).ljust(width) for value, width in zip(row, widths)).rstrip())
@@ -1,16 +1,42 @@
 import json
+from typing import Any, Iterator, Optional, Tuple
 
-from django.core.management import BaseCommand
+from django.core.management import BaseCommand, CommandError
 
-from datamesh.models import JoinRecord, Relationship, LogicModuleModel
+from datamesh.importers import DEFAULT_IMPORT_BATCH_SIZE, JoinRecordImporter, iter_json_items
+from datamesh.models import Relationship, LogicModuleModel
+from datamesh.utils import normalize_pk
 from core.models import LogicModule, Organization
 
 DEFAULT_FILE_NAME = 'data/contacts.json'
+DEFAULT_PROGRESS_INTERVAL = 10000
+
+
+def _get_value(item: Any, path: str) -> Any:
+    """ Get the value of a dotted path, p.e. 'fields.organization_uuid', from a parsed record """
+    for key in path.split('.'):
+        if not isinstance(item, dict):
+            return None
+        item = item.get(key)
+    return item
+
+
+def _get_related_pks(value: Any) -> list:
+    """ Get the pks of the related records from a list, a JSON encoded list or a single pk """
+    if value in (None, ''):
+        return []
+    if isinstance(value, str) and value.lstrip().startswith('['):
+        value = json.loads(value)
+    return value if isinstance(value, list) else [value]
 
 
 class Command(BaseCommand):
     help = """
     Load relationships from a file, which should be named 'contacts.json' or specify the name with the --file parameter.
+    The file is a JSON array (p.e. of dumpdata) or newline delimited JSON, it's parsed incrementally. The join records
+    are created in batches and the join records of the relationship that aren't in the file are deleted afterwards.
+    The models of the relationship and the fields of the records are configurable, by default contacts of the crm
+    service are related to their site profiles of the location service.
 
     To get the file, get the pod-name of the crm_service in your kubernetes namespace and run:
         kubectl exec -n <namespace> -it <pod-name> -- bash -c "python manage.py dumpdata
@@ -22,67 +48,93 @@ class Command(BaseCommand):
     kubectl exec -n kupfer-dev -it buildly-7b96bb7487-f7c6m bash -- -c "python manage.py loadrelationships --file=contacts.json"
     """  # noqa
 
-    counter = 0
-
     def add_arguments(self, parser):
-        """Add --file argument to Command."""
+        """Add --file argument and the configuration of the relationship to Command."""
         parser.add_argument(
             '--file', default=None, nargs='?', help='Path of file to import.',
         )
+        parser.add_argument('--key', default='contact_siteprofile_relationship', help='Key of the relationship.')
+        for direction, endpoint_name, model, endpoint in (('origin', 'crm', 'Contact', '/contact/'),
+                                                          ('related', 'location', 'SiteProfile', '/siteprofiles/')):
+            parser.add_argument(f'--{direction}-module', default=endpoint_name,
+                                help=f'Endpoint name of the logic module of the {direction} model.')
+            parser.add_argument(f'--{direction}-model', default=model, help=f'Name of the {direction} model.')
+            parser.add_argument(f'--{direction}-endpoint', default=endpoint,
+                                help=f'Endpoint of the {direction} model.')
+            parser.add_argument(f'--{direction}-lookup-field', default='uuid',
+                                help=f'Lookup field of the {direction} model.')
+        parser.add_argument('--record-field', default='pk', help='Field of a record with its pk.')
+        parser.add_argument('--related-records-field', default='fields.siteprofile_uuids',
+                            help='Field of a record with the pks of its related records.')
+        parser.add_argument('--organization-field', default='fields.organization_uuid',
+                            help='Field of a record with its organization uuid, empty for no organization.')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_IMPORT_BATCH_SIZE,
+                            help='Number of join records created in one transaction.')
+        parser.add_argument('--progress-interval', type=int, default=DEFAULT_PROGRESS_INTERVAL,
+                            help='Number of join records between progress reports.')
+        parser.add_argument('--keep-stale', action='store_true',
+                            help="Don't delete join records of the relationship that aren't in the file.")
 
     def handle(self, *args, **options):
         """
-        Load contacts with siteprofile_uuids from file and write the data directly
+        Load records with the pks of their related records from file and write the data directly
         into the JoinRecords.
         """
         filename = options.get('file')
         if not filename:
             filename = DEFAULT_FILE_NAME
-        with open(filename, 'r', encoding='utf-8') as contacts_file:
-            contacts = json.load(contacts_file)
-        crm_logic_module = LogicModule.objects.get(endpoint_name='crm')
-        location_logic_module = LogicModule.objects.get(endpoint_name='location')
-
-        origin_model, _ = LogicModuleModel.objects.get_or_create(
-            model='Contact',
-            logic_module_endpoint_name=crm_logic_module.endpoint_name,
-            endpoint='/contact/',
-            lookup_field_name='uuid',
-        )
-        related_model, _ = LogicModuleModel.objects.get_or_create(
-            model='SiteProfile',
-            logic_module_endpoint_name=location_logic_module.endpoint_name,
-            endpoint='/siteprofiles/',
-            lookup_field_name='uuid',
-        )
+        relationship = self._get_relationship(options)
+        organizations = {str(pk): pk for pk in Organization.objects.values_list('pk', flat=True)}
+        self.parsed, self.missing_organizations = 0, set()
+        self.progress_interval, self.reported = options['progress_interval'], 0
+
+        importer = JoinRecordImporter(relationship, options['batch_size'], self._report_progress)
+        with open(filename, 'r', encoding='utf-8') as records_file:
+            importer.run(self._get_pairs(iter_json_items(records_file), organizations, options),
+                         delete_stale=not options['keep_stale'])
+
+        for organization_uuid in sorted(map(str, self.missing_organizations)):
+            self.stdout.write(f'Organization({organization_uuid}) not found.')
+        self.stdout.write(f'{self.parsed} records parsed and written to the JoinRecords: '
+                          f'{importer.created} JoinRecord(s) created, {importer.skipped} invalid pk(s) skipped.')
+        self.stdout.write(f'{importer.deleted} JoinRecord(s) deleted.')
+
+    def _get_relationship(self, options: dict) -> Relationship:
+        models = []
+        for direction in ('origin', 'related'):
+            endpoint_name = options[f'{direction}_module']
+            if not LogicModule.objects.filter(endpoint_name=endpoint_name).exists():
+                raise CommandError(f'LogicModule({endpoint_name}) not found.')
+            model, _ = LogicModuleModel.objects.get_or_create(
+                model=options[f'{direction}_model'],
+                logic_module_endpoint_name=endpoint_name,
+                endpoint=options[f'{direction}_endpoint'],
+                lookup_field_name=options[f'{direction}_lookup_field'],
+            )
+            models.append(model)
         relationship, _ = Relationship.objects.get_or_create(
-            origin_model=origin_model,
-            related_model=related_model,
-            key='contact_siteprofile_relationship'
+            origin_model=models[0],
+            related_model=models[1],
+            key=options['key']
         )
-        eligible_join_records = []
-        # create JoinRecords with contact.id and siteprofile_uuid for all contacts
-        for contact in contacts:
-            organization_uuid = contact['fields']['organization_uuid']
-            try:
-                organization = Organization.objects.get(pk=organization_uuid)
-            except Organization.DoesNotExist:
-                print(f'Organization({organization_uuid}) not found.')
-                continue
-            self.counter += 1
-            siteprofile_uuids = contact['fields']['siteprofile_uuids']
-            if not siteprofile_uuids:
-                continue
-            for siteprofile_uuid in json.loads(siteprofile_uuids):
-                join_record, _ = JoinRecord.objects.get_or_create(
-                    relationship=relationship,
-                    record_uuid=contact['pk'],
-                    related_record_uuid=siteprofile_uuid,
-                    defaults={'organization': organization}
-                )
-                print(join_record)
-                eligible_join_records.append(join_record.pk)
-        print(f'{self.counter} Contacts parsed and written to the JoinRecords.')
-        # delete not eligible JoinRecords in this relationship
-        deleted, _ = JoinRecord.objects.exclude(pk__in=eligible_join_records).filter(relationship=relationship).delete()
-        print(f'{deleted} JoinRecord(s) deleted.')
+        return relationship
+
+    def _report_progress(self, importer: JoinRecordImporter) -> None:
+        if importer.imported - self.reported >= self.progress_interval:
+            self.reported = importer.imported
+            self.stdout.write(f'{self.parsed} records parsed, {importer.imported} join records imported.')
+
+    def _get_pairs(self, records: Iterator[dict], organizations: dict,
+                   options: dict) -> Iterator[Tuple[Any, Any, Optional[Any]]]:
+        for record in records:
+            organization = None
+            if options['organization_field']:
+                organization_uuid = _get_value(record, options['organization_field'])
+                organization = organizations.get(normalize_pk(organization_uuid))
+                if organization is None:
+                    self.missing_organizations.add(organization_uuid)
+                    continue
+            self.parsed += 1
+            record_pk = _get_value(record, options['record_field'])
+            for related_record_pk in _get_related_pks(_get_value(record, options['related_records_field'])):
+                yield record_pk, related_record_pk, organization
@@ -0,0 +1,25 @@
+from django.core.management import BaseCommand
+from django.db import connection, transaction
+
+from datamesh.managers import join_record_edges_enabled
+from datamesh.models import JoinRecordEdge
+
+
+class Command(BaseCommand):
+    help = """
+    Rebuild the edges of all join records (JoinRecordEdge), the denormalized join records the Data Mesh looks up
+    related records in if DATAMESH_JOIN_RECORD_EDGES is enabled. Run it after enabling the setting and after join
+    records were changed without the ORM.
+
+    Example:
+    python manage.py rebuildjoinrecordedges
+    """
+
+    def handle(self, *args, **options):
+        if not join_record_edges_enabled():
+            self.stdout.write('DATAMESH_JOIN_RECORD_EDGES is not enabled, the edges are not maintained.')
+        with transaction.atomic():
+            JoinRecordEdge.objects.sync()
+        with connection.cursor() as cursor:
+            cursor.execute(f'ANALYZE {JoinRecordEdge._meta.db_table}')
+        self.stdout.write(f'{JoinRecordEdge.objects.count()} edges of join records built.')
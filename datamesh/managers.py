@@ -1,10 +1,34 @@
-from typing import Any
+from typing import Any, Iterable, Optional, Tuple
 
-from django.db.models import Manager, QuerySet, Model
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Manager, QuerySet, Model, Q
 from django.db.models.functions import Concat
 
 from gateway import utils
 
+DEFAULT_JOIN_RECORD_EDGES = False
+
+# fields of join records that are stored in their edges
+JOIN_RECORD_EDGE_FIELDS = {'relationship', 'relationship_id', 'record_id', 'record_uuid', 'related_record_id',
+                           'related_record_uuid'}
+
+# each join record in both directions, the keys are the ids or uuids of the records as text
+INSERT_EDGES_SQL = """
+    INSERT INTO {edge_table} (join_record_id, relationship_id, is_forward, origin_key, target_key)
+    SELECT j.{pk}, j.{relationship}, d.is_forward,
+           CASE WHEN d.is_forward THEN {record_key} ELSE {related_record_key} END,
+           CASE WHEN d.is_forward THEN {related_record_key} ELSE {record_key} END
+    FROM {join_record_table} j CROSS JOIN (VALUES (true), (false)) AS d(is_forward)
+    {where}
+    ON CONFLICT DO NOTHING
+"""
+
+
+def join_record_edges_enabled() -> bool:
+    """ Check if the edges of join records are maintained and used for the lookups of the Data Mesh """
+    return getattr(settings, 'DATAMESH_JOIN_RECORD_EDGES', DEFAULT_JOIN_RECORD_EDGES)
+
 
 class LogicModuleModelManager(Manager):
 
@@ -14,7 +38,21 @@ class LogicModuleModelManager(Manager):
             swagger_model_name=concatenated_model_name).first()
 
 
-class JoinRecordManager(Manager):
+class JoinRecordQuerySet(QuerySet):
+
+    def update(self, **kwargs) -> int:
+        """ Update the join records and, if edges are enabled and their fields are changed, their edges """
+        if not join_record_edges_enabled() or not JOIN_RECORD_EDGE_FIELDS & set(kwargs):
+            return super().update(**kwargs)
+        with transaction.atomic(using=self.db):
+            # the pks are taken before the update, it may change the fields the join records are filtered by
+            pks = list(self.values_list('pk', flat=True))
+            rows = super().update(**kwargs)
+            self.model._meta.get_field('edges').related_model.objects.sync(pks)
+        return rows
+
+
+class JoinRecordManager(Manager.from_queryset(JoinRecordQuerySet)):
 
     def get_join_records(self,
                          origin_pk: Any,
@@ -29,3 +67,74 @@ class JoinRecordManager(Manager):
             pk_field = 'related_' + pk_field
 
         return self.filter(relationship=relationship).filter(**{pk_field: str(origin_pk)})
+
+    def get_join_records_bulk(self,
+                              origin_pks: Iterable[Any],
+                              relationships: Iterable[Tuple[Model, bool]]) -> QuerySet:
+        """
+        Get JoinRecords of many origin_pks for many relations with directions in one query.
+        The pks are split into ids and uuids, so that each of them is only looked up in its column.
+        """
+        record_ids, record_uuids = set(), set()
+        for origin_pk in origin_pks:
+            origin_pk = str(origin_pk)
+            if utils.valid_uuid4(origin_pk):
+                record_uuids.add(origin_pk)
+            elif origin_pk.isdigit():
+                record_ids.add(int(origin_pk))
+
+        condition = Q()
+        for relationship, is_forward_relationship in relationships:
+            prefix = '' if is_forward_relationship else 'related_'
+            if record_ids:
+                condition |= Q(relationship=relationship, **{f'{prefix}record_id__in': record_ids})
+            if record_uuids:
+                condition |= Q(relationship=relationship, **{f'{prefix}record_uuid__in': record_uuids})
+
+        if not condition:
+            return self.none()
+        return self.filter(condition)
+
+
+class JoinRecordEdgeManager(Manager):
+
+    def get_edges_bulk(self,
+                       origin_pks: Iterable[str],
+                       relationships: Iterable[Tuple[Model, bool]]) -> QuerySet:
+        """Get the edges of many normalized origin_pks for many relations with directions in one query."""
+        origin_pks = set(origin_pks)
+        condition = Q()
+        for relationship, is_forward_relationship in relationships:
+            condition |= Q(relationship=relationship, is_forward=is_forward_relationship)
+        if not origin_pks or not condition:
+            return self.none()
+        return self.filter(condition, origin_key__in=origin_pks)
+
+    def sync(self, join_record_pks: Optional[Iterable[Any]] = None) -> None:
+        """
+        Replace the edges of the join records with the pks (of all join records if None) by their current state.
+        Join records that don't exist (anymore) are skipped.
+        """
+        join_record_meta = self.model._meta.get_field('join_record').related_model._meta
+        edge_table = self.model._meta.db_table
+        record_key = 'coalesce(j.{}::text, j.{}::text)'
+        if join_record_pks is None:
+            delete_sql, where, params = f'DELETE FROM {edge_table}', '', []
+        else:
+            join_record_column = self.model._meta.get_field('join_record').column
+            delete_sql = f'DELETE FROM {edge_table} WHERE {join_record_column} = ANY(%s::uuid[])'
+            where = f'WHERE j.{join_record_meta.pk.column} = ANY(%s::uuid[])'
+            params = [[str(pk) for pk in join_record_pks]]
+        insert_sql = INSERT_EDGES_SQL.format(
+            edge_table=edge_table,
+            join_record_table=join_record_meta.db_table,
+            pk=join_record_meta.pk.column,
+            relationship=join_record_meta.get_field('relationship').column,
+            record_key=record_key.format('record_id', 'record_uuid'),
+            related_record_key=record_key.format('related_record_id', 'related_record_uuid'),
+            where=where,
+        )
+        # raw queries, the edges don't need to be loaded and don't send signals
+        with connection.cursor() as cursor:
+            cursor.execute(delete_sql, params)
+            cursor.execute(insert_sql, params)
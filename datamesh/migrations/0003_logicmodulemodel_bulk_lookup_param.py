@@ -0,0 +1,18 @@
+# Generated by Django 2.2.8 on 2026-10-18 10:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('datamesh', '0002_auto_20190918_1659'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='logicmodulemodel',
+            name='bulk_lookup_param',
+            field=models.CharField(blank=True, default='', help_text="Query parameter of the list endpoint for filtering by comma-separated values of the lookup field, p.e.: 'uuid__in'. Leave empty if the service doesn't support it.", max_length=64),
+        ),
+    ]
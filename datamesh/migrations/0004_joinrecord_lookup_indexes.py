@@ -0,0 +1,29 @@
+# Generated by Django 2.2.8 on 2026-10-18 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('datamesh', '0003_logicmodulemodel_bulk_lookup_param'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='joinrecord',
+            index=models.Index(condition=models.Q(record_id__isnull=False), fields=['relationship', 'record_id', 'related_record_id', 'related_record_uuid', 'record_uuid'], name='joinrecord_record_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='joinrecord',
+            index=models.Index(condition=models.Q(record_uuid__isnull=False), fields=['relationship', 'record_uuid', 'related_record_id', 'related_record_uuid', 'record_id'], name='joinrecord_record_uuid_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='joinrecord',
+            index=models.Index(condition=models.Q(related_record_id__isnull=False), fields=['relationship', 'related_record_id', 'record_id', 'record_uuid', 'related_record_uuid'], name='joinrecord_rel_record_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='joinrecord',
+            index=models.Index(condition=models.Q(related_record_uuid__isnull=False), fields=['relationship', 'related_record_uuid', 'record_id', 'record_uuid', 'related_record_id'], name='joinrecord_rel_record_uuid_idx'),
+        ),
+    ]
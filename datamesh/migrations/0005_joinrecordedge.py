@@ -0,0 +1,33 @@
+# Generated by Django 2.2.8 on 2026-10-18 14:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('datamesh', '0004_joinrecord_lookup_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JoinRecordEdge',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('is_forward', models.BooleanField()),
+                ('origin_key', models.TextField()),
+                ('target_key', models.TextField()),
+                ('join_record', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='edges', to='datamesh.JoinRecord')),
+                ('relationship', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='datamesh.Relationship')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='joinrecordedge',
+            index=models.Index(fields=['origin_key', 'relationship', 'is_forward', 'target_key'], name='joinrecordedge_lookup_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='joinrecordedge',
+            constraint=models.UniqueConstraint(fields=('join_record', 'is_forward'), name='unique_join_record_edge'),
+        ),
+    ]
@@ -3,10 +3,10 @@ from typing import Tuple, List
 
 from django.core.exceptions import ValidationError
 from django.db import models
-from django.db.models import CheckConstraint, Q, UniqueConstraint
+from django.db.models import CheckConstraint, Index, Q, UniqueConstraint
 
 from core.models import Organization
-from datamesh.managers import JoinRecordManager, LogicModuleModelManager
+from datamesh.managers import JoinRecordEdgeManager, JoinRecordManager, LogicModuleModelManager
 
 
 class LogicModuleModel(models.Model):
@@ -16,6 +16,7 @@ class LogicModuleModel(models.Model):
     endpoint = models.CharField(max_length=255, help_text="Endpoint of the model with leading and trailing slashs, p.e.: '/siteprofiles/'")
     lookup_field_name = models.SlugField(max_length=64, default='id', help_text="Name of the field in the model for detail methods, p.e.: 'id' or 'uuid'")
     is_local = models.BooleanField(default=False, help_text="Local model is taken from Buildly")
+    bulk_lookup_param = models.CharField(max_length=64, blank=True, default='', help_text="Query parameter of the list endpoint for filtering by comma-separated values of the lookup field, p.e.: 'uuid__in'. Leave empty if the service doesn't support it.")
 
     objects = LogicModuleModelManager()
 
@@ -37,7 +38,7 @@ class LogicModuleModel(models.Model):
         """
         relationships = Relationship.objects.filter(
             Q(origin_model=self) | Q(related_model=self)
-        )
+        ).select_related('origin_model', 'related_model')
         relationships_with_direction = list()
         for relationship in relationships:
             relationships_with_direction.append((relationship,
@@ -141,7 +142,63 @@ class JoinRecord(models.Model):
                     ~(~Q(related_record_id=None) & ~Q(related_record_uuid=None)))
             ),
         ]
+        # The partial unique constraints can't be used for lookups by one record. Join records are looked up by the
+        # relationship and the pk of the record in one direction, the indexes contain the pks of both directions,
+        # so that the lookups of the Data Mesh are index-only scans.
+        indexes = [
+            Index(
+                fields=('relationship', 'record_id', 'related_record_id', 'related_record_uuid', 'record_uuid'),
+                name='joinrecord_record_id_idx',
+                condition=Q(record_id__isnull=False)
+            ),
+            Index(
+                fields=('relationship', 'record_uuid', 'related_record_id', 'related_record_uuid', 'record_id'),
+                name='joinrecord_record_uuid_idx',
+                condition=Q(record_uuid__isnull=False)
+            ),
+            Index(
+                fields=('relationship', 'related_record_id', 'record_id', 'record_uuid', 'related_record_uuid'),
+                name='joinrecord_rel_record_id_idx',
+                condition=Q(related_record_id__isnull=False)
+            ),
+            Index(
+                fields=('relationship', 'related_record_uuid', 'record_id', 'record_uuid', 'related_record_id'),
+                name='joinrecord_rel_record_uuid_idx',
+                condition=Q(related_record_uuid__isnull=False)
+            ),
+        ]
 
     def __str__(self):
         return f'{self.relationship} - ' \
             f'{self.record_id or self.record_uuid} -> {self.related_record_id or self.related_record_uuid}'
+
+
+class JoinRecordEdge(models.Model):
+    """
+    Denormalized read model of the join records: each join record in both directions with the pks of the origin and
+    the target record as text, so that the related records of many origin records across many relationships are
+    looked up with one indexed query. The edges are only maintained if DATAMESH_JOIN_RECORD_EDGES is enabled:
+    on save of a join record, on `JoinRecord.objects.filter(...).update(...)` (and thereby `bulk_update`) and by the
+    bulk writers. Raw SQL changes of join records need the rebuildjoinrecordedges command.
+    """
+    # indexed by the unique constraint
+    join_record = models.ForeignKey(JoinRecord, related_name='edges', db_index=False, on_delete=models.CASCADE)
+    # the edges are deleted together with their join records
+    relationship = models.ForeignKey(Relationship, related_name='+', db_index=False, on_delete=models.DO_NOTHING)
+    is_forward = models.BooleanField()
+    origin_key = models.TextField()
+    target_key = models.TextField()
+
+    objects = JoinRecordEdgeManager()
+
+    class Meta:
+        constraints = [
+            UniqueConstraint(fields=('join_record', 'is_forward'), name='unique_join_record_edge'),
+        ]
+        # the lookups by origin keys are index-only scans
+        indexes = [
+            Index(fields=('origin_key', 'relationship', 'is_forward', 'target_key'), name='joinrecordedge_lookup_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.relationship_id} - {self.origin_key} -> {self.target_key}'
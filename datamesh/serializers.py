@@ -2,9 +2,44 @@ from collections import OrderedDict
 
 from rest_framework import serializers
 
+from datamesh.graph import relationship_graph
 from datamesh.models import JoinRecord, Relationship, LogicModuleModel
 
 
+class LogicModuleModelNameField(serializers.ChoiceField):
+    """
+    Choice of a logic module model by its concatenated name, the internal value is the model.
+    The choices are taken from the relationship graph, so they're loaded once per process and not per serializer.
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(choices=(), **kwargs)
+
+    @property
+    def choices(self) -> OrderedDict:
+        return OrderedDict((name, name) for name in relationship_graph.get_model_names())
+
+    @choices.setter
+    def choices(self, choices):
+        # the choices are taken from the relationship graph
+        pass
+
+    @property
+    def grouped_choices(self) -> OrderedDict:
+        return self.choices
+
+    def to_internal_value(self, data) -> LogicModuleModel:
+        model = relationship_graph.get_model_by_name(str(data))
+        if model is None:
+            self.fail('invalid_choice', input=data)
+        return model
+
+    def to_representation(self, value) -> str:
+        if isinstance(value, LogicModuleModel):
+            return value.concatenated_model_name
+        return str(value)
+
+
 class LogicModuleModelSerializer(serializers.ModelSerializer):
 
     class Meta:
@@ -30,27 +65,14 @@ class JoinRecordSerializer(serializers.ModelSerializer):
     Example: locationSiteProfile
     """
 
-    _model_choices = list()
-    _model_choices_map = dict()
-
-    origin_model_name = serializers.ChoiceField(choices=_model_choices, write_only=True)
-    related_model_name = serializers.ChoiceField(choices=_model_choices, write_only=True)
-
-    def __init__(self, *args, **kwargs):
-        """Define the choices for valid LogicModuleModels."""
-        for model in LogicModuleModel.objects.all().values('logic_module_endpoint_name', 'model', 'pk'):
-            choice = model['logic_module_endpoint_name'] + model['model']
-            self._model_choices.append(choice)
-            self._model_choices_map.update({choice: model['pk']})
-        super().__init__(*args, **kwargs)
+    origin_model_name = LogicModuleModelNameField(write_only=True)
+    related_model_name = LogicModuleModelNameField(write_only=True)
 
     def create(self, validated_data: dict) -> JoinRecord:
         """Get logic_module_models, get_or_create `Relationship`s and save in case it is not already existing."""
-        origin_model_pk = self._model_choices_map[validated_data.pop('origin_model_name')]
-        related_model_pk = self._model_choices_map[validated_data.pop('related_model_name')]
         relationship, _ = Relationship.objects.get_or_create(
-            origin_model_id=origin_model_pk,
-            related_model_id=related_model_pk
+            origin_model_id=validated_data.pop('origin_model_name').pk,
+            related_model_id=validated_data.pop('related_model_name').pk
         )
         organization_uuid = self.context['request'].session.get('jwt_organization_uuid', None)
         join_record, _ = JoinRecord.objects.get_or_create(
@@ -62,11 +84,9 @@ class JoinRecordSerializer(serializers.ModelSerializer):
 
     def update(self, instance: JoinRecord, validated_data: dict) -> JoinRecord:
         """Automatically set the relationship from the passed models."""
-        origin_model_pk = self._model_choices_map[validated_data.pop('origin_model_name')]
-        related_model_pk = self._model_choices_map[validated_data.pop('related_model_name')]
         relationship, _ = Relationship.objects.get_or_create(
-            origin_model_id=origin_model_pk,
-            related_model_id=related_model_pk
+            origin_model_id=validated_data.pop('origin_model_name').pk,
+            related_model_id=validated_data.pop('related_model_name').pk
         )
         instance.relationship = relationship
         for key, value in validated_data.items():
@@ -75,16 +95,39 @@ class JoinRecordSerializer(serializers.ModelSerializer):
         return instance
 
     def to_representation(self, instance: JoinRecord) -> OrderedDict:
-        """Add origin_model_name and related_model_name."""
+        """Add origin_model_name and related_model_name, the relationship is taken from the relationship graph."""
         ret_repr = super().to_representation(instance)
+        relationship = relationship_graph.get_relationship(instance.relationship_id) or instance.relationship
         ret_repr.update(
-            {'origin_model_name': f'{instance.relationship.origin_model.logic_module_endpoint_name}'
-                f'{instance.relationship.origin_model.model}',
-             'related_model_name': f'{instance.relationship.related_model.logic_module_endpoint_name}'
-                f'{instance.relationship.related_model.model}'})
+            {'origin_model_name': relationship.origin_model.concatenated_model_name,
+             'related_model_name': relationship.related_model.concatenated_model_name})
         return ret_repr
 
     class Meta:
         model = JoinRecord
         exclude = ('relationship', )
         read_only_fields = ('organization', )
+
+
+class JoinRecordOperationSerializer(serializers.Serializer):
+    """
+    An operation of a bulk write of join records, the join record is identified by the concatenated model names
+    of its relationship and the pks of its records, p.e.:
+    {"op": "create", "origin_model_name": "crmContact", "related_model_name": "locationSiteProfile",
+     "record_id": 1, "related_record_uuid": "322f71fe-b606-48ce-bae6-d5254479ad6f"}
+    """
+
+    op = serializers.ChoiceField(choices=('create', 'delete'), default='create')
+    origin_model_name = serializers.CharField()
+    related_model_name = serializers.CharField()
+    record_id = serializers.IntegerField(min_value=0, required=False, allow_null=True)
+    record_uuid = serializers.UUIDField(required=False, allow_null=True)
+    related_record_id = serializers.IntegerField(min_value=0, required=False, allow_null=True)
+    related_record_uuid = serializers.UUIDField(required=False, allow_null=True)
+
+    def validate(self, attrs: dict) -> dict:
+        """Validate that the record and the related record have either an id or an uuid."""
+        for prefix in ('', 'related_'):
+            if (attrs.get(f'{prefix}record_id') is None) == (attrs.get(f'{prefix}record_uuid') is None):
+                raise serializers.ValidationError(f'Either {prefix}record_id or {prefix}record_uuid is required.')
+        return attrs
@@ -1,30 +1,63 @@
 import logging
 import asyncio
-from typing import Any, Dict, Generator, Union
+from collections import defaultdict
+from typing import Any, Dict, Generator, Iterable, List, Set, Tuple, Union
 
 from django.apps import apps
+from django.conf import settings
 from django.forms.models import model_to_dict
 
-from .models import LogicModuleModel, Relationship, JoinRecord
-from .utils import prepare_lookup_kwargs
+from gateway import aio
+
+from . import cache as local_cache
+from .graph import relationship_graph
+from .managers import join_record_edges_enabled
+from .models import JoinRecord, JoinRecordEdge, LogicModuleModel
+from .utils import get_origin_pk, normalize_pk, prepare_lookup_kwargs
 from .exceptions import DatameshConfigurationError
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_BULK_FETCH_CHUNK_SIZE = 100
+DEFAULT_MAX_JOIN_DEPTH = 3
+
+# the columns of the join records needed for the lookups, they are covered by the lookup indexes of JoinRecord
+JOIN_RECORD_LOOKUP_FIELDS = ('relationship_id', 'record_id', 'record_uuid', 'related_record_id', 'related_record_uuid')
+
+
+def parse_join_depth(join: str) -> int:
+    """
+    Get the depth of a join from the value of the `join` query parameter, p.e. 'depth:2'.
+    Other values join one level, the depth is limited by DATAMESH_MAX_JOIN_DEPTH.
+    """
+    if not join or not join.lower().startswith('depth:'):
+        return 1
+    try:
+        depth = int(join[len('depth:'):])
+    except ValueError:
+        return 1
+    return max(1, min(depth, getattr(settings, 'DATAMESH_MAX_JOIN_DEPTH', DEFAULT_MAX_JOIN_DEPTH)))
+
 
 class DataMesh:
     """
     Encapsulates aggregation of data from different services (logic modules).
-    For each model DataMesh object should be created.
+    For each model DataMesh object should be created, its relationships are taken from the relationship graph.
     """
 
     def __init__(self, logic_module_endpoint: str, model_endpoint: str, access_validator: Any = None):
-        self._logic_module_model = LogicModuleModel.objects.get(logic_module_endpoint_name=logic_module_endpoint,
-                                                                endpoint=model_endpoint)
-        self._relationships = self._logic_module_model.get_relationships()
+        node = relationship_graph.get_node(logic_module_endpoint, model_endpoint)
+        self._logic_module_model = node.model
+        self._relationships = node.relationships
         self._origin_lookup_field = self._logic_module_model.lookup_field_name
+        self._models = {
+            (model.logic_module_endpoint_name, model.endpoint.strip('/')): model
+            for relationship, _ in self._relationships
+            for model in (relationship.origin_model, relationship.related_model)
+        }
         self._access_validator = access_validator
         self._cache = {}
+        self._datameshes = {}
 
     @property
     def related_logic_modules(self) -> list:
@@ -41,137 +74,406 @@ class DataMesh:
             self._related_logic_modules = set(modules_list + modules_list_reverse)
         return self._related_logic_modules
 
-    def get_related_records_meta(self, origin_pk: Any) -> Generator[tuple, None, None]:
+    def get_related_logic_modules(self, depth: int = 1) -> set:
         """
-        Gets list of related records' META-data that is used for retrieving data for each of these records
+        Gets the names of the logic modules of the models that are reached by joins up to the depth
+        (exclude local logic modules).
         """
-        for relationship, is_forward_lookup in self._relationships:
-            join_records = JoinRecord.objects.get_join_records(origin_pk, relationship, is_forward_lookup)
-            if join_records:
-                related_model, related_record_field = prepare_lookup_kwargs(
-                    is_forward_lookup, relationship, join_records[0])
+        logic_modules = set(self.related_logic_modules)
+        visited = {self._logic_module_model.pk}
+        level = [self]
+        for _ in range(depth - 1):
+            next_level = []
+            for datamesh in level:
+                for model in datamesh._models.values():
+                    if model.pk not in visited:
+                        visited.add(model.pk)
+                        next_level.append(self._get_datamesh(model))
+            for datamesh in next_level:
+                logic_modules.update(datamesh.related_logic_modules)
+            level = next_level
+        return logic_modules
 
-                for join_record in join_records:
+    def _get_datamesh(self, model: LogicModuleModel) -> 'DataMesh':
+        """ Gets the DataMesh of a related model for joining its records, shared by the joins of this DataMesh """
+        key = (model.logic_module_endpoint_name, model.endpoint.strip('/'))
+        if key not in self._datameshes:
+            self._datameshes[key] = DataMesh(logic_module_endpoint=model.logic_module_endpoint_name,
+                                             model_endpoint=model.endpoint)
+        return self._datameshes[key]
 
-                    params = {
-                            'pk': (str(getattr(join_record, related_record_field))),
-                            'model': related_model.endpoint.strip('/'),
-                            'service': related_model.logic_module_endpoint_name,
-                            'pk_name': related_model.lookup_field_name,
-                        }
+    def get_join_records_index(self, origin_pks: Iterable[Any]) -> Dict[Tuple[Any, str], list]:
+        """
+        Gets related records' META-data of many origin records with one query for all relationships.
+        The result is indexed by relationship pk and (normalized) origin pk.
+        """
+        origin_pks = {normalize_pk(origin_pk) for origin_pk in origin_pks if origin_pk}
+        if join_record_edges_enabled():
+            return self._get_edges_index(origin_pks)
+        directions = {relationship.pk: (relationship, is_forward_lookup)
+                      for relationship, is_forward_lookup in self._relationships}
+
+        join_records_index = defaultdict(list)
+        join_records = JoinRecord.objects.get_join_records_bulk(origin_pks, self._relationships)\
+            .values_list(*JOIN_RECORD_LOOKUP_FIELDS, named=True)
+        for join_record in join_records:
+            relationship, is_forward_lookup = directions[join_record.relationship_id]
+            related_model, related_record_field = prepare_lookup_kwargs(
+                is_forward_lookup, relationship, join_record)
+            params = {
+                'pk': (str(getattr(join_record, related_record_field))),
+                'model': related_model.endpoint.strip('/'),
+                'service': related_model.logic_module_endpoint_name,
+                'pk_name': related_model.lookup_field_name,
+            }
+            join_records_index[(relationship.pk, get_origin_pk(is_forward_lookup, join_record))].append(params)
+        return join_records_index
 
-                    yield relationship, params
+    def _get_edges_index(self, origin_pks: Set[str]) -> Dict[Tuple[Any, str], list]:
+        """ Gets the join records index from the edges of the join records, which have the direction and keys """
+        relationships = {(relationship.pk, is_forward_lookup): relationship
+                         for relationship, is_forward_lookup in self._relationships}
+        join_records_index = defaultdict(list)
+        edges = JoinRecordEdge.objects.get_edges_bulk(origin_pks, self._relationships)\
+            .values_list('relationship_id', 'is_forward', 'origin_key', 'target_key')
+        for relationship_pk, is_forward_lookup, origin_key, target_key in edges:
+            relationship = relationships[(relationship_pk, is_forward_lookup)]
+            related_model = relationship.related_model if is_forward_lookup else relationship.origin_model
+            join_records_index[(relationship_pk, origin_key)].append({
+                'pk': target_key,
+                'model': related_model.endpoint.strip('/'),
+                'service': related_model.logic_module_endpoint_name,
+                'pk_name': related_model.lookup_field_name,
+            })
+        return join_records_index
+
+    def get_related_records_meta(self, origin_pk: Any,
+                                 join_records_index: Dict[Tuple[Any, str], list] = None
+                                 ) -> Generator[tuple, None, None]:
+        """
+        Gets list of related records' META-data that is used for retrieving data for each of these records.
+        A join records index prepared by `get_join_records_index` can be passed to avoid querying the database.
+        """
+        if join_records_index is None:
+            join_records_index = self.get_join_records_index([origin_pk])
+        origin_pk = normalize_pk(origin_pk)
+        for relationship, _ in self._relationships:
+            for params in join_records_index.get((relationship.pk, origin_pk), []):
+                yield relationship, dict(params)
 
-    def extend_data(self, data: Union[dict, list], client_map: Dict[str, Any]) -> None:
+    def extend_data(self, data: Union[dict, list], client_map: Dict[str, Any], depth: int = 1) -> None:
         """
         Extends given data according to this DataMesh's relationships.
         For getting extended data it uses a client objects (one for each related service).
+        With a depth > 1 the related records are extended as well, level by level (see `_prepare_next_level`).
         """
+        data_items = self._get_data_items(data)
+        join_records_index = self.get_join_records_index(
+            data_item.get(self._origin_lookup_field) for data_item in data_items)
+        nested_requests = []
+        for data_item in data_items:
+            nested_requests.extend(self._add_nested_data(data_item, join_records_index))
+        visited = self._get_visited(data_items)
+        duplicates = []
+        for level in range(depth):
+            if level:
+                nested_requests, duplicates = self._prepare_next_level(nested_requests, visited)
+            self._fetch_local_data([request for request in nested_requests if self._is_local(request[1])])
+            self._fetch_remote_data([request for request in nested_requests if not self._is_local(request[1])],
+                                    client_map)
+            self._copy_nested_data(duplicates)
+
+    def _get_visited(self, data_items: list) -> Dict[Tuple[str, str, str], dict]:
+        """ Index the top level records by model and pk, they are not extended again when they are reached by joins """
+        model_key = (self._logic_module_model.logic_module_endpoint_name, self._logic_module_model.endpoint.strip('/'))
+        return {(*model_key, normalize_pk(data_item[self._origin_lookup_field])): data_item
+                for data_item in data_items if data_item.get(self._origin_lookup_field)}
+
+    def _prepare_next_level(self, nested_requests: List[Tuple[list, dict]],
+                            visited: Dict[Tuple[str, str, str], dict]
+                            ) -> Tuple[List[Tuple[list, dict]], List[tuple]]:
+        """
+        Collect requests for the related records of the records received by the nested requests of the last level.
+        The join records of each model are looked up with one query. A record that is reached by several paths is
+        extended once, its duplicates get its nested data when the level is fetched (see `_copy_nested_data`).
+        Records that were already reached on an earlier level aren't extended again, so cycles end there.
+        """
+        placeholders = {id(placeholder): (placeholder, (params['service'], params['model']))
+                        for placeholder, params in nested_requests}
+        level_keys, duplicates = set(), []
+        groups = defaultdict(list)
+        for placeholder, model_key in placeholders.values():
+            model = self._models.get(model_key)
+            if model is None:
+                continue
+            datamesh = self._get_datamesh(model)
+            for record in placeholder:
+                pk = record.get(model.lookup_field_name) if isinstance(record, dict) else None
+                if not pk:
+                    continue
+                key = (*model_key, normalize_pk(pk))
+                if key not in visited:
+                    visited[key] = record
+                    level_keys.add(key)
+                    groups[model_key].append(record)
+                elif key in level_keys and visited[key] is not record:
+                    duplicates.append((datamesh, visited[key], record))
+
+        next_requests = []
+        for model_key, records in groups.items():
+            datamesh = self._get_datamesh(self._models[model_key])
+            # the related models are needed for fetching the records of the next level
+            self._models.update(datamesh._models)
+            join_records_index = datamesh.get_join_records_index(
+                record[datamesh._origin_lookup_field] for record in records)
+            for record in records:
+                next_requests.extend(datamesh._prepare_nested_data(
+                    record, record[datamesh._origin_lookup_field], join_records_index))
+        return next_requests, duplicates
+
+    @staticmethod
+    def _copy_nested_data(duplicates: List[tuple]) -> None:
+        """ Put the nested data of the extended records into their duplicates """
+        for datamesh, record, duplicate in duplicates:
+            for relationship, _ in datamesh._relationships:
+                duplicate[relationship.key] = record[relationship.key]
+
+    @staticmethod
+    def _get_data_items(data: Union[dict, list]) -> list:
+        """ Gets list of items from one-object or many-objects JSON """
         if isinstance(data, dict):
-            # one-object JSON
-            self._add_nested_data(data, client_map)
-        elif isinstance(data, list):
-            # many-objects JSON
-            for data_item in data:
-                self._add_nested_data(data_item, client_map)
-
-    def _extend_with_local(self, data_item: dict, relationship: Relationship, params: dict) -> None:
-        """ Extend data from local object (via Django ORM query)"""
-        cache_key = f"{params['service']}.{params['model']}.{params['pk']}"
-        if cache_key in self._cache:
-            data_item[relationship.key].append(self._cache[cache_key])
-            return
-        try:
-            model = apps.get_model(app_label=params['service'], model_name=params['model'])
-        except LookupError as e:
-            raise DatameshConfigurationError(f'Data Mesh configuration error: {e}')
-        lookup = {
-            params['pk_name']: params['pk']
-        }
-        try:
-            obj = model.objects.get(**lookup)
-        except model.DoesNotExist as e:
-            logger.warning(f'{e}, params: {lookup}')
+            return [data]
+        if isinstance(data, list):
+            return data
+        return []
+
+    def _is_local(self, params: dict) -> bool:
+        """ Checks if the requested record is a local object (Buildly model) """
+        related_model = self._models.get((params['service'], params['model']))
+        return related_model is not None and related_model.is_local
+
+    def _validate_access(self, obj: Any) -> None:
+        # TODO: need to validate object access, like utils.validate_object_access(request, obj)
+        if self._access_validator:
+            if hasattr(self._access_validator, 'validate') and callable(self._access_validator.validate):
+                self._access_validator.validate(obj)
+            else:
+                raise DatameshConfigurationError(f'DataMesh Error: Access Validator should have validate method')
+
+    def _validate_access_many(self, objs: List[Any]) -> None:
+        """ Validate the access to objects at once if the access validator supports it """
+        if self._access_validator and callable(getattr(self._access_validator, 'validate_many', None)):
+            self._access_validator.validate_many(objs)
         else:
-            # TODO: need to validate object access, like utils.validate_object_access(request, obj)
-            if self._access_validator:
-                if hasattr(self._access_validator, 'validate') and callable(self._access_validator.validate):
-                    self._access_validator.validate(obj)
-                else:
-                    raise DatameshConfigurationError(f'DataMesh Error: Access Validator should have validate method')
-            obj_dict = model_to_dict(obj)
-            data_item[relationship.key].append(obj_dict)
-            self._cache[cache_key] = obj_dict
+            for obj in objs:
+                self._validate_access(obj)
+
+    def _fetch_local_data(self, local_requests: List[Tuple[list, dict]]) -> None:
+        """
+        Extend data from local objects (via Django ORM query).
+        Objects of one model are loaded with one query for the whole response, or taken from the shared local cache.
+        The access to the objects of one model is validated at once.
+        """
+        grouped_pks = defaultdict(dict)  # dict keeps order and removes duplicates
+        for _, params in local_requests:
+            if f"{params['service']}.{params['model']}.{params['pk']}" not in self._cache:
+                grouped_pks[(params['service'], params['model'], params['pk_name'])][params['pk']] = None
+
+        for (service, model_name, pk_name), pks in grouped_pks.items():
+            try:
+                model = apps.get_model(app_label=service, model_name=model_name)
+            except LookupError as e:
+                raise DatameshConfigurationError(f'Data Mesh configuration error: {e}')
+
+            objects = local_cache.get_many(model, pk_name, pks)
+            missing_pks = [pk for pk in pks if pk not in objects]
+            if missing_pks:
+                loaded_objects = {
+                    str(getattr(obj, pk_name)): (obj, model_to_dict(obj))
+                    for obj in model.objects.filter(**{f'{pk_name}__in': missing_pks})
+                }
+                local_cache.set_many(model, pk_name, loaded_objects)
+                objects.update(loaded_objects)
 
-    def _add_nested_data(self, data_item: dict, client_map: Dict[str, Any]) -> None:
+            for pk in pks:
+                if pk not in objects:
+                    lookup = {pk_name: pk}
+                    logger.warning(f'{model.__name__} matching query does not exist, params: {lookup}')
+            found_pks = [pk for pk in pks if pk in objects]
+            self._validate_access_many([objects[pk][0] for pk in found_pks])
+            for pk in found_pks:
+                self._cache[f'{service}.{model_name}.{pk}'] = objects[pk][1]
+
+        for placeholder, params in local_requests:
+            obj_dict = self._cache.get(f"{params['service']}.{params['model']}.{params['pk']}")
+            if obj_dict is not None:
+                # a copy like the remote records, nested data of deeper joins is added to it
+                placeholder.append(dict(obj_dict))
+
+    def _add_nested_data(self, data_item: dict,
+                         join_records_index: Dict[Tuple[Any, str], list] = None) -> List[Tuple[list, dict]]:
         """
-        Nest data retrieved from related services.
+        Prepare nesting data retrieved from related services and local models.
         """
         origin_pk = data_item.get(self._origin_lookup_field)
         if not origin_pk:
             raise DatameshConfigurationError(
                 f'DataMesh configuration error: lookup_field_name "{self._origin_lookup_field}" not found in response.'
             )
+        return self._prepare_nested_data(data_item, origin_pk, join_records_index)
 
+    def _prepare_nested_data(self, data_item: dict, origin_pk: Any,
+                             join_records_index: Dict[Tuple[Any, str], list] = None) -> List[Tuple[list, dict]]:
+        """
+        Collect requests for the related records of the data item.
+        Returns list of request params with the placeholder list where the received data has to be put.
+        """
         for relationship, _ in self._relationships:
             data_item[relationship.key] = []
 
-        for relationship, params in self.get_related_records_meta(origin_pk):
-            if relationship.related_model.is_local:
-                self._extend_with_local(data_item, relationship, params)
+        nested_requests = []
+        for relationship, params in self.get_related_records_meta(origin_pk, join_records_index):
+            if not self._is_local(params):
+                params['method'] = 'get'
+            nested_requests.append((data_item[relationship.key], params))
+        return nested_requests
+
+    def _group_bulk_requests(self, remote_requests: List[Tuple[list, dict]]) -> Dict[Tuple[str, str], list]:
+        """
+        Group pks of the requested records by service and model for models that can be fetched in bulk.
+        Each group is split into chunks of DATAMESH_BULK_FETCH_CHUNK_SIZE pks.
+        """
+        grouped_pks = defaultdict(dict)  # dict keeps order and removes duplicates
+        for _, params in remote_requests:
+            related_model = self._models.get((params['service'], params['model']))
+            if related_model is not None and related_model.bulk_lookup_param:
+                grouped_pks[(params['service'], params['model'])][params['pk']] = None
+
+        chunk_size = getattr(settings, 'DATAMESH_BULK_FETCH_CHUNK_SIZE', DEFAULT_BULK_FETCH_CHUNK_SIZE)
+        chunks = defaultdict(list)
+        for key, pks in grouped_pks.items():
+            pks = list(pks)
+            for i in range(0, len(pks), chunk_size):
+                chunks[key].append(pks[i:i + chunk_size])
+        return chunks
+
+    def _get_bulk_request_params(self, service: str, model: str, pks: List[str]) -> dict:
+        """ Get params for requesting many records of a model with one request to the list endpoint """
+        related_model = self._models[(service, model)]
+        return {
+            'method': 'get',
+            'service': service,
+            'model': model,
+            'query_params': {related_model.bulk_lookup_param: ','.join(pks)},
+        }
+
+    def _scatter_bulk_content(self, service: str, model: str, content: Any) -> Dict[Tuple[str, str, str], dict]:
+        """ Index the records from a bulk response by service, model and their lookup field """
+        if isinstance(content, tuple):  # assume that response body is the first returned value
+            content = content[0]
+        if isinstance(content, dict):
+            # paginated response
+            content = content.get('results')
+        if not isinstance(content, list):
+            logger.error(f'No response data for bulk request of {service}.{model}, fetching records one by one')
+            return {}
+
+        lookup_field_name = self._models[(service, model)].lookup_field_name
+        records = {}
+        for record in content:
+            if isinstance(record, dict) and record.get(lookup_field_name) is not None:
+                records[(service, model, normalize_pk(record[lookup_field_name]))] = record
+        return records
+
+    @staticmethod
+    def _get_client(client_map: Dict[str, Any], service: str) -> Any:
+        client = client_map.get(service)
+        if not (hasattr(client, 'request') and callable(client.request)):
+            raise DatameshConfigurationError(f'DataMesh Error: Client should have request method')
+        return client
+
+    def _fetch_remote_data(self, remote_requests: List[Tuple[list, dict]], client_map: Dict[str, Any]) -> None:
+        """
+        Request data from the related services and put it into the placeholders.
+        Records of models with a bulk lookup param are requested in chunks, the rest (and records missing in the
+        bulk responses) one by one.
+        """
+        records = {}
+        for (service, model), chunks in self._group_bulk_requests(remote_requests).items():
+            client = self._get_client(client_map, service)
+            for pks in chunks:
+                content = client.request(**self._get_bulk_request_params(service, model, pks))
+                records.update(self._scatter_bulk_content(service, model, content))
+
+        for placeholder, params in remote_requests:
+            record = records.get((params['service'], params['model'], normalize_pk(params['pk'])))
+            if record is not None:
+                placeholder.append(dict(record))
                 continue
 
-            params['method'] = 'get'
-            client = client_map.get(params['service'])
-
-            if hasattr(client, 'request') and callable(client.request):
-                content = client.request(**params)
-                if isinstance(content, tuple):  # assume that response body is the first returned value
-                    content = content[0]
-                if isinstance(content, dict):
-                    data_item[relationship.key].append(dict(content))
-                else:
-                    logger.error(f'No response data for join record (request params: {params})')
+            content = self._get_client(client_map, params['service']).request(**params)
+            if isinstance(content, tuple):  # assume that response body is the first returned value
+                content = content[0]
+            if isinstance(content, dict):
+                placeholder.append(dict(content))
             else:
-                raise DatameshConfigurationError(f'DataMesh Error: Client should have request method')
+                logger.error(f'No response data for join record (request params: {params})')
 
-    async def async_extend_data(self, data: Union[dict, list], client_map: Dict[str, Any]):
+    async def async_extend_data(self, data: Union[dict, list], client_map: Dict[str, Any], depth: int = 1):
         """
         Async aggregation logic
         """
-        tasks = []
-        if isinstance(data, dict):
-            # detailed view
-            tasks.extend(await self._prepare_tasks(data, client_map))
-        elif isinstance(data, list):
-            # list view
-            for data_item in data:
-                tasks.extend(await self._prepare_tasks(data_item, client_map))
-        await asyncio.gather(*tasks)
+        nested_requests = []
+        data_items = self._get_data_items(data)
+        # database queries are run outside of the event loop
+        join_records_index = await aio.run_sync(
+            self.get_join_records_index, [data_item.get(self._origin_lookup_field) for data_item in data_items])
+        for data_item in data_items:
+            nested_requests.extend(await self._prepare_tasks(data_item, client_map, join_records_index))
+        visited = self._get_visited(data_items)
+        duplicates = []
+        for level in range(depth):
+            if level:
+                nested_requests, duplicates = await aio.run_sync(self._prepare_next_level, nested_requests, visited)
+            await aio.run_sync(self._fetch_local_data,
+                               [request for request in nested_requests if self._is_local(request[1])])
+            await self._async_fetch_remote_data(
+                [request for request in nested_requests if not self._is_local(request[1])], client_map)
+            self._copy_nested_data(duplicates)
+
+    async def _async_fetch_remote_data(self, remote_requests: List[Tuple[list, dict]],
+                                       client_map: Dict[str, Any]) -> None:
+        """ Request data from the related services concurrently and put it into the placeholders """
+        # bulk requests first, the records that were not received are requested one by one afterwards
+        bulk_keys, bulk_tasks = [], []
+        for (service, model), chunks in self._group_bulk_requests(remote_requests).items():
+            client = self._get_client(client_map, service)
+            for pks in chunks:
+                bulk_keys.append((service, model))
+                bulk_tasks.append(client.request(**self._get_bulk_request_params(service, model, pks)))
+        records = {}
+        for (service, model), content in zip(bulk_keys, await asyncio.gather(*bulk_tasks)):
+            records.update(self._scatter_bulk_content(service, model, content))
 
-    async def _prepare_tasks(self, data_item: dict, client_map: Dict[str, Any]) -> list:
-        """ Creates a list of coroutines for extending data from other services asynchronously """
         tasks = []
+        for placeholder, params in remote_requests:
+            record = records.get((params['service'], params['model'], normalize_pk(params['pk'])))
+            if record is not None:
+                placeholder.append(dict(record))
+            else:
+                client = self._get_client(client_map, params['service'])
+                tasks.append(self._extend_content(client, placeholder, **params))
+        await asyncio.gather(*tasks)
 
+    async def _prepare_tasks(self, data_item: dict, client_map: Dict[str, Any],
+                             join_records_index: Dict[Tuple[Any, str], list] = None) -> List[Tuple[list, dict]]:
+        """ Collect requests for extending data from local models and other services asynchronously """
         origin_pk = data_item.get(self._origin_lookup_field)
         if not origin_pk:
             raise KeyError(
                 f'DataMesh Error: lookup_field_name "{self._origin_lookup_field}" not found in response.'
             )
-
-        for relationship, _ in self._relationships:
-            data_item[relationship.key] = []
-
-        for relationship, params in self.get_related_records_meta(origin_pk):
-            if relationship.related_model.is_local:
-                self._extend_with_local(data_item, relationship, params)
-                continue
-
-            params['method'] = 'get'
-            client = client_map.get(params['service'])
-            tasks.append(self._extend_content(client, data_item[relationship.key], **params))
-
-        return tasks
+        return self._prepare_nested_data(data_item, origin_pk, join_records_index)
 
     async def _extend_content(self, client: Any, placeholder: list, **request_kwargs) -> None:
         """ Performs data request and extends data with received data """
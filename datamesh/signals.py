@@ -0,0 +1,62 @@
+from functools import partial
+from typing import Iterable, Type
+
+from django.db import models, transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from . import cache as local_cache
+from .graph import relationship_graph
+from .managers import join_record_edges_enabled
+from .models import JoinRecord, JoinRecordEdge, LogicModuleModel, Relationship
+
+
+@receiver([post_save, post_delete], sender=LogicModuleModel)
+@receiver([post_save, post_delete], sender=Relationship)
+def invalidate_relationship_graph(sender, **kwargs):
+    """
+    Rebuild the relationship graph after a logic module model or a relationship was changed or deleted.
+    It's dropped again on commit, a graph built within the transaction may contain uncommitted changes.
+    """
+    relationship_graph.invalidate()
+    transaction.on_commit(relationship_graph.invalidate)
+
+
+@receiver(post_save, sender=JoinRecord)
+def sync_join_record_edges(sender, instance, **kwargs):
+    """ Store the saved join record in both directions, deleted join records delete their edges by cascade """
+    if join_record_edges_enabled() and not kwargs.get('raw'):
+        JoinRecordEdge.objects.sync([instance.pk])
+
+
+def _invalidate_local_cache(changed_models: Iterable[Type[models.Model]]) -> None:
+    local_models = relationship_graph.get_local_models()
+    for model in changed_models:
+        if model in local_models:
+            local_cache.invalidate(model)
+
+
+def _invalidate_local_cache_of_models(changed_models: Iterable[Type[models.Model]]) -> None:
+    """
+    Drop the cached objects of the changed models that are local models of the Data Mesh.
+    If the relationship graph has to be built, it's built after the commit instead of within the transaction of the
+    change, which may be rolled back. Rolled back changes don't need invalidation.
+    """
+    if relationship_graph.is_compiled:
+        _invalidate_local_cache(changed_models)
+    else:
+        transaction.on_commit(partial(_invalidate_local_cache, set(changed_models)))
+
+
+@receiver([post_save, post_delete])
+def invalidate_local_cache(sender, **kwargs):
+    """ Drop the cached objects of a local model after one of them was changed or deleted """
+    if local_cache.is_enabled() and not kwargs.get('raw'):
+        _invalidate_local_cache_of_models([sender._meta.concrete_model])
+
+
+@receiver(m2m_changed)
+def invalidate_local_cache_m2m(sender, instance, action, model, **kwargs):
+    """ M2M fields are part of the cached dicts, so changes of them drop the cached objects of both sides """
+    if local_cache.is_enabled() and action in ('post_add', 'post_remove', 'post_clear'):
+        _invalidate_local_cache_of_models({instance.__class__._meta.concrete_model, model._meta.concrete_model})
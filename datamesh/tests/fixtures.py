@@ -30,6 +30,16 @@ def relationship2(relationship):
     return factories.Relationship(origin_model=lmm, related_model=lmm_location, key='location_relationship')
 
 
+@pytest.fixture
+def document_relationship(relationship):
+    lmm_document = relationship.related_model  # Documents model from 1st relationship
+    lm_location = factories.LogicModule(name='Location Service', endpoint_name='location')
+    lmm_location = factories.LogicModuleModel(logic_module_endpoint_name=lm_location.endpoint_name,
+                                              model='Location', endpoint='/siteprofile/')
+    return factories.Relationship(origin_model=lmm_document, related_model=lmm_location,
+                                  key='document_location_relationship')
+
+
 @pytest.fixture
 def relationship_with_10_records(org):
     lm = factories.LogicModule(name='Products Service', endpoint_name='products')
@@ -0,0 +1,127 @@
+import io
+import json
+import uuid
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+import factories
+from core.tests.fixtures import org
+from datamesh.importers import iter_json_items
+from datamesh.models import JoinRecord, JoinRecordEdge, Relationship
+from .fixtures import crm_logic_module, relationship
+
+
+@pytest.mark.django_db()
+def test_indexusage():
+    out = StringIO()
+    call_command('indexusage', stdout=out)
+    output = out.getvalue()
+    assert output.startswith('table')
+    for index in ('joinrecord_record_id_idx', 'joinrecord_record_uuid_idx', 'joinrecord_rel_record_id_idx',
+                  'joinrecord_rel_record_uuid_idx'):
+        assert index in output
+
+
+@pytest.mark.django_db()
+def test_benchmarkjoinrecords():
+    out = StringIO()
+    call_command('benchmarkjoinrecords', count=20, lookups=4, bulk_size=2, stdout=out)
+    output = out.getvalue()
+    assert '20 join records' in output
+    assert 'benchmark_id_relationship by related_record_uuid' in output
+    assert 'benchmark_uuid_relationship bulk of 2' in output
+    # the created records are removed
+    assert not Relationship.objects.exists()
+    assert not JoinRecord.objects.exists()
+
+    call_command('benchmarkjoinrecords', count=10, lookups=1, keep=True, stdout=StringIO())
+    assert JoinRecord.objects.count() == 10
+
+
+@pytest.mark.parametrize('content', [
+    json.dumps([{'pk': 1}, {'pk': 2, 'fields': [1.5, None]}], indent=4),
+    '{"pk": 1}\n{"pk": 2, "fields": [1.5, null]}\n',
+])
+def test_iter_json_items(content):
+    assert list(iter_json_items(io.StringIO(content), buffer_size=3)) == [{'pk': 1}, {'pk': 2, 'fields': [1.5, None]}]
+
+
+def test_iter_json_items_unterminated_array():
+    with pytest.raises(ValueError):
+        list(iter_json_items(io.StringIO('[{"pk": 1}, '), buffer_size=4))
+
+
+@pytest.mark.django_db()
+def test_loadrelationships(tmp_path, org, crm_logic_module):
+    factories.LogicModule(name='location', endpoint_name='location')
+    siteprofile_uuids = [str(uuid.uuid4()) for _ in range(3)]
+    contact_uuids = [str(uuid.uuid4()) for _ in range(3)]
+    contacts = [
+        {'pk': contact_uuids[0], 'fields': {'organization_uuid': str(org.pk),
+                                            'siteprofile_uuids': json.dumps(siteprofile_uuids[:2])}},
+        {'pk': contact_uuids[1], 'fields': {'organization_uuid': str(org.pk), 'siteprofile_uuids': ''}},
+        {'pk': contact_uuids[2], 'fields': {'organization_uuid': str(uuid.uuid4()),
+                                            'siteprofile_uuids': json.dumps(siteprofile_uuids[2:])}},
+    ]
+    file = tmp_path / 'contacts.json'
+    file.write_text(json.dumps(contacts))
+
+    out = StringIO()
+    call_command('loadrelationships', file=str(file), batch_size=1, stdout=out)
+    relationship = Relationship.objects.get(key='contact_siteprofile_relationship')
+    assert set(JoinRecord.objects.filter(relationship=relationship).values_list(
+        'record_uuid', 'related_record_uuid', 'organization')) == {
+        (uuid.UUID(contact_uuids[0]), uuid.UUID(siteprofile_uuid), org.pk) for siteprofile_uuid in siteprofile_uuids[:2]
+    }
+    assert f'Organization({contacts[2]["fields"]["organization_uuid"]}) not found.' in out.getvalue()
+    assert '2 JoinRecord(s) created' in out.getvalue()
+
+    # loading again doesn't duplicate join records and removes the ones that aren't in the file anymore
+    contacts[0]['fields']['siteprofile_uuids'] = json.dumps(siteprofile_uuids[1:2])
+    file.write_text('\n'.join(json.dumps(contact) for contact in contacts))
+    out = StringIO()
+    call_command('loadrelationships', file=str(file), stdout=out)
+    assert list(JoinRecord.objects.filter(relationship=relationship).values_list('related_record_uuid', flat=True)) \
+        == [uuid.UUID(siteprofile_uuids[1])]
+    assert '0 JoinRecord(s) created' in out.getvalue()
+    assert '1 JoinRecord(s) deleted.' in out.getvalue()
+
+
+@pytest.mark.django_db()
+def test_loadrelationships_configured_models(tmp_path, crm_logic_module):
+    file = tmp_path / 'products.json'
+    file.write_text('\n'.join(json.dumps({'id': i, 'contact_ids': [i, i + 1]}) for i in range(1, 4)))
+
+    call_command('loadrelationships', file=str(file), key='product_contact_relationship', origin_module='crm',
+                 origin_model='Product', origin_endpoint='/products/', origin_lookup_field='id',
+                 related_module='crm', related_model='Contact', related_endpoint='/contact/',
+                 related_lookup_field='id', record_field='id', related_records_field='contact_ids',
+                 organization_field='', stdout=StringIO())
+    relationship = Relationship.objects.get(key='product_contact_relationship')
+    assert relationship.origin_model.model == 'Product'
+    assert set(JoinRecord.objects.filter(relationship=relationship).values_list(
+        'record_id', 'related_record_id')) == {(1, 1), (1, 2), (2, 2), (2, 3), (3, 3), (3, 4)}
+
+
+@pytest.mark.django_db()
+def test_loadrelationships_missing_logic_module(tmp_path):
+    file = tmp_path / 'contacts.json'
+    file.write_text('[]')
+    with pytest.raises(CommandError):
+        call_command('loadrelationships', file=str(file), stdout=StringIO())
+
+
+@pytest.mark.django_db()
+def test_rebuildjoinrecordedges(relationship, settings):
+    JoinRecord.objects.create(relationship=relationship, record_id=1, related_record_id=2)
+    JoinRecord.objects.create(relationship=relationship, record_id=1, related_record_id=3)
+    settings.DATAMESH_JOIN_RECORD_EDGES = True
+
+    out = StringIO()
+    call_command('rebuildjoinrecordedges', stdout=out)
+    assert '4 edges of join records built.' in out.getvalue()
+    assert set(JoinRecordEdge.objects.filter(is_forward=False).values_list('origin_key', 'target_key')) == {
+        ('2', '1'), ('3', '1')}
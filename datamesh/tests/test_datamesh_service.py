@@ -1,12 +1,33 @@
 import asyncio
+import uuid
 
 import pytest
 from django.forms.models import model_to_dict
 
 import factories
 from core.tests.fixtures import org
-from datamesh.tests.fixtures import relationship, relationship2, relationship_with_10_records, relationship_with_local
-from datamesh.services import DataMesh
+from datamesh.tests.fixtures import (document_relationship, relationship, relationship2, relationship_with_10_records,
+                                     relationship_with_local)
+from datamesh.exceptions import DatameshConfigurationError
+from datamesh.services import DataMesh, parse_join_depth
+
+
+@pytest.mark.parametrize('join,depth', [
+    (None, 1), ('', 1), ('true', 1), ('depth:2', 2), ('DEPTH:3', 3), ('depth:0', 1), ('depth:x', 1), ('depth:10', 3),
+])
+def test_parse_join_depth(join, depth, settings):
+    settings.DATAMESH_MAX_JOIN_DEPTH = 3
+    assert parse_join_depth(join) == depth
+
+
+# mock client for the products, documents and location services, the records contain their pk
+class ChainClientMock:
+    def __init__(self):
+        self.requests = []
+
+    def request(self, **kwargs):
+        self.requests.append(kwargs)
+        return {'id': kwargs['pk'], 'model': kwargs['model']}
 
 
 @pytest.mark.django_db()
@@ -111,6 +132,57 @@ class TestSyncDataMesh:
             assert len(nested) == 1
             assert nested[0]['uuid'] == str(join_records[i].related_record_uuid)
 
+    def test_join_data_list_queries_join_records_once(self, relationship_with_10_records,
+                                                      django_assert_num_queries):
+        join_records = relationship_with_10_records.joinrecords.all()
+        logic_module_model = relationship_with_10_records.origin_model
+        data = [{'uuid': str(item.record_uuid).upper()} for item in join_records]
+
+        class ClientMock:
+            def request(self, **kwargs):
+                return {'uuid': kwargs['pk']}
+        client_map = {relationship_with_10_records.related_model.logic_module_endpoint_name: ClientMock()}
+
+        datamesh = DataMesh(logic_module_endpoint=logic_module_model.logic_module_endpoint_name,
+                            model_endpoint=logic_module_model.endpoint)
+        with django_assert_num_queries(1):
+            datamesh.extend_data(data, client_map)
+
+        for item, join_record in zip(data, join_records):
+            assert item[relationship_with_10_records.key] == [{'uuid': str(join_record.related_record_uuid)}]
+
+    def test_join_data_list_bulk_fetch(self, relationship_with_10_records, settings):
+        settings.DATAMESH_BULK_FETCH_CHUNK_SIZE = 4
+        related_model = relationship_with_10_records.related_model
+        related_model.bulk_lookup_param = 'uuid__in'
+        related_model.save()
+        join_records = list(relationship_with_10_records.joinrecords.all())
+        missing_uuid = str(join_records[0].related_record_uuid)
+
+        logic_module_model = relationship_with_10_records.origin_model
+        data = [{'uuid': str(item.record_uuid)} for item in join_records]
+
+        requests = []
+
+        class ClientMock:
+            def request(self, **kwargs):
+                requests.append(kwargs)
+                if 'query_params' in kwargs:
+                    pks = kwargs['query_params']['uuid__in'].split(',')
+                    return [{'uuid': pk} for pk in pks if pk != missing_uuid], 200, {}
+                return {'uuid': kwargs['pk']}, 200, {}
+        client_map = {related_model.logic_module_endpoint_name: ClientMock()}
+
+        datamesh = DataMesh(logic_module_endpoint=logic_module_model.logic_module_endpoint_name,
+                            model_endpoint=logic_module_model.endpoint)
+        datamesh.extend_data(data, client_map)
+
+        for item, join_record in zip(data, join_records):
+            assert item[relationship_with_10_records.key] == [{'uuid': str(join_record.related_record_uuid)}]
+        # 3 chunks and one fallback request for the record missing in the bulk response
+        assert len(requests) == 4
+        assert requests[-1]['pk'] == missing_uuid
+
     def test_relationship_with_local_lm(self, relationship_with_local, org):
         factories.JoinRecord(relationship=relationship_with_local, record_id=1,
                              related_record_uuid=org.organization_uuid,
@@ -133,6 +205,145 @@ class TestSyncDataMesh:
 
         assert data == expected_data
 
+    def test_relationship_with_local_lm_list(self, relationship_with_local, org, django_assert_num_queries):
+        org2 = factories.Organization(name='Another Org')
+        factories.JoinRecord(relationship=relationship_with_local, record_id=1,
+                             related_record_uuid=org.organization_uuid,
+                             record_uuid=None, related_record_id=None)
+        factories.JoinRecord(relationship=relationship_with_local, record_id=2,
+                             related_record_uuid=org2.organization_uuid,
+                             record_uuid=None, related_record_id=None)
+
+        logic_module_model = relationship_with_local.origin_model
+        data = [{'id': 1}, {'id': 2}]
+
+        datamesh = DataMesh(logic_module_endpoint=logic_module_model.logic_module_endpoint_name,
+                            model_endpoint=logic_module_model.endpoint)
+        # one query for the join records and one for the organizations
+        with django_assert_num_queries(2):
+            datamesh.extend_data(data, {})
+
+        assert data[0][relationship_with_local.key] == [model_to_dict(org)]
+        assert data[1][relationship_with_local.key] == [model_to_dict(org2)]
+
+    def test_relationship_with_local_lm_shared_cache(self, relationship_with_local, org, settings,
+                                                     django_assert_num_queries):
+        settings.DATAMESH_LOCAL_CACHE_TIMEOUT = 60
+        factories.JoinRecord(relationship=relationship_with_local, record_id=1,
+                             related_record_uuid=org.organization_uuid,
+                             record_uuid=None, related_record_id=None)
+        logic_module_model = relationship_with_local.origin_model
+
+        def extend_data():
+            data = {'id': 1}
+            datamesh = DataMesh(logic_module_endpoint=logic_module_model.logic_module_endpoint_name,
+                                model_endpoint=logic_module_model.endpoint)
+            datamesh.extend_data(data, {})
+            return data[relationship_with_local.key]
+
+        assert extend_data() == [model_to_dict(org)]
+        # the organization is taken from the cache, only the join records are queried
+        with django_assert_num_queries(1):
+            assert extend_data() == [model_to_dict(org)]
+
+        org.name = 'Changed'
+        org.save()
+        assert extend_data()[0]['name'] == 'Changed'
+
+    @pytest.mark.parametrize('is_forward_lookup', [True, False])
+    def test_join_records_index_from_edges(self, relationship, relationship2, settings, is_forward_lookup):
+        settings.DATAMESH_JOIN_RECORD_EDGES = True
+        related_record_uuid = uuid.uuid4()
+        factories.JoinRecord(relationship=relationship, record_id=1, related_record_uuid=related_record_uuid)
+        factories.JoinRecord(relationship=relationship, record_id=1, related_record_id=3, related_record_uuid=None)
+        factories.JoinRecord(relationship=relationship2, record_id=1, related_record_id=4, related_record_uuid=None)
+        factories.JoinRecord(relationship=relationship, record_id=2, related_record_id=5, related_record_uuid=None)
+        if is_forward_lookup:
+            logic_module_model, origin_pks = relationship.origin_model, [1, 9]
+        else:
+            logic_module_model, origin_pks = relationship.related_model, [str(related_record_uuid).upper(), 3, 4]
+        datamesh = DataMesh(logic_module_endpoint=logic_module_model.logic_module_endpoint_name,
+                            model_endpoint=logic_module_model.endpoint)
+
+        settings.DATAMESH_JOIN_RECORD_EDGES = False
+        expected_index = datamesh.get_join_records_index(origin_pks)
+        assert expected_index
+        settings.DATAMESH_JOIN_RECORD_EDGES = True
+        index = datamesh.get_join_records_index(origin_pks)
+        assert {key: sorted(params, key=str) for key, params in index.items()} == \
+            {key: sorted(params, key=str) for key, params in expected_index.items()}
+
+    def test_join_data_depth_2(self, relationship, document_relationship):
+        factories.JoinRecord(relationship=relationship, record_id=1, related_record_id=2, related_record_uuid=None)
+        factories.JoinRecord(relationship=document_relationship, record_id=2, related_record_id=3,
+                             related_record_uuid=None)
+
+        logic_module_model = relationship.origin_model
+        data = {'id': 1, 'name': 'test'}
+        client = ChainClientMock()
+        client_map = {'documents': client, 'location': client, 'products': client}
+
+        datamesh = DataMesh(logic_module_endpoint=logic_module_model.logic_module_endpoint_name,
+                            model_endpoint=logic_module_model.endpoint)
+        assert datamesh.get_related_logic_modules() == {'documents'}
+        assert datamesh.get_related_logic_modules(2) == {'documents', 'location', 'products'}
+        datamesh.extend_data(data, client_map, depth=2)
+
+        document = {'id': '2', 'model': 'documents'}
+        assert data == {
+            'id': 1,
+            'name': 'test',
+            relationship.key: [{
+                **document,
+                # the reverse relationship leads back to the product, which isn't extended again
+                relationship.key: [{'id': '1', 'model': 'products'}],
+                document_relationship.key: [{'id': '3', 'model': 'siteprofile'}],
+            }],
+        }
+
+    def test_join_data_depth_2_deduplicates_records(self, relationship, document_relationship,
+                                                    django_assert_num_queries):
+        for record_id in (1, 2):
+            factories.JoinRecord(relationship=relationship, record_id=record_id, related_record_id=5,
+                                 related_record_uuid=None)
+        factories.JoinRecord(relationship=document_relationship, record_id=5, related_record_id=7,
+                             related_record_uuid=None)
+
+        logic_module_model = relationship.origin_model
+        data = [{'id': 1}, {'id': 2}]
+        client = ChainClientMock()
+        client_map = {'documents': client, 'location': client, 'products': client}
+
+        datamesh = DataMesh(logic_module_endpoint=logic_module_model.logic_module_endpoint_name,
+                            model_endpoint=logic_module_model.endpoint)
+        # one query for the join records of each level
+        with django_assert_num_queries(2):
+            datamesh.extend_data(data, client_map, depth=2)
+
+        for item in data:
+            document = item[relationship.key][0]
+            assert document[document_relationship.key] == [{'id': '7', 'model': 'siteprofile'}]
+            assert sorted(product['id'] for product in document[relationship.key]) == ['1', '2']
+        # the shared document is extended once
+        assert [request['pk'] for request in client.requests if request['model'] == 'siteprofile'] == ['7']
+
+    def test_join_data_depth_stops_at_cycles(self, relationship):
+        factories.JoinRecord(relationship=relationship, record_id=1, related_record_id=2, related_record_uuid=None)
+
+        logic_module_model = relationship.origin_model
+        data = {'id': 1}
+        client = ChainClientMock()
+        client_map = {'documents': client, 'products': client}
+
+        datamesh = DataMesh(logic_module_endpoint=logic_module_model.logic_module_endpoint_name,
+                            model_endpoint=logic_module_model.endpoint)
+        datamesh.extend_data(data, client_map, depth=3)
+
+        # the product is reached again on the 2nd level and isn't extended on the 3rd level
+        product = data[relationship.key][0][relationship.key][0]
+        assert product == {'id': '1', 'model': 'products'}
+        assert len(client.requests) == 2
+
 
 @pytest.mark.django_db()
 class TestAsyncDataMesh:
@@ -237,6 +448,35 @@ class TestAsyncDataMesh:
             assert len(nested) == 1
             assert nested[0]['uuid'] == str(join_records[i].related_record_uuid)
 
+    def test_join_data_depth_2(self, relationship, document_relationship):
+        factories.JoinRecord(relationship=relationship, record_id=1, related_record_id=2, related_record_uuid=None)
+        factories.JoinRecord(relationship=document_relationship, record_id=2, related_record_id=3,
+                             related_record_uuid=None)
+
+        class ClientMock:
+            async def request(self, **kwargs):
+                return {'id': kwargs['pk'], 'model': kwargs['model']}
+        client_map = {'documents': ClientMock(), 'location': ClientMock(), 'products': ClientMock()}
+
+        logic_module_model = relationship.origin_model
+        data = [{'id': 1}]
+        datamesh = DataMesh(logic_module_endpoint=logic_module_model.logic_module_endpoint_name,
+                            model_endpoint=logic_module_model.endpoint)
+        asyncio.run(datamesh.async_extend_data(data, client_map, depth=2))
+
+        document = data[0][relationship.key][0]
+        assert document['id'] == '2'
+        assert document[document_relationship.key] == [{'id': '3', 'model': 'siteprofile'}]
+
+    def test_join_data_missing_client(self, relationship):
+        factories.JoinRecord(relationship=relationship, record_id=1, related_record_id=2, related_record_uuid=None)
+
+        logic_module_model = relationship.origin_model
+        datamesh = DataMesh(logic_module_endpoint=logic_module_model.logic_module_endpoint_name,
+                            model_endpoint=logic_module_model.endpoint)
+        with pytest.raises(DatameshConfigurationError):
+            asyncio.run(datamesh.async_extend_data({'id': 1}, {}))
+
     def test_relationship_with_local_lm(self, relationship_with_local, org):
         factories.JoinRecord(relationship=relationship_with_local, record_id=1,
                              related_record_uuid=org.organization_uuid,
@@ -0,0 +1,81 @@
+import pytest
+
+import factories
+from core.models import Organization
+from core.tests.fixtures import org
+from datamesh.graph import relationship_graph
+from datamesh.models import LogicModuleModel
+from datamesh.services import DataMesh
+from datamesh.tests.fixtures import relationship, relationship2, relationship_with_local
+
+
+@pytest.mark.django_db()
+def test_datamesh_without_queries(relationship, relationship2, django_assert_num_queries):
+    origin_model = relationship.origin_model
+    relationship_graph.get_node(origin_model.logic_module_endpoint_name, origin_model.endpoint)
+
+    with django_assert_num_queries(0):
+        datamesh = DataMesh(logic_module_endpoint=origin_model.logic_module_endpoint_name,
+                            model_endpoint=origin_model.endpoint)
+        assert datamesh.related_logic_modules == {'documents', 'location'}
+
+
+@pytest.mark.django_db()
+def test_reverse_relationship_in_graph(relationship):
+    related_model = relationship.related_model
+    node = relationship_graph.get_node(related_model.logic_module_endpoint_name, related_model.endpoint)
+    assert node.relationships == [(relationship, False)]
+
+
+@pytest.mark.django_db()
+def test_graph_invalidated_on_relationship_save(relationship):
+    origin_model = relationship.origin_model
+    node = relationship_graph.get_node(origin_model.logic_module_endpoint_name, origin_model.endpoint)
+    assert len(node.relationships) == 1
+
+    lmm_location = factories.LogicModuleModel(logic_module_endpoint_name='location',
+                                              model='Location', endpoint='/siteprofile/')
+    factories.Relationship(origin_model=origin_model, related_model=lmm_location, key='location_relationship')
+
+    node = relationship_graph.get_node(origin_model.logic_module_endpoint_name, origin_model.endpoint)
+    assert len(node.relationships) == 2
+
+
+@pytest.mark.django_db()
+def test_unknown_model():
+    with pytest.raises(LogicModuleModel.DoesNotExist):
+        DataMesh(logic_module_endpoint='products', model_endpoint='/products/')
+
+
+@pytest.mark.django_db()
+def test_models_by_name_and_relationships_in_graph(relationship, relationship2):
+    assert set(relationship_graph.get_model_names()) == {'productsProduct', 'documentsDocument', 'locationLocation'}
+    assert relationship_graph.get_model_by_name('documentsDocument') == relationship.related_model
+    assert relationship_graph.get_model_by_name('documentsUnknown') is None
+    assert relationship_graph.get_relationship(relationship2.pk) == relationship2
+    assert relationship_graph.get_relationship(relationship2.pk).related_model.model == 'Location'
+
+    relationship2.delete()
+    assert relationship_graph.get_relationship(relationship2.pk) is None
+
+
+@pytest.mark.django_db()
+def test_local_models_resolved_once_per_graph(relationship_with_local, django_assert_num_queries):
+    local_models = relationship_graph.get_local_models()
+    assert local_models == {Organization}
+
+    with django_assert_num_queries(0):
+        assert relationship_graph.get_local_models() is local_models
+
+
+@pytest.mark.django_db()
+def test_graph_not_built_by_local_cache_invalidation(relationship_with_local, org, settings):
+    settings.DATAMESH_LOCAL_CACHE_TIMEOUT = 60
+    relationship_graph.get_local_models()
+    factories.LogicModuleModel(logic_module_endpoint_name='location', model='Location', endpoint='/siteprofile/')
+    assert not relationship_graph.is_compiled
+
+    # the graph isn't built within the transaction of the changes, it's checked after the commit
+    org.name = 'Changed'
+    org.save()
+    assert not relationship_graph.is_compiled
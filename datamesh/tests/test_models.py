@@ -4,7 +4,7 @@ import pytest
 from django.core.exceptions import ValidationError
 from django.db import IntegrityError, transaction
 
-from datamesh.models import JoinRecord, Relationship, LogicModuleModel
+from datamesh.models import JoinRecord, JoinRecordEdge, Relationship, LogicModuleModel
 
 from core.tests.fixtures import org
 from .fixtures import relationship, appointment_logic_module_model, document_logic_module_model
@@ -159,3 +159,71 @@ def test_unique_together_join_record_uuid_id(relationship, org):
                 relationship=relationship,
             )
     assert JoinRecord.objects.count() == 1
+
+
+@pytest.mark.django_db()
+def test_get_join_records_bulk(relationship):
+    record_uuid = uuid.uuid4()
+    join_record_id = JoinRecord.objects.create(relationship=relationship, record_id=1, related_record_id=2)
+    join_record_uuid = JoinRecord.objects.create(relationship=relationship, record_uuid=record_uuid,
+                                                 related_record_id=3)
+    join_record_reverse = JoinRecord.objects.create(relationship=relationship, record_id=4, related_record_id=1)
+    JoinRecord.objects.create(relationship=relationship, record_id=5, related_record_id=6)
+
+    forward = set(JoinRecord.objects.get_join_records_bulk([1, str(record_uuid), 'abc'], [(relationship, True)]))
+    assert forward == {join_record_id, join_record_uuid}
+
+    reverse = set(JoinRecord.objects.get_join_records_bulk([1], [(relationship, False)]))
+    assert reverse == {join_record_reverse}
+
+    assert not JoinRecord.objects.get_join_records_bulk([], [(relationship, True)]).exists()
+
+
+def _get_edges():
+    return set(JoinRecordEdge.objects.values_list('join_record', 'is_forward', 'origin_key', 'target_key'))
+
+
+@pytest.mark.django_db()
+def test_join_record_edges(relationship, settings):
+    settings.DATAMESH_JOIN_RECORD_EDGES = True
+    record_uuid = uuid.uuid4()
+    join_record = JoinRecord.objects.create(relationship=relationship, record_uuid=record_uuid, related_record_id=3)
+    assert _get_edges() == {(join_record.pk, True, str(record_uuid), '3'),
+                            (join_record.pk, False, '3', str(record_uuid))}
+
+    join_record.related_record_id = 4
+    join_record.save()
+    assert _get_edges() == {(join_record.pk, True, str(record_uuid), '4'),
+                            (join_record.pk, False, '4', str(record_uuid))}
+
+    forward = JoinRecordEdge.objects.get_edges_bulk([str(record_uuid), '5'], [(relationship, True)])
+    assert [edge.target_key for edge in forward] == ['4']
+    assert not JoinRecordEdge.objects.get_edges_bulk([str(record_uuid)], [(relationship, False)]).exists()
+
+    join_record.delete()
+    assert not JoinRecordEdge.objects.exists()
+
+
+@pytest.mark.django_db()
+def test_join_record_edges_on_queryset_update(relationship, settings):
+    settings.DATAMESH_JOIN_RECORD_EDGES = True
+    join_record = JoinRecord.objects.create(relationship=relationship, record_id=1, related_record_id=2)
+    other = JoinRecord.objects.create(relationship=relationship, record_id=5, related_record_id=6)
+
+    # filtered by the changed field
+    assert JoinRecord.objects.filter(record_id=1).update(record_id=3) == 1
+    assert _get_edges() == {(join_record.pk, True, '3', '2'), (join_record.pk, False, '2', '3'),
+                            (other.pk, True, '5', '6'), (other.pk, False, '6', '5')}
+
+    join_record.related_record_id = 4
+    JoinRecord.objects.bulk_update([join_record], ['related_record_id'])
+    assert (join_record.pk, True, '3', '4') in _get_edges()
+
+
+@pytest.mark.django_db()
+def test_join_record_edges_disabled(relationship):
+    JoinRecord.objects.create(relationship=relationship, record_id=1, related_record_id=2)
+    assert not JoinRecordEdge.objects.exists()
+
+    JoinRecordEdge.objects.sync()
+    assert len(_get_edges()) == 2
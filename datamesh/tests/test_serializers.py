@@ -1,7 +1,7 @@
 import pytest
 
 from datamesh.serializers import JoinRecordSerializer
-from .fixtures import join_record
+from .fixtures import join_record, relationship
 
 
 @pytest.mark.django_db()
@@ -25,3 +25,30 @@ def test_join_record_serializer_from_instance(request_factory, join_record):
     data = serializer.data
     assert set(data.keys()) == set(keys)
     assert data['organization'] == join_record.organization.organization_uuid
+
+
+@pytest.mark.django_db()
+def test_join_record_serializer_model_choices_without_queries(request_factory, join_record, relationship,
+                                                              django_assert_num_queries):
+    JoinRecordSerializer().fields['origin_model_name'].to_internal_value('productsProduct')
+    with django_assert_num_queries(0):
+        serializers = [JoinRecordSerializer(instance=join_record) for _ in range(3)]
+        fields = serializers[-1].fields
+        assert fields['origin_model_name'].to_internal_value('productsProduct') == relationship.origin_model
+        assert 'documentsDocument' in fields['related_model_name'].choices
+        # the representation takes the model names from the relationship graph
+        data = serializers[0].data
+    assert data['origin_model_name'] == join_record.relationship.origin_model.concatenated_model_name
+    assert not hasattr(JoinRecordSerializer, '_model_choices')
+
+
+@pytest.mark.django_db()
+def test_join_record_serializer_invalid_model_name(request_factory, relationship):
+    serializer = JoinRecordSerializer(data={
+        'origin_model_name': 'productsUnknown',
+        'related_model_name': 'documentsDocument',
+        'record_id': 1,
+        'related_record_id': 2,
+    })
+    assert not serializer.is_valid()
+    assert serializer.errors['origin_model_name'][0].code == 'invalid_choice'
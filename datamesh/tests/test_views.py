@@ -1,11 +1,14 @@
+import json
 import uuid
 from urllib.parse import urlencode
+from unittest.mock import patch
 
 import pytest
 from rest_framework.reverse import reverse
 
 import factories
 from datamesh import views
+from datamesh.models import JoinRecord, Relationship
 from core.tests.fixtures import org, org_admin, org_member, TEST_USER_DATA
 from .fixtures import (
     document_logic_module,
@@ -166,6 +169,105 @@ class TestJoinRecordCreateView(TestJoinRecordBase):
         assert response.data["organization"] == str(TEST_USER_DATA["organization_uuid"])
 
 
+@pytest.mark.django_db()
+class TestJoinRecordBulkView(TestJoinRecordBase):
+    @staticmethod
+    def _operation(op='create', **kwargs):
+        return dict(op=op, origin_model_name='documentDocument', related_model_name='crmAppointment', **kwargs)
+
+    def test_join_record_bulk_view(
+        self,
+        request_factory,
+        org_admin,
+        document_logic_module_model,
+        appointment_logic_module_model,
+    ):
+        relationship = factories.Relationship(origin_model=document_logic_module_model,
+                                              related_model=appointment_logic_module_model)
+        existing = factories.JoinRecord(relationship=relationship, record_id=1, related_record_uuid=uuid.uuid4(),
+                                        organization__organization_uuid=TEST_USER_DATA["organization_uuid"])
+        other_organization = factories.JoinRecord(relationship=relationship, record_id=2,
+                                                  related_record_uuid=uuid.uuid4())
+        record_uuid = uuid.uuid4()
+        data = [
+            self._operation(record_uuid=str(record_uuid), related_record_id=7),
+            self._operation(record_uuid=str(record_uuid), related_record_id=7),
+            self._operation(record_id=1, related_record_uuid=str(existing.related_record_uuid)),
+            self._operation(record_id=3),
+            dict(self._operation(record_id=3, related_record_id=4), origin_model_name='documentUnknown'),
+            self._operation('delete', record_id=1, related_record_uuid=str(existing.related_record_uuid)),
+            self._operation('delete', record_id=2, related_record_uuid=str(other_organization.related_record_uuid)),
+        ]
+        request = request_factory.post("", data, format="json")
+        request.user = org_admin
+        request.session = self.session
+        response = views.JoinRecordViewSet.as_view({"post": "bulk"})(request)
+        assert response.status_code == 200
+        assert [result["index"] for result in response.data] == list(range(len(data)))
+        assert [result["status"] for result in response.data] == [
+            "created", "exists", "exists", "error", "error", "deleted", "not_found"]
+        assert "non_field_errors" in response.data[3]["errors"]
+
+        created = JoinRecord.objects.get(record_uuid=record_uuid)
+        assert created.relationship == relationship
+        assert str(created.organization_id) == str(TEST_USER_DATA["organization_uuid"])
+        assert response.data[0]["join_record_uuid"] == created.pk
+        assert response.data[2]["join_record_uuid"] == existing.pk
+        assert not JoinRecord.objects.filter(pk=existing.pk).exists()
+        assert JoinRecord.objects.filter(pk=other_organization.pk).exists()
+
+    def test_join_record_bulk_view_ndjson(
+        self,
+        request_factory,
+        org_admin,
+        document_logic_module_model,
+        appointment_logic_module_model,
+    ):
+        data = [self._operation(record_id=i, related_record_id=i + 1) for i in range(5)]
+        data.append(self._operation('delete', record_id=0, related_record_id=1))
+        request = request_factory.post("", "\n".join(json.dumps(operation) for operation in data),
+                                       content_type="application/x-ndjson", HTTP_ACCEPT="application/x-ndjson")
+        request.user = org_admin
+        request.session = self.session
+        response = views.JoinRecordViewSet.as_view({"post": "bulk"})(request)
+        assert response.status_code == 200
+        assert response.streaming
+        results = [json.loads(line) for line in b"".join(response.streaming_content).splitlines()]
+        assert [result["status"] for result in results] == ["created"] * 5 + ["deleted"]
+        # the relationship is created once
+        relationship = Relationship.objects.get()
+        assert set(JoinRecord.objects.filter(relationship=relationship).values_list(
+            "record_id", "related_record_id")) == {(i, i + 1) for i in range(1, 5)}
+
+    def test_join_record_bulk_view_ndjson_malformed_line(
+        self,
+        request_factory,
+        org_admin,
+        document_logic_module_model,
+        appointment_logic_module_model,
+    ):
+        lines = [json.dumps(self._operation(record_id=i, related_record_id=i + 1)) for i in range(5)]
+        lines.insert(3, '{"op": "create", ')
+        request = request_factory.post("", "\n".join(lines), content_type="application/x-ndjson")
+        request.user = org_admin
+        request.session = self.session
+        with patch.object(views.JoinRecordViewSet, "bulk_batch_size", 2):
+            response = views.JoinRecordViewSet.as_view({"post": "bulk"})(request)
+        assert response.status_code == 400
+        assert "line 4" in response.data["detail"]
+        # the first batch is committed before the malformed line is parsed
+        assert [(result["index"], result["status"]) for result in response.data["results"]] == [
+            (0, "created"), (1, "created")]
+        assert set(JoinRecord.objects.values_list("record_id", flat=True)) == {0, 1}
+
+    def test_join_record_bulk_view_invalid_body(self, request_factory, org_admin):
+        request = request_factory.post("", {"op": "create"}, format="json")
+        request.user = org_admin
+        request.session = self.session
+        response = views.JoinRecordViewSet.as_view({"post": "bulk"})(request)
+        assert response.status_code == 400
+
+
 @pytest.mark.django_db()
 def test_join_record_detail_view(request_factory, join_record, org_admin):
     request = request_factory.get("")
@@ -195,6 +297,7 @@ class TestLogicModuleModelView:
             'endpoint',
             'lookup_field_name',
             'is_local',
+            'bulk_lookup_param',
         }
 
     def test_list_logic_module_models(self,
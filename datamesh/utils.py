@@ -1,6 +1,8 @@
-from typing import Tuple
+import uuid
+from typing import Any, Tuple
 
 from datamesh.models import Relationship, JoinRecord, LogicModuleModel
+from gateway.utils import valid_uuid4
 
 
 def prepare_lookup_kwargs(is_forward_lookup: bool,
@@ -17,3 +19,23 @@ def prepare_lookup_kwargs(is_forward_lookup: bool,
             else 'record_uuid'
 
     return related_model, related_record_field
+
+
+def get_origin_pk(is_forward_lookup: bool, join_record: JoinRecord) -> str:
+    """Get pk of the record that the join record was looked up by."""
+    if is_forward_lookup:
+        origin_pk = join_record.record_id if join_record.record_id is not None else join_record.record_uuid
+    else:
+        origin_pk = join_record.related_record_id if join_record.related_record_id is not None\
+            else join_record.related_record_uuid
+    return str(origin_pk)
+
+
+def normalize_pk(pk: Any) -> str:
+    """Bring id or uuid from a response into the same string form as the pks of join records."""
+    pk = str(pk)
+    if valid_uuid4(pk):
+        return str(uuid.UUID(pk))
+    if pk.isdigit():
+        return str(int(pk))
+    return pk
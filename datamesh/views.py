@@ -1,10 +1,21 @@
+from collections.abc import Iterator
+
+from django.http import StreamingHttpResponse
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework import viewsets
+from rest_framework import status, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
 
+from core.streaming import NDJSONParser, NDJSONRenderer
 from .filters import JoinRecordFilter
+from .importers import DEFAULT_BULK_WRITE_BATCH_SIZE, JoinRecordBulkWriter
 from .mixins import OrganizationQuerySetMixin
 from .models import JoinRecord, LogicModuleModel, Relationship
 from .serializers import JoinRecordSerializer, LogicModuleModelSerializer, RelationshipSerializer
+from workflow.pagination import KeysetPagination
 from workflow.permissions import IsSuperUserOrReadOnly
 
 
@@ -25,6 +36,7 @@ class JoinRecordViewSet(OrganizationQuerySetMixin,
 
     queryset = JoinRecord.objects.all()
     serializer_class = JoinRecordSerializer
+    pagination_class = KeysetPagination
     filter_backends = (DjangoFilterBackend,)
     filter_class = JoinRecordFilter
     filter_fields = ('relationship__key',
@@ -32,3 +44,47 @@ class JoinRecordViewSet(OrganizationQuerySetMixin,
                      'record_uuid',
                      'related_record_id',
                      'related_record_uuid',)
+    bulk_batch_size = DEFAULT_BULK_WRITE_BATCH_SIZE
+
+    @action(methods=['POST'], detail=False, parser_classes=(JSONParser, NDJSONParser),
+            renderer_classes=(JSONRenderer, NDJSONRenderer))
+    def bulk(self, request, *args, **kwargs):
+        """
+        Create and delete many join records. The body is an array (or newline delimited JSON) of operations, p.e.:
+        [{"op": "create", "origin_model_name": "crmContact", "related_model_name": "locationSiteProfile",
+          "record_id": 1, "related_record_uuid": "322f71fe-b606-48ce-bae6-d5254479ad6f"},
+         {"op": "delete", "origin_model_name": "crmContact", "related_model_name": "locationSiteProfile",
+          "record_id": 2, "related_record_uuid": "8b1a3c9e-6a0e-4c6b-9f0e-2d8f8b9f6c1a"}]
+        The result of each operation contains its index and status (created, exists, deleted, not_found or error).
+        With `Accept: application/x-ndjson` the results are streamed batch by batch, one per line.
+
+        The operations are written in batches of `bulk_batch_size`, each batch in its own transaction, while a newline
+        delimited JSON body is still being parsed. A malformed line therefore stops the writing after the batches
+        before it were committed: the response is a 400 with the error in `detail` and the results of the written
+        operations in `results` (the streamed response ends with a line with the error instead).
+        """
+        operations = request.data
+        if not isinstance(operations, (list, Iterator)):
+            raise ParseError('Expected a list of operations.')
+        writer = JoinRecordBulkWriter(request.session.get('jwt_organization_uuid', None), self.bulk_batch_size)
+        if isinstance(request.accepted_renderer, NDJSONRenderer):
+            return StreamingHttpResponse(self._render_bulk_results(writer.write(operations)),
+                                         content_type=NDJSONRenderer.media_type)
+        results = []
+        try:
+            for batch_results in writer.write(operations):
+                results.extend(batch_results)
+        except ParseError as exc:
+            # the batches before the malformed line are committed, the client gets their results
+            return Response({'detail': exc.detail, 'results': results}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(results)
+
+    @staticmethod
+    def _render_bulk_results(batches):
+        renderer = NDJSONRenderer()
+        try:
+            for results in batches:
+                yield b''.join(renderer.render_lines(results))
+        except ParseError as exc:
+            # the response is already sent partially
+            yield renderer.render({'detail': exc.detail})
@@ -1,5 +1,7 @@
 from __future__ import absolute_import, unicode_literals
 
+default_app_config = 'gateway.apps.GatewayConfig'
+
 API_GATEWAY_RESERVED_NAMES = [
     'admin',
     'oauth',
@@ -0,0 +1,126 @@
+"""
+Long-lived event loop for the asynchronous gateway requests.
+
+Django 2.2 has no ASGI support, so the views stay synchronous. Instead of creating an event loop per request
+with `asyncio.run`, the coroutines of all requests of a process are run on one event loop in a background thread.
+That way the connection pools of the loop are kept between requests and the upstream calls of concurrent requests
+(p.e. with threaded gunicorn workers) are multiplexed on it.
+
+Database access must not block the loop and has to stay in the thread of the request (Django's connections are
+thread-local, p.e. transactions would be lost otherwise). Coroutines hand blocking calls over to the waiting
+request thread with `run_sync`.
+"""
+import asyncio
+import contextvars
+import functools
+import logging
+import os
+import queue
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_loop = None
+_thread = None
+_pid = None
+_request_executor = contextvars.ContextVar('gateway_request_executor', default=None)
+
+
+class RequestThreadExecutor:
+    """
+    Runs callables submitted by the coroutines of a request in the thread that waits for the request to finish
+    """
+
+    def __init__(self):
+        self._queue = queue.Queue()
+
+    def run_until_complete(self, future: Future) -> Any:
+        """ Run submitted callables in the current thread until the future is done and return its result """
+        future.add_done_callback(lambda f: self._queue.put(None))
+        while True:
+            work_item = self._queue.get()
+            if work_item is None:
+                break
+            func, loop, loop_future = work_item
+            try:
+                result = func()
+            except BaseException as e:
+                loop.call_soon_threadsafe(_set_future_exception, loop_future, e)
+            else:
+                loop.call_soon_threadsafe(_set_future_result, loop_future, result)
+        return future.result()
+
+    def submit(self, func: Callable[[], Any]) -> asyncio.Future:
+        """ Submit a callable from the event loop, the returned future can be awaited there """
+        loop = asyncio.get_event_loop()
+        loop_future = loop.create_future()
+        self._queue.put((func, loop, loop_future))
+        return loop_future
+
+
+def _set_future_result(future: asyncio.Future, result: Any) -> None:
+    if not future.cancelled():
+        future.set_result(result)
+
+
+def _set_future_exception(future: asyncio.Future, exception: BaseException) -> None:
+    if not future.cancelled():
+        future.set_exception(exception)
+
+
+def get_loop() -> asyncio.AbstractEventLoop:
+    """ Get the event loop of this process, it's started in a daemon thread on first use """
+    global _loop, _thread, _pid
+    with _lock:
+        # a forked process (p.e. gunicorn worker) doesn't inherit the thread of the loop
+        if _loop is None or _pid != os.getpid() or not _thread.is_alive():
+            _loop = asyncio.new_event_loop()
+            _thread = threading.Thread(target=_loop.run_forever, name='gateway-event-loop', daemon=True)
+            _thread.start()
+            _pid = os.getpid()
+        return _loop
+
+
+def run(coroutine: Awaitable) -> Any:
+    """
+    Run the coroutine on the event loop of this process and wait for its result.
+    While waiting, the current thread runs the blocking calls that the coroutine passes to `run_sync`.
+    """
+    executor = RequestThreadExecutor()
+
+    async def _run_with_executor():
+        _request_executor.set(executor)
+        return await coroutine
+
+    future = asyncio.run_coroutine_threadsafe(_run_with_executor(), get_loop())
+    return executor.run_until_complete(future)
+
+
+async def run_sync(func: Callable, *args, **kwargs) -> Any:
+    """
+    Run a blocking callable (p.e. a database query) in the thread of the request without blocking the event loop.
+    Outside of `run` (p.e. in `asyncio.run`) the callable is just called.
+    """
+    executor = _request_executor.get()
+    if executor is None:
+        return func(*args, **kwargs)
+    return await executor.submit(functools.partial(func, *args, **kwargs))
+
+
+def shutdown() -> None:
+    """ Stop the event loop of this process, p.e. in tests. A new one is started on the next use. """
+    global _loop, _thread
+    with _lock:
+        loop, thread = _loop, _thread
+        _loop, _thread = None, None
+    if loop is None or not thread.is_alive():
+        return
+
+    from . import pool
+    asyncio.run_coroutine_threadsafe(pool.close_async_session(), loop).result()
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+    loop.close()
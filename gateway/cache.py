@@ -0,0 +1,140 @@
+"""
+Cache of gateway responses shared between requests and processes via Django's cache.
+
+Responses to GET requests are cached per service, model, pk, query, user, organization and permissions of the user.
+The user is part of the keys, because the services get the user's Authorization header and may scope data per user.
+Each (service, model) has a version that is part of the keys: a write request (POST, PUT, PATCH, DELETE) to the
+model through the gateway bumps the version and thereby drops all cached responses of it. `Cache-Control` of the
+service response is honoured. The cache is disabled unless GATEWAY_RESPONSE_CACHE_TIMEOUT is set.
+Joined and aggregated responses aren't cached, they contain data of other models (local objects, records of other
+services and join records) whose changes don't invalidate the responses of the requested model.
+"""
+import hashlib
+import re
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, Optional
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from requests.structures import CaseInsensitiveDict
+from rest_framework.request import Request
+
+from .request import GatewayResponse, needs_post_processing
+
+DEFAULT_RESPONSE_CACHE_TIMEOUT = 0
+KEY_PREFIX = 'gateway:response'
+CACHED_HEADERS = ('Content-Type', 'Content-Disposition', 'Content-Language', 'ETag', 'Last-Modified',
+                  'Cache-Control')
+
+_lock = threading.Lock()
+_stats = defaultdict(int)
+
+
+def get_timeout() -> int:
+    return getattr(settings, 'GATEWAY_RESPONSE_CACHE_TIMEOUT', DEFAULT_RESPONSE_CACHE_TIMEOUT)
+
+
+def is_enabled() -> bool:
+    return get_timeout() > 0
+
+
+def _count(counter: str) -> None:
+    with _lock:
+        _stats[counter] += 1
+
+
+def get_stats() -> Dict[str, int]:
+    """ Get hits, misses, stored responses and invalidations of this process for monitoring """
+    with _lock:
+        return dict(_stats)
+
+
+def _get_version_key(service: str, model: str) -> str:
+    return f'{KEY_PREFIX}:{service}:{model}:version'
+
+
+def _get_version(service: str, model: str) -> int:
+    version_key = _get_version_key(service, model)
+    version = cache.get(version_key)
+    if version is None:
+        # start with a unique version, responses cached before the version key was evicted must not be valid again
+        cache.add(version_key, int(time.time() * 1000), None)
+        version = cache.get(version_key)
+    return version
+
+
+def get_permission_fingerprint(request: Request) -> str:
+    """ Fingerprint of the user's permissions, changes of the user's groups or of their permissions change it """
+    if not hasattr(request, '_gateway_permission_fingerprint'):
+        user = request.user
+        if user.is_superuser:
+            fingerprint = 'superuser'
+        else:
+            groups = sorted(user.core_groups.values_list('pk', 'permissions', 'is_org_level', 'is_global'))
+            fingerprint = ','.join(':'.join(str(value) for value in group) for group in groups)
+        request._gateway_permission_fingerprint = fingerprint
+    return request._gateway_permission_fingerprint
+
+
+def get_cache_key(request: Request, service: str, model: str, pk: str = None, **kwargs) -> Optional[str]:
+    """ Get the cache key of the request, None if the request can't be cached """
+    if not is_enabled() or request.method != 'GET' or request.user.is_anonymous or needs_post_processing(request):
+        return None
+
+    query = urlencode(sorted(request.query_params.lists()), doseq=True)
+    organization_uuid = getattr(request.user, 'organization_id', None)
+    variant = '|'.join(str(part) for part in (pk, query, request.user.pk, organization_uuid,
+                                              get_permission_fingerprint(request)))
+    digest = hashlib.sha256(variant.encode()).hexdigest()
+    return f'{KEY_PREFIX}:{service}:{model}:{_get_version(service, model)}:{digest}'
+
+
+def get(cache_key: str) -> Optional[GatewayResponse]:
+    """ Get the cached response """
+    cached = cache.get(cache_key)
+    if cached is None:
+        _count('misses')
+        return None
+    _count('hits')
+    content, status_code, headers = cached
+    return GatewayResponse(content, status_code, CaseInsensitiveDict(headers))
+
+
+def _get_max_age(cache_control: str) -> Optional[int]:
+    match = re.search(r'(?:^|[\s,])max-age=(\d+)', cache_control)
+    return int(match.group(1)) if match else None
+
+
+def set(cache_key: str, response: GatewayResponse) -> None:
+    """ Cache the response if it is a successful, not streamed response that the service allows to be cached """
+    if response.status_code != 200 or response.is_streaming:
+        return
+
+    timeout = get_timeout()
+    cache_control = response.headers.get('Cache-Control', '').lower()
+    if any(directive in cache_control for directive in ('no-store', 'no-cache', 'private')):
+        return
+    max_age = _get_max_age(cache_control)
+    if max_age is not None:
+        timeout = min(timeout, max_age)
+    if timeout <= 0:
+        return
+
+    headers = {header: response.headers[header] for header in CACHED_HEADERS if header in response.headers}
+    cache.set(cache_key, (response.content, response.status_code, headers), timeout)
+    _count('sets')
+
+
+def invalidate(service: str, model: str) -> None:
+    """ Drop all cached responses of the model """
+    if not is_enabled():
+        return
+    version_key = _get_version_key(service, model)
+    try:
+        cache.incr(version_key)
+    except ValueError:
+        cache.set(version_key, int(time.time() * 1000), None)
+    _count('invalidations')
@@ -1,19 +1,85 @@
+import asyncio
 import logging
 import json
-from typing import Any, Dict, Tuple
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Tuple
+from urllib.parse import urlencode
 
-import requests
 import aiohttp
-from django.http.request import QueryDict
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from django.http.request import HttpRequest, QueryDict
 from bravado_core.spec import Spec
-from rest_framework.request import Request
+from rest_framework.request import Empty, Request
 from rest_framework.authentication import get_authorization_header
 
+from . import aio
 from . import exceptions
+from . import pool
 from . import utils
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_STREAMING_THRESHOLD = 1024 * 1024
+DEFAULT_STREAMING_CHUNK_SIZE = 64 * 1024
+
+
+class StreamedContent:
+    """ Body of a service response that is relayed chunk by chunk instead of being read into memory """
+
+    def __init__(self, chunks: Iterator[bytes], close: Callable[[], Any]):
+        self._chunks = chunks
+        self._close = close
+
+    def __iter__(self) -> Iterator[bytes]:
+        return iter(self._chunks)
+
+    def close(self) -> None:
+        """ Release the connection of the response, called by Django when the response is finished """
+        self._close()
+
+
+def _iter_chunks_from_loop(response: aiohttp.ClientResponse,
+                           loop: asyncio.AbstractEventLoop,
+                           chunk_size: int) -> Iterator[bytes]:
+    """ Read chunks of an aiohttp response from a thread outside of the event loop the response belongs to """
+    chunks = response.content.iter_chunked(chunk_size)
+    while True:
+        try:
+            yield asyncio.run_coroutine_threadsafe(chunks.__anext__(), loop).result()
+        except StopAsyncIteration:
+            return
+
+
+class RequestBodyStream:
+    """
+    Body of the incoming request that is read from the WSGI input chunk by chunk while it is sent to the service.
+    The length is known, so that the body isn't sent with chunked transfer encoding.
+    """
+
+    def __init__(self, request: HttpRequest, chunk_size: int):
+        self._request = request
+        self._chunk_size = chunk_size
+        self._length = int(request.META.get('CONTENT_LENGTH') or 0)
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __iter__(self) -> Iterator[bytes]:
+        while True:
+            chunk = self._request.read(self._chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+
+async def _aiter_request_body(request: HttpRequest, chunk_size: int) -> AsyncIterator[bytes]:
+    """ Read the body of the incoming request chunk by chunk, reading blocks, so it's done in the request thread """
+    while True:
+        chunk = await aio.run_sync(request.read, chunk_size)
+        if not chunk:
+            return
+        yield chunk
+
 
 class BaseSwaggerClient:
     """ Base for client class that is responsible for retrieving data from the service with Swagger spec"""
@@ -30,6 +96,28 @@ class BaseSwaggerClient:
         """ Checks if request is valid for caching operations """
         return self._in_request.method.lower() == 'get' and not self._in_request.query_params
 
+    @staticmethod
+    def is_streamable(headers: Dict[str, str]) -> bool:
+        """ Checks if response is large enough to be streamed, chunked responses are always streamed """
+        if headers.get('Transfer-Encoding', '').lower() == 'chunked':
+            return True
+        try:
+            content_length = int(headers.get('Content-Length', 0))
+        except ValueError:
+            return False
+        return content_length > getattr(settings, 'GATEWAY_STREAMING_THRESHOLD', DEFAULT_STREAMING_THRESHOLD)
+
+    @staticmethod
+    def get_chunk_size() -> int:
+        return getattr(settings, 'GATEWAY_STREAMING_CHUNK_SIZE', DEFAULT_STREAMING_CHUNK_SIZE)
+
+    @staticmethod
+    def get_cache_key(url: str, query_params: dict = None) -> str:
+        """ Get key for the request cache, query params passed to the request are part of it """
+        if not query_params:
+            return url
+        return f'{url}?{urlencode(sorted(query_params.items()))}'
+
     def prepare_data(self, spec: Spec, **kwargs) -> Tuple[str, str]:
         """ Parse request URL, validates operation, and returns method and URL for outgoing request"""
 
@@ -91,6 +179,46 @@ class BaseSwaggerClient:
 
         return data
 
+    def get_form_data(self) -> dict:
+        """ Get the request data without the uploaded files, which are sent separately """
+        data = self.get_request_data()
+        if isinstance(data, dict):
+            for key in self._in_request.FILES:
+                data.pop(key, None)
+        return data
+
+    def get_files(self) -> List[Tuple[str, UploadedFile]]:
+        """ Get all uploaded files of the incoming request, a field can contain many files """
+        return [(field, upload) for field, uploads in self._in_request.FILES.lists() for upload in uploads]
+
+    def can_stream_body(self) -> bool:
+        """
+        Checks if the incoming body is a multipart upload that hasn't been read yet (p.e. by a parser),
+        so that it can be forwarded to the service as it is, chunk by chunk.
+        """
+        django_request = self._in_request._request
+        return (self._in_request.content_type.startswith('multipart/form-data')
+                and self._in_request._data is Empty
+                and not getattr(django_request, '_read_started', True)
+                and not hasattr(django_request, '_body')
+                and int(django_request.META.get('CONTENT_LENGTH') or 0) > 0)
+
+    def get_streamed_body_headers(self) -> dict:
+        """ Get headers of the incoming body, the boundary of the multipart content type has to be kept """
+        return {
+            'Content-Type': self._in_request._request.META['CONTENT_TYPE'],
+            'Content-Length': self._in_request._request.META['CONTENT_LENGTH'],
+        }
+
+    def get_conditional_headers(self) -> dict:
+        """ Get the validators of the incoming request, p.e. to let the service respond with 304 """
+        headers = {}
+        for header in ('If-None-Match', 'If-Modified-Since'):
+            value = self._in_request.META.get('HTTP_' + header.upper().replace('-', '_'))
+            if value:
+                headers[header] = value
+        return headers
+
     def get_headers(self) -> dict:
         """Get data and headers from the incoming request."""
         headers = {
@@ -106,30 +234,53 @@ class SwaggerClient(BaseSwaggerClient):
 
     def request(self, **kwargs) -> Tuple[Any, int, Dict[str, str]]:
         """
-        Perform request to the service, use Swagger spec for validating operation
+        Perform request to the service, use Swagger spec for validating operation.
+        `query_params` replace the query params of the incoming request, p.e. for fetching many records at once.
+        With `stream` large responses are returned as `StreamedContent` instead of being read.
+        With `conditional` the validators of the incoming request are sent, so the service can respond with 304.
         """
 
         method, url = self.prepare_data(self._spec, **kwargs)
+        query_params = kwargs.get('query_params')
+        stream = kwargs.get('stream', False)
+        conditional = kwargs.get('conditional', False)
+        cache_key = self.get_cache_key(url, query_params)
 
         # Check request cache if applicable
-        if self.is_valid_for_cache() and url in self._data:
-            logger.debug(f'Taking data from cache: {url}')
-            return self._data[url]
+        if self.is_valid_for_cache() and cache_key in self._data:
+            logger.debug(f'Taking data from cache: {cache_key}')
+            return self._data[cache_key]
+
+        headers = self.get_headers()
+        if conditional:
+            headers.update(self.get_conditional_headers())
+        if self.can_stream_body():
+            data, files = RequestBodyStream(self._in_request._request, self.get_chunk_size()), None
+            headers.update(self.get_streamed_body_headers())
+        else:
+            data = self.get_form_data()
+            files = [(field, (upload.name, upload, upload.content_type)) for field, upload in self.get_files()]
 
-        # Make request to the service
-        method = getattr(requests, method)
+        # Make request to the service using the connection pool of the logic module
+        method = getattr(pool.get_session(url), method)
         try:
-            response = method(url,
-                              headers=self.get_headers(),
-                              params=self._in_request.query_params,
-                              data=self.get_request_data(),
-                              files=self._in_request.FILES)
+            with pool.track_request(url):
+                response = method(url,
+                                  headers=headers,
+                                  params=self._in_request.query_params if query_params is None else query_params,
+                                  data=data,
+                                  files=files or None,
+                                  stream=stream)
         except Exception as e:
             error_msg = (f'An error occurred when redirecting the request to '
                          f'or receiving the response from the service.\n'
                          f'Origin: ({e.__class__.__name__}: {e})')
             raise exceptions.GatewayError(error_msg)
 
+        if stream and self.is_streamable(response.headers):
+            content = StreamedContent(response.iter_content(chunk_size=self.get_chunk_size()), response.close)
+            return content, response.status_code, response.headers
+
         try:
             content = response.json()
         except ValueError:
@@ -138,7 +289,7 @@ class SwaggerClient(BaseSwaggerClient):
 
         # Cache data if request is cache-valid
         if self.is_valid_for_cache():
-            self._data[url] = return_data
+            self._data[cache_key] = return_data
 
         return return_data
 
@@ -148,36 +299,52 @@ class AsyncSwaggerClient(BaseSwaggerClient):
 
     async def request(self, **kwargs) -> Tuple[Any, int, Dict[str, str]]:
         method, url = self.prepare_data(self._spec, **kwargs)
+        query_params = kwargs.get('query_params')
+        stream = kwargs.get('stream', False)
+        conditional = kwargs.get('conditional', False)
+        cache_key = self.get_cache_key(url, query_params)
 
         # Check request cache if applicable
-        if self.is_valid_for_cache() and url in self._data:
-            logger.debug(f'Taking data from cache: {url}')
-            return self._data[url]
-
-        # Make request to the service
-        async with aiohttp.ClientSession() as session:
-            method = getattr(session, method)
-            if self._in_request.FILES:
-                request_data = self.get_request_data()
-                data = aiohttp.FormData()
-                for field in request_data:
-                    if field == 'file':
-                        data.add_field('file', request_data['file']['data'].file)
-                    else:
-                        data.add_field(field, request_data[field])
-            else:
-                data = self.get_request_data()
-
-            async with method(url, data=data, headers=self.get_headers()) as response:
-                try:
-                    content = await response.json()
-                except (json.JSONDecodeError, aiohttp.ContentTypeError):
-                    content = await response.read()
-
-            return_data = (content, response.status, response.headers)
+        if self.is_valid_for_cache() and cache_key in self._data:
+            logger.debug(f'Taking data from cache: {cache_key}')
+            return self._data[cache_key]
+
+        # Make request to the service using the long-lived session of the event loop
+        method = getattr(pool.get_async_session(), method)
+        headers = self.get_headers()
+        if conditional:
+            headers.update(self.get_conditional_headers())
+        if self.can_stream_body():
+            data = _aiter_request_body(self._in_request._request, self.get_chunk_size())
+            headers.update(self.get_streamed_body_headers())
+        elif self._in_request.FILES:
+            data = aiohttp.FormData()
+            for field, value in self.get_form_data().items():
+                data.add_field(field, value)
+            for field, upload in self.get_files():
+                data.add_field(field, upload.file, filename=upload.name, content_type=upload.content_type)
+        else:
+            data = self.get_request_data()
+
+        with pool.track_request(url):
+            response = await method(url, data=data, headers=headers, params=query_params)
+            if stream and self.is_streamable(response.headers):
+                # the response is released when the streamed content is closed
+                loop = asyncio.get_event_loop()
+                content = StreamedContent(_iter_chunks_from_loop(response, loop, self.get_chunk_size()),
+                                          lambda: loop.call_soon_threadsafe(response.close))
+                return content, response.status, response.headers
+            try:
+                content = await response.json()
+            except (json.JSONDecodeError, aiohttp.ContentTypeError):
+                content = await response.read()
+            finally:
+                await response.release()
+
+        return_data = (content, response.status, response.headers)
 
         # Cache data if request is cache-valid
         if self.is_valid_for_cache():
-            self._data[url] = return_data
+            self._data[cache_key] = return_data
 
         return return_data
@@ -1,12 +1,12 @@
 import logging
 
-from django.db.models import Q
 from rest_framework import permissions
 
 from core.models import LogicModule, PERMISSIONS_NO_ACCESS
-from core.permissions import merge_permissions, has_permission
+from core.permissions import get_permission_bits, has_permission
 
 from gateway.exceptions import ServiceDoesNotExist
+from gateway.registry import logic_module_registry
 
 logger = logging.getLogger(__name__)
 
@@ -15,7 +15,7 @@ class AllowLogicModuleGroup(permissions.BasePermission):
     @staticmethod
     def _get_logic_module(service_name: str) -> LogicModule:
         try:
-            return LogicModule.objects.prefetch_related('core_groups').get(endpoint_name=service_name)
+            return logic_module_registry.get(service_name)
         except LogicModule.DoesNotExist:
             raise ServiceDoesNotExist(f'Service "{service_name}" not found.')
 
@@ -26,29 +26,29 @@ class AllowLogicModuleGroup(permissions.BasePermission):
         if request.user.is_superuser:
             return True
 
+        # the result is memoised on the request, the permission can be checked more than once per request
         service_name = view.kwargs['service']
+        method = request.META['REQUEST_METHOD']
+        if not hasattr(request, '_logic_module_permissions'):
+            request._logic_module_permissions = dict()
+        key = (service_name, method)
+        if key not in request._logic_module_permissions:
+            request._logic_module_permissions[key] = self._has_logic_module_permission(request.user, service_name,
+                                                                                       method)
+        return request._logic_module_permissions[key]
+
+    def _has_logic_module_permission(self, user, service_name: str, method: str) -> bool:
         logic_module = self._get_logic_module(service_name=service_name)
-        logic_module_group = logic_module.core_groups.filter(Q(is_global=True) |
-                                                             Q(organization=request.user.organization,
-                                                               is_global=False, is_org_level=True))
+        # core groups are prefetched by the registry, so they are filtered without queries
+        logic_module_group = [group for group in logic_module.core_groups.all()
+                              if group.is_global or (group.organization_id == user.organization_id and
+                                                     group.is_org_level)]
 
         if logic_module_group:
             # default permission is no access '0000'
-            viewonly_display_permissions = '{0:04b}'.format(PERMISSIONS_NO_ACCESS)
-            global_permissions, org_permissions = viewonly_display_permissions, viewonly_display_permissions
+            permissions_ = PERMISSIONS_NO_ACCESS
             for group in logic_module_group:
-                if group.is_global:
-                    global_permissions = merge_permissions(global_permissions, group.display_permissions)
-                elif group.is_org_level:
-                    org_permissions = merge_permissions(org_permissions, group.display_permissions)
-
-            method = request.META['REQUEST_METHOD']
-            if has_permission(global_permissions, method):
-                return True
-
-            if has_permission(org_permissions, method):
-                return True
-
-            return False
+                permissions_ |= get_permission_bits(group.permissions)
+            return has_permission(permissions_, method)
         else:
             return True
@@ -0,0 +1,141 @@
+"""
+Connection pools for the requests from the gateway to the logic modules.
+
+The synchronous path uses one `requests.Session` per upstream origin (scheme + host + port, i.e. per logic module)
+with a tuned `HTTPAdapter`. The asynchronous path uses one `aiohttp.ClientSession` with a shared `TCPConnector`
+per event loop. Cookies are never persisted, because the sessions are shared between users.
+"""
+import asyncio
+import http.cookiejar
+import logging
+import threading
+import weakref
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Dict
+from urllib.parse import urlsplit
+
+import aiohttp
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_POOL_MAXSIZE = 10
+DEFAULT_POOL_MAX_RETRIES = 2
+DEFAULT_ASYNC_POOL_LIMIT = 100
+DEFAULT_ASYNC_POOL_LIMIT_PER_HOST = 20
+
+_lock = threading.Lock()
+_sessions = dict()
+_async_sessions = weakref.WeakKeyDictionary()
+_stats = defaultdict(lambda: defaultdict(int))
+
+
+def get_origin(url: str) -> str:
+    """ Get the part of the URL that identifies a connection pool """
+    parts = urlsplit(url)
+    return f'{parts.scheme}://{parts.netloc}'
+
+
+def _create_session() -> requests.Session:
+    max_retries = getattr(settings, 'GATEWAY_POOL_MAX_RETRIES', DEFAULT_POOL_MAX_RETRIES)
+    # only connection errors are retried, the request has not reached the logic module in this case
+    retry = Retry(total=max_retries, connect=max_retries, read=0, redirect=0, status=0, backoff_factor=0.1)
+    adapter = HTTPAdapter(pool_connections=1,
+                          pool_maxsize=getattr(settings, 'GATEWAY_POOL_MAXSIZE', DEFAULT_POOL_MAXSIZE),
+                          max_retries=retry)
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.cookies.set_policy(http.cookiejar.DefaultCookiePolicy(allowed_domains=[]))
+    return session
+
+
+def get_session(url: str) -> requests.Session:
+    """ Get the pooled session for the logic module the URL belongs to """
+    origin = get_origin(url)
+    with _lock:
+        if origin not in _sessions:
+            _sessions[origin] = _create_session()
+            _stats[origin]['sessions_created'] += 1
+        return _sessions[origin]
+
+
+def get_async_session() -> aiohttp.ClientSession:
+    """ Get the long-lived session of the running event loop """
+    loop = asyncio.get_event_loop()
+    with _lock:
+        session = _async_sessions.get(loop)
+        if session is None or session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=getattr(settings, 'GATEWAY_ASYNC_POOL_LIMIT', DEFAULT_ASYNC_POOL_LIMIT),
+                limit_per_host=getattr(settings, 'GATEWAY_ASYNC_POOL_LIMIT_PER_HOST',
+                                       DEFAULT_ASYNC_POOL_LIMIT_PER_HOST),
+            )
+            session = aiohttp.ClientSession(connector=connector, cookie_jar=aiohttp.DummyCookieJar())
+            _async_sessions[loop] = session
+            _stats['async']['sessions_created'] += 1
+        return session
+
+
+async def close_async_session() -> None:
+    """ Close the session of the running event loop, p.e. before the loop is closed """
+    loop = asyncio.get_event_loop()
+    with _lock:
+        session = _async_sessions.pop(loop, None)
+    if session is not None and not session.closed:
+        await session.close()
+
+
+def close_sessions() -> None:
+    """ Close all synchronous sessions and their connections """
+    with _lock:
+        sessions = list(_sessions.values())
+        _sessions.clear()
+    for session in sessions:
+        session.close()
+
+
+@contextmanager
+def track_request(url: str):
+    """ Count requests, failures and requests in flight of the pool the URL belongs to """
+    key = get_origin(url)
+    with _lock:
+        _stats[key]['requests'] += 1
+        _stats[key]['in_flight'] += 1
+    try:
+        yield
+    except Exception:
+        with _lock:
+            _stats[key]['errors'] += 1
+        raise
+    finally:
+        with _lock:
+            _stats[key]['in_flight'] -= 1
+
+
+def get_stats() -> Dict[str, dict]:
+    """
+    Get utilisation counters of the connection pools for monitoring.
+    For synchronous sessions the numbers of the underlying urllib3 pools are added:
+    `connections` (new connections opened), `pool_requests` (requests sent) and `idle` (idle connections).
+    """
+    with _lock:
+        stats = {key: dict(counters) for key, counters in _stats.items()}
+        sessions = dict(_sessions)
+
+    for origin, session in sessions.items():
+        adapter = session.get_adapter(origin)
+        counters = stats.setdefault(origin, dict())
+        counters.update(connections=0, pool_requests=0, idle=0)
+        for pool_key in adapter.poolmanager.pools.keys():
+            pool = adapter.poolmanager.pools.get(pool_key)
+            if pool is None:
+                continue
+            counters['connections'] += pool.num_connections
+            counters['pool_requests'] += pool.num_requests
+            counters['idle'] += pool.pool.qsize() if pool.pool else 0
+    return stats
@@ -0,0 +1,77 @@
+import logging
+import threading
+import time
+from typing import Dict, List
+
+from django.conf import settings
+
+from core.models import LogicModule
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_REGISTRY_TTL = 300
+
+
+class LogicModuleRegistry:
+    """
+    Process-wide registry of the logic modules keyed by endpoint name, loaded together with their core groups.
+    The registry is reloaded lazily after invalidation (on changes of logic modules or core groups in this process)
+    or after a TTL (on changes made by other processes).
+    The loaded logic modules are shared between requests and must not be changed.
+    """
+
+    def __init__(self, ttl: float = None):
+        self._ttl = ttl
+        self._modules = None
+        self._expires_at = 0
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    @property
+    def ttl(self) -> float:
+        if self._ttl is not None:
+            return self._ttl
+        return getattr(settings, 'GATEWAY_REGISTRY_TTL', DEFAULT_REGISTRY_TTL)
+
+    def get(self, endpoint_name: str) -> LogicModule:
+        """ Get the logic module with prefetched core groups, raises LogicModule.DoesNotExist like a model lookup """
+        logic_module = self._get_modules().get(endpoint_name)
+        if logic_module is None:
+            raise LogicModule.DoesNotExist(f'LogicModule matching endpoint name "{endpoint_name}" does not exist.')
+        return logic_module
+
+    def all(self) -> List[LogicModule]:
+        return list(self._get_modules().values())
+
+    def __contains__(self, endpoint_name: str) -> bool:
+        return endpoint_name in self._get_modules()
+
+    def invalidate(self) -> None:
+        """ Drop the loaded logic modules, they are reloaded on the next access """
+        with self._lock:
+            self._modules = None
+            self._generation += 1
+
+    def _get_modules(self) -> Dict[str, LogicModule]:
+        modules = self._modules
+        if modules is not None and time.monotonic() < self._expires_at:
+            return modules
+
+        with self._lock:
+            generation = self._generation
+        modules = self._load()
+        with self._lock:
+            # don't store logic modules that were invalidated while they were being loaded
+            if generation == self._generation:
+                self._modules = modules
+                self._expires_at = time.monotonic() + self.ttl
+        return modules
+
+    @staticmethod
+    def _load() -> Dict[str, LogicModule]:
+        modules = {module.endpoint_name: module for module in LogicModule.objects.prefetch_related('core_groups')}
+        logger.debug(f'Loaded {len(modules)} logic modules')
+        return modules
+
+
+logic_module_registry = LogicModuleRegistry()
@@ -2,21 +2,22 @@ import logging
 import json
 import uuid
 import asyncio
-from urllib.error import URLError
 from typing import Any, Dict, Union
 
-import requests
-import aiohttp
 from bravado_core.spec import Spec
 from django.http.request import QueryDict
 from django.forms.models import model_to_dict
+from requests.structures import CaseInsensitiveDict
 from rest_framework.request import Request
 
+from . import aio
 from . import exceptions
+from . import specs
 from . import utils
 from core.models import LogicModule
-from .clients import SwaggerClient, AsyncSwaggerClient
-from datamesh.services import DataMesh
+from .clients import SwaggerClient, AsyncSwaggerClient, StreamedContent
+from .registry import logic_module_registry
+from datamesh.services import DataMesh, parse_join_depth
 from workflow import models as wfm
 
 logger = logging.getLogger(__name__)
@@ -32,6 +33,15 @@ class GatewayResponse(object):
         self.status_code = status_code
         self.headers = headers
 
+    @property
+    def is_streaming(self) -> bool:
+        return isinstance(self.content, StreamedContent)
+
+
+def needs_post_processing(request: Request) -> bool:
+    """ Checks if the response data of the request is joined or aggregated with data of other models """
+    return 'join' in request.query_params or request.query_params.get('aggregate', '_none').lower() == 'true'
+
 
 class BaseGatewayRequest(object):
     """
@@ -50,8 +60,6 @@ class BaseGatewayRequest(object):
     def __init__(self, request: Request, **kwargs):
         self.request = request
         self.url_kwargs = kwargs
-        self._logic_modules = dict()
-        self._specs = dict()
         self._data = dict()
 
     def perform(self):
@@ -59,12 +67,31 @@ class BaseGatewayRequest(object):
 
     def _get_logic_module(self, service_name: str) -> LogicModule:
         """ Retrieve LogicModule by service name. """
-        if service_name not in self._logic_modules:
-            try:
-                self._logic_modules[service_name] = LogicModule.objects.get(endpoint_name=service_name)
-            except LogicModule.DoesNotExist:
-                raise exceptions.ServiceDoesNotExist(f'Service "{service_name}" not found.')
-        return self._logic_modules[service_name]
+        try:
+            return logic_module_registry.get(service_name)
+        except LogicModule.DoesNotExist:
+            raise exceptions.ServiceDoesNotExist(f'Service "{service_name}" not found.')
+
+    def needs_post_processing(self) -> bool:
+        """ Checks if the response data is joined or aggregated, otherwise the response can be streamed """
+        return needs_post_processing(self.request)
+
+    @staticmethod
+    def _create_response(content: Any, status_code: int, headers: Dict[str, str],
+                         is_relayed: bool) -> GatewayResponse:
+        """
+        Create the response with a strong ETag of the final content.
+        The ETag of the service is kept if the content is relayed as it is. Whether it is relayed is decided
+        before the request, the query params are reset by joins.
+        """
+        headers = CaseInsensitiveDict(headers)
+        if not is_relayed:
+            # the validators of the service response don't describe the joined/aggregated content
+            headers.pop('ETag', None)
+            headers.pop('Last-Modified', None)
+        if status_code == 200 and isinstance(content, (str, bytes)) and 'ETag' not in headers:
+            headers['ETag'] = utils.get_etag(content)
+        return GatewayResponse(content, status_code, headers)
 
     def get_datamesh(self) -> DataMesh:
         """ Get DataMesh object for the top level model """
@@ -99,7 +126,8 @@ class GatewayRequest(BaseGatewayRequest):
         client = SwaggerClient(spec, self.request)
 
         # perform a service data request
-        content, status_code, headers = client.request(**self.url_kwargs)
+        is_relayed = not self.needs_post_processing()
+        content, status_code, headers = client.request(stream=is_relayed, conditional=is_relayed, **self.url_kwargs)
 
         # aggregate/join with the JoinRecord-models
         if 'join' in self.request.query_params and status_code == 200 and type(content) in [dict, list]:
@@ -118,30 +146,20 @@ class GatewayRequest(BaseGatewayRequest):
         if type(content) in [dict, list]:
             content = json.dumps(content, cls=utils.GatewayJSONEncoder)
 
-        return GatewayResponse(content, status_code, headers)
+        return self._create_response(content, status_code, headers, is_relayed)
 
     def _get_swagger_spec(self, endpoint_name: str) -> Spec:
-        """Get Swagger spec of specified service."""
+        """Get Swagger spec of specified service from the process-wide spec cache."""
         logic_module = self._get_logic_module(endpoint_name)
         schema_url = utils.get_swagger_url_by_logic_module(logic_module)
-
-        if schema_url not in self._specs:
-            try:
-                response = requests.get(schema_url)
-                spec_dict = response.json()
-            except URLError:
-                raise URLError(f'Make sure that {schema_url} is accessible.')
-
-            swagger_spec = Spec.from_dict(spec_dict, config=self.SWAGGER_CONFIG)
-            self._specs[schema_url] = swagger_spec
-
-        return self._specs[schema_url]
+        return specs.get_spec(schema_url, self.SWAGGER_CONFIG)
 
     def _join_response_data(self, resp_data: Union[dict, list]) -> None:
         """
         Aggregates data from the requested service and from related services.
         Uses DataMesh relationship model for this.
         """
+        depth = parse_join_depth(self.request.query_params.get('join'))
         self.request._request.GET = QueryDict(mutable=True)
 
         if isinstance(resp_data, dict):
@@ -151,10 +169,10 @@ class GatewayRequest(BaseGatewayRequest):
 
         datamesh = self.get_datamesh()
         client_map = {}
-        for service in datamesh.related_logic_modules:
+        for service in datamesh.get_related_logic_modules(depth):
             spec = self._get_swagger_spec(service)
             client_map[service] = SwaggerClient(spec, self.request)
-        datamesh.extend_data(resp_data, client_map)
+        datamesh.extend_data(resp_data, client_map, depth)
 
     # ===================================================================
     # OLD DATAMESH METHODS (TODO: remove after migrating to new DataMesh)
@@ -265,10 +283,11 @@ class AsyncGatewayRequest(BaseGatewayRequest):
 
     def perform(self) -> GatewayResponse:
         """
-        Override base class's method for asynchronous execution. Wraps async method.
+        Override base class's method for asynchronous execution.
+        Runs async method on the long-lived event loop of the process and waits for it.
         """
         result = {}
-        asyncio.run(self.async_perform(result))
+        aio.run(self.async_perform(result))
         if 'response' not in result:
             raise exceptions.GatewayError('Error performing asynchronous gateway request')
         return result['response']
@@ -283,7 +302,9 @@ class AsyncGatewayRequest(BaseGatewayRequest):
         client = AsyncSwaggerClient(spec, self.request)
 
         # perform a service data request
-        content, status_code, headers = await client.request(**self.url_kwargs)
+        is_relayed = not self.needs_post_processing()
+        content, status_code, headers = await client.request(stream=is_relayed, conditional=is_relayed,
+                                                             **self.url_kwargs)
 
         # aggregate/join with the JoinRecord-models
         if 'join' in self.request.query_params and status_code == 200 and type(content) in [dict, list]:
@@ -295,31 +316,20 @@ class AsyncGatewayRequest(BaseGatewayRequest):
         if type(content) in [dict, list]:
             content = json.dumps(content, cls=utils.GatewayJSONEncoder)
 
-        result['response'] = GatewayResponse(content, status_code, headers)
+        result['response'] = self._create_response(content, status_code, headers, is_relayed)
 
     async def _get_swagger_spec(self, endpoint_name: str) -> Spec:
-        """ Gets swagger spec asynchronously and adds it to specs cache """
-        logic_module = self._get_logic_module(endpoint_name)
+        """ Gets swagger spec asynchronously from the process-wide spec cache """
+        logic_module = await aio.run_sync(self._get_logic_module, endpoint_name)
         schema_url = utils.get_swagger_url_by_logic_module(logic_module)
-
-        if schema_url not in self._specs:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(schema_url) as response:
-                    try:
-                        spec_dict = await response.json()
-                    except aiohttp.ContentTypeError:
-                        raise exceptions.GatewayError(
-                            f'Failed to parse swagger schema from {schema_url}. Should be JSON.'
-                        )
-                swagger_spec = Spec.from_dict(spec_dict, config=self.SWAGGER_CONFIG)
-                self._specs[schema_url] = swagger_spec
-        return self._specs[schema_url]
+        return await specs.async_get_spec(schema_url, self.SWAGGER_CONFIG)
 
     async def _join_response_data(self, resp_data: Union[dict, list]) -> None:
         """
         Aggregates data from the requested service and from related services asynchronously.
         Uses DataMesh relationship model for this.
         """
+        depth = parse_join_depth(self.request.query_params.get('join'))
         self.request._request.GET = QueryDict(mutable=True)
 
         if isinstance(resp_data, dict):
@@ -327,11 +337,12 @@ class AsyncGatewayRequest(BaseGatewayRequest):
                 # In case of pagination take 'results' as a items data
                 resp_data = resp_data.get('results', None)
 
-        datamesh = self.get_datamesh()
+        datamesh = await aio.run_sync(self.get_datamesh)
+        services = list(await aio.run_sync(datamesh.get_related_logic_modules, depth))
         tasks = []
-        for service in datamesh.related_logic_modules:
+        for service in services:
             tasks.append(self._get_swagger_spec(service))
         specs = await asyncio.gather(*tasks)
         clients = map(lambda x: AsyncSwaggerClient(x, self.request), specs)
-        client_map = dict(zip(datamesh.related_logic_modules, clients))
-        await datamesh.async_extend_data(resp_data, client_map)
+        client_map = dict(zip(services, clients))
+        await datamesh.async_extend_data(resp_data, client_map, depth)
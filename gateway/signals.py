@@ -0,0 +1,31 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from core.models import CoreGroup, LogicModule
+from . import utils
+from .registry import logic_module_registry
+from .specs import spec_cache
+
+
+@receiver(pre_save, sender=LogicModule)
+def invalidate_stored_swagger_spec(sender, instance: LogicModule, raw: bool = False, **kwargs):
+    """ Drop the cached Swagger spec of the stored logic module, its endpoints may be changed by the save """
+    if raw:
+        return
+    stored = LogicModule.objects.filter(pk=instance.pk).first() if instance.pk else None
+    if stored is not None:
+        spec_cache.invalidate(utils.get_swagger_url_by_logic_module(stored))
+
+
+@receiver([post_save, post_delete], sender=LogicModule)
+def invalidate_swagger_spec(sender, instance: LogicModule, **kwargs):
+    """ Drop the cached Swagger spec of the logic module when the logic module is changed or deleted """
+    spec_cache.invalidate(utils.get_swagger_url_by_logic_module(instance))
+
+
+@receiver([post_save, post_delete], sender=LogicModule)
+@receiver([post_save, post_delete], sender=CoreGroup)
+@receiver(m2m_changed, sender=LogicModule.core_groups.through)
+def invalidate_logic_module_registry(sender, **kwargs):
+    """ Reload the logic modules after a logic module, its core groups or their permissions were changed """
+    logic_module_registry.invalidate()
@@ -0,0 +1,186 @@
+import asyncio
+import json
+import logging
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from typing import Optional, Tuple
+from urllib.error import URLError
+
+import aiohttp
+from bravado_core.spec import Spec
+from django.conf import settings
+
+from . import exceptions
+from . import pool
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SPEC_CACHE_TTL = 300
+DEFAULT_SPEC_CACHE_MAX_SIZE = 64
+# number of locks the downloads of the specs are spread over
+LOCK_STRIPES = 16
+
+
+def _get_key(schema_url: str, config: dict = None) -> Tuple[str, str]:
+    # specs built with different bravado configs are cached separately
+    return schema_url, json.dumps(config or {}, sort_keys=True, default=repr)
+
+
+class SpecCacheEntry:
+    """
+    Parsed Swagger spec together with the validators needed for revalidating it
+    """
+    __slots__ = ('spec', 'etag', 'expires_at')
+
+    def __init__(self, spec: Spec, etag: Optional[str], ttl: float):
+        self.spec = spec
+        self.etag = etag
+        self.expires_at = time.monotonic() + ttl
+
+    @property
+    def is_fresh(self) -> bool:
+        return time.monotonic() < self.expires_at
+
+    def refresh(self, ttl: float) -> None:
+        self.expires_at = time.monotonic() + ttl
+
+
+class SwaggerSpecCache:
+    """
+    Process-wide LRU cache of parsed Swagger specs keyed by schema URL and bravado config.
+    Entries expire after a TTL and are then revalidated with the ETag returned by the logic module.
+    Locks striped by URL make sure that only one worker (thread or coroutine) downloads the same spec at once,
+    their number is fixed however many URLs are requested.
+    """
+
+    def __init__(self, ttl: float = None, max_size: int = None):
+        self._ttl = ttl
+        self._max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._url_locks = [threading.Lock() for _ in range(LOCK_STRIPES)]
+        self._async_url_locks = weakref.WeakKeyDictionary()
+
+    @property
+    def ttl(self) -> float:
+        if self._ttl is not None:
+            return self._ttl
+        return getattr(settings, 'GATEWAY_SPEC_CACHE_TTL', DEFAULT_SPEC_CACHE_TTL)
+
+    @property
+    def max_size(self) -> int:
+        if self._max_size is not None:
+            return self._max_size
+        return getattr(settings, 'GATEWAY_SPEC_CACHE_MAX_SIZE', DEFAULT_SPEC_CACHE_MAX_SIZE)
+
+    def get(self, schema_url: str, config: dict = None) -> Optional[SpecCacheEntry]:
+        """ Get the cache entry (fresh or stale) of the schema URL and config and mark it as recently used """
+        key = _get_key(schema_url, config)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, schema_url: str, spec: Spec, etag: str = None, config: dict = None) -> SpecCacheEntry:
+        """ Store the spec and evict the least recently used entries above the max size """
+        key = _get_key(schema_url, config)
+        entry = SpecCacheEntry(spec, etag, self.ttl)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                (evicted_url, _), _ = self._entries.popitem(last=False)
+                logger.debug(f'Evicted Swagger spec from cache: {evicted_url}')
+        return entry
+
+    def invalidate(self, schema_url: str = None) -> None:
+        """ Drop the specs of the schema URL (built with any config) or the whole cache if no URL is given """
+        with self._lock:
+            if schema_url is None:
+                self._entries.clear()
+            else:
+                for key in [key for key in self._entries if key[0] == schema_url]:
+                    del self._entries[key]
+
+    def __contains__(self, schema_url: str) -> bool:
+        return any(url == schema_url for url, _ in list(self._entries))
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def lock(self, schema_url: str) -> threading.Lock:
+        """ Get the lock for downloading the spec of the schema URL in synchronous code """
+        return self._url_locks[hash(schema_url) % LOCK_STRIPES]
+
+    def async_lock(self, schema_url: str) -> asyncio.Lock:
+        """ Get the lock for downloading the spec of the schema URL in the running event loop """
+        loop = asyncio.get_event_loop()
+        with self._lock:
+            loop_locks = self._async_url_locks.get(loop)
+            if loop_locks is None:
+                loop_locks = self._async_url_locks[loop] = [asyncio.Lock() for _ in range(LOCK_STRIPES)]
+            return loop_locks[hash(schema_url) % LOCK_STRIPES]
+
+
+spec_cache = SwaggerSpecCache()
+
+
+def get_spec(schema_url: str, config: dict) -> Spec:
+    """
+    Get the Swagger spec from the cache or download it from the logic module.
+    A stale spec is revalidated with `If-None-Match` and reused if the logic module responds with 304.
+    """
+    entry = spec_cache.get(schema_url, config)
+    if entry is not None and entry.is_fresh:
+        return entry.spec
+
+    with spec_cache.lock(schema_url):
+        # another thread could have downloaded the spec while we were waiting for the lock
+        entry = spec_cache.get(schema_url, config)
+        if entry is not None and entry.is_fresh:
+            return entry.spec
+
+        headers = {'If-None-Match': entry.etag} if entry is not None and entry.etag else {}
+        try:
+            response = pool.get_session(schema_url).get(schema_url, headers=headers)
+            if entry is not None and response.status_code == 304:
+                # the logic module confirmed that the spec hasn't changed
+                entry.refresh(spec_cache.ttl)
+                return entry.spec
+            spec_dict = response.json()
+        except URLError:
+            raise URLError(f'Make sure that {schema_url} is accessible.')
+
+        swagger_spec = Spec.from_dict(spec_dict, config=config)
+        return spec_cache.set(schema_url, swagger_spec, response.headers.get('ETag'), config).spec
+
+
+async def async_get_spec(schema_url: str, config: dict) -> Spec:
+    """ Asynchronous version of `get_spec` """
+    entry = spec_cache.get(schema_url, config)
+    if entry is not None and entry.is_fresh:
+        return entry.spec
+
+    async with spec_cache.async_lock(schema_url):
+        entry = spec_cache.get(schema_url, config)
+        if entry is not None and entry.is_fresh:
+            return entry.spec
+
+        headers = {'If-None-Match': entry.etag} if entry is not None and entry.etag else {}
+        async with pool.get_async_session().get(schema_url, headers=headers) as response:
+            if entry is not None and response.status == 304:
+                entry.refresh(spec_cache.ttl)
+                return entry.spec
+            try:
+                spec_dict = await response.json()
+            except aiohttp.ContentTypeError:
+                raise exceptions.GatewayError(
+                    f'Failed to parse swagger schema from {schema_url}. Should be JSON.'
+                )
+            etag = response.headers.get('ETag')
+
+        swagger_spec = Spec.from_dict(spec_dict, config=config)
+        return spec_cache.set(schema_url, swagger_spec, etag, config).spec
@@ -0,0 +1,52 @@
+import asyncio
+import threading
+
+import pytest
+
+from gateway import aio, pool
+
+
+def test_run_sync_in_request_thread():
+    request_thread = threading.get_ident()
+
+    def blocking_call(value):
+        assert threading.get_ident() == request_thread
+        return value * 2
+
+    async def coroutine():
+        assert threading.get_ident() != request_thread
+        return await asyncio.gather(*(aio.run_sync(blocking_call, i) for i in range(3)))
+
+    assert aio.run(coroutine()) == [0, 2, 4]
+
+
+def test_run_sync_exception():
+
+    def blocking_call():
+        raise ValueError('test')
+
+    async def coroutine():
+        await aio.run_sync(blocking_call)
+
+    with pytest.raises(ValueError):
+        aio.run(coroutine())
+
+
+def test_run_sync_outside_of_loop_thread():
+    assert asyncio.run(aio.run_sync(sum, [1, 2])) == 3
+
+
+def test_loop_and_async_session_reused():
+
+    async def coroutine():
+        return asyncio.get_event_loop(), pool.get_async_session()
+
+    loop1, session1 = aio.run(coroutine())
+    loop2, session2 = aio.run(coroutine())
+    assert loop1 is loop2
+    assert session1 is session2
+
+    aio.shutdown()
+    assert session1.closed
+    loop3, _ = aio.run(coroutine())
+    assert loop3 is not loop1
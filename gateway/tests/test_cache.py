@@ -0,0 +1,150 @@
+import os
+
+import httpretty
+import pytest
+from rest_framework.test import APIClient
+
+import factories
+from core.tests.fixtures import auth_api_client, logic_module, org
+from gateway import cache as gateway_cache
+from .fixtures import datamesh
+
+
+CURRENT_PATH = os.path.dirname(os.path.abspath(__file__))
+
+
+def _register_uris(logic_module, **kwargs):
+    with open(os.path.join(CURRENT_PATH, 'fixtures/swagger_documents.json')) as r:
+        swagger_body = r.read()
+    httpretty.register_uri(
+        httpretty.GET,
+        f'{logic_module.endpoint}/docs/swagger.json',
+        body=swagger_body,
+        adding_headers={'Content-Type': 'application/json'}
+    )
+    httpretty.register_uri(
+        httpretty.GET,
+        f'{logic_module.endpoint}/documents/1/',
+        body='{"id": 1}',
+        adding_headers={'Content-Type': 'application/json', **kwargs}
+    )
+    httpretty.register_uri(
+        httpretty.PATCH,
+        f'{logic_module.endpoint}/documents/1/',
+        body='{"id": 1}',
+        adding_headers={'Content-Type': 'application/json'}
+    )
+
+
+def _count_service_requests(method='GET'):
+    return len([r for r in httpretty.latest_requests() if r.path.startswith('/documents/1/') and r.method == method])
+
+
+@pytest.mark.django_db()
+@httpretty.activate
+def test_response_cached_and_invalidated(auth_api_client, logic_module, settings):
+    settings.GATEWAY_RESPONSE_CACHE_TIMEOUT = 60
+    _register_uris(logic_module)
+    url = f'/{logic_module.endpoint_name}/documents/1/'
+
+    stats = gateway_cache.get_stats()
+    response1 = auth_api_client.get(url)
+    response2 = auth_api_client.get(url)
+    assert response1.content == response2.content == b'{"id": 1}'
+    assert response2.get('Content-Type') == 'application/json'
+    assert _count_service_requests() == 1
+    assert gateway_cache.get_stats()['hits'] == stats.get('hits', 0) + 1
+
+    # other query params are cached separately
+    auth_api_client.get(url, {'fields': 'id'})
+    assert _count_service_requests() == 2
+
+    # writes drop the cached responses of the model
+    auth_api_client.patch(url, {'name': 'test'}, format='json')
+    auth_api_client.get(url)
+    assert _count_service_requests() == 3
+
+
+@pytest.mark.django_db()
+@httpretty.activate
+def test_response_not_cached_with_no_store(auth_api_client, logic_module, settings):
+    settings.GATEWAY_RESPONSE_CACHE_TIMEOUT = 60
+    _register_uris(logic_module, **{'Cache-Control': 'no-store'})
+    url = f'/{logic_module.endpoint_name}/documents/1/'
+
+    auth_api_client.get(url)
+    auth_api_client.get(url)
+    assert _count_service_requests() == 2
+
+
+@pytest.mark.django_db()
+@httpretty.activate
+def test_response_cache_disabled(auth_api_client, logic_module):
+    _register_uris(logic_module)
+    url = f'/{logic_module.endpoint_name}/documents/1/'
+
+    auth_api_client.get(url)
+    auth_api_client.get(url)
+    assert _count_service_requests() == 2
+
+
+@pytest.mark.django_db()
+@httpretty.activate
+def test_response_cached_per_user(logic_module, org, settings):
+    settings.GATEWAY_RESPONSE_CACHE_TIMEOUT = 60
+    _register_uris(logic_module)
+    url = f'/{logic_module.endpoint_name}/documents/1/'
+
+    # users of the same organization without groups have the same permissions, but get separate responses
+    for user in factories.CoreUser.create_batch(2, organization=org):
+        api_client = APIClient()
+        api_client.force_authenticate(user=user)
+        api_client.get(url)
+        api_client.get(url)
+    assert _count_service_requests() == 2
+
+
+@pytest.mark.django_db()
+def test_permission_fingerprint_includes_group_flags(org, request_factory):
+    group = factories.CoreGroup(organization=org, permissions=4)
+    user = factories.CoreUser.create(organization=org)
+    user.core_groups.add(group)
+
+    request = request_factory.get('/')
+    request.user = user
+    fingerprint = gateway_cache.get_permission_fingerprint(request)
+
+    group.is_org_level = True
+    group.save()
+    request = request_factory.get('/')
+    request.user = user
+    assert gateway_cache.get_permission_fingerprint(request) != fingerprint
+
+
+@pytest.mark.django_db()
+@httpretty.activate
+def test_joined_response_not_cached(auth_api_client, datamesh, settings):
+    settings.GATEWAY_RESPONSE_CACHE_TIMEOUT = 60
+    lm1, lm2, relationship = datamesh
+    record_uuid = '19a7f600-74a0-4123-9be5-dfa69aa172cc'
+    factories.JoinRecord(relationship=relationship, record_id=None, record_uuid=record_uuid,
+                         related_record_id=1, related_record_uuid=None)
+    for module, swagger_file in ((lm1, 'swagger_location.json'), (lm2, 'swagger_documents.json')):
+        with open(os.path.join(CURRENT_PATH, 'fixtures', swagger_file)) as r:
+            httpretty.register_uri(httpretty.GET, f'{module.endpoint}/docs/swagger.json', body=r.read(),
+                                   adding_headers={'Content-Type': 'application/json'})
+    httpretty.register_uri(httpretty.GET, f'{lm1.endpoint}/siteprofiles/{record_uuid}/',
+                           body=f'{{"uuid": "{record_uuid}"}}', adding_headers={'Content-Type': 'application/json'})
+    for document_id in (1, 2):
+        httpretty.register_uri(httpretty.GET, f'{lm2.endpoint}/documents/{document_id}/',
+                               body=f'{{"id": {document_id}}}', adding_headers={'Content-Type': 'application/json'})
+    url = f'/{lm1.endpoint_name}/siteprofiles/{record_uuid}/'
+
+    response = auth_api_client.get(url, {'join': 'true'})
+    assert [document['id'] for document in response.json()[relationship.key]] == [1]
+
+    # the joined response reflects the changed join records
+    factories.JoinRecord(relationship=relationship, record_id=None, record_uuid=record_uuid,
+                         related_record_id=2, related_record_uuid=None)
+    response = auth_api_client.get(url, {'join': 'true'})
+    assert sorted(document['id'] for document in response.json()[relationship.key]) == [1, 2]
@@ -124,3 +124,22 @@ class TestAllowLogicModuleGroup:
 
         result = permission_obj.has_permission(kwargs['request'], view)
         assert result
+
+    def test_has_permission_memoised_per_request(self, auth_api_client, org_admin, org, logic_module,
+                                                 django_assert_num_queries):
+        """
+        The permission is checked once per request and service without querying logic modules again
+        """
+        request = WSGIRequest(auth_api_client._base_environ(**auth_api_client._credentials))
+        request.user = org_admin
+        kwargs = {
+            'kwargs': {'service': logic_module.name},
+            'request': request
+        }
+        permission_obj = AllowLogicModuleGroup()
+        view = APIGatewayView(**kwargs)
+
+        assert permission_obj.has_permission(kwargs['request'], view)
+        with django_assert_num_queries(0):
+            assert permission_obj.has_permission(kwargs['request'], view)
+        assert request._logic_module_permissions == {(logic_module.name, request.META['REQUEST_METHOD']): True}
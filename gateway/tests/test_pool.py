@@ -0,0 +1,43 @@
+import asyncio
+
+import httpretty
+
+from gateway import pool
+
+
+def test_session_per_origin():
+    session = pool.get_session('http://documentservice:8080/documents/1/')
+    assert session is pool.get_session('http://documentservice:8080/docs/swagger.json')
+    assert session is not pool.get_session('http://locationservice:8080/siteprofiles/')
+
+
+@httpretty.activate
+def test_session_does_not_persist_cookies():
+    httpretty.register_uri(httpretty.GET, 'http://documentservice:8080/documents/',
+                           body='[]', adding_headers={'Set-Cookie': 'sessionid=secret; Path=/'})
+    session = pool.get_session('http://documentservice:8080/documents/')
+    session.get('http://documentservice:8080/documents/')
+    assert len(session.cookies) == 0
+
+
+def test_track_request_stats():
+    url = 'http://documentservice:8080/documents/'
+    with pool.track_request(url):
+        assert pool.get_stats()['http://documentservice:8080']['in_flight'] == 1
+    stats = pool.get_stats()['http://documentservice:8080']
+    assert stats['in_flight'] == 0
+    assert stats['requests'] >= 1
+
+
+def test_async_session_per_loop():
+
+    async def _get_sessions():
+        session = pool.get_async_session()
+        assert session is pool.get_async_session()
+        await pool.close_async_session()
+        assert session.closed
+        return session
+
+    session1 = asyncio.run(_get_sessions())
+    session2 = asyncio.run(_get_sessions())
+    assert session1 is not session2
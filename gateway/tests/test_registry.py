@@ -0,0 +1,39 @@
+import pytest
+
+from core.models import LogicModule
+from core.tests.fixtures import core_group, logic_module, org
+from gateway.registry import logic_module_registry
+
+
+@pytest.mark.django_db()
+class TestLogicModuleRegistry:
+
+    def test_loaded_once(self, logic_module, core_group, django_assert_num_queries):
+        logic_module.core_groups.add(core_group)
+
+        # logic modules and core groups are loaded together
+        with django_assert_num_queries(2):
+            assert logic_module_registry.get('documents') == logic_module
+            assert list(logic_module_registry.get('documents').core_groups.all()) == [core_group]
+            assert 'documents' in logic_module_registry
+
+        with django_assert_num_queries(0):
+            logic_module_registry.get('documents')
+            assert [module.endpoint_name for module in logic_module_registry.all()] == ['documents']
+
+    def test_does_not_exist(self, logic_module):
+        with pytest.raises(LogicModule.DoesNotExist):
+            logic_module_registry.get('test')
+
+    def test_refreshed_on_changes(self, logic_module, core_group):
+        assert not logic_module_registry.get('documents').core_groups.all()
+
+        logic_module.core_groups.add(core_group)
+        assert list(logic_module_registry.get('documents').core_groups.all()) == [core_group]
+
+        core_group.permissions = 0
+        core_group.save()
+        assert logic_module_registry.get('documents').core_groups.all()[0].permissions == 0
+
+        logic_module.delete()
+        assert 'documents' not in logic_module_registry
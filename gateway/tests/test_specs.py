@@ -0,0 +1,123 @@
+import os
+from unittest.mock import Mock
+
+import httpretty
+import pytest
+from bravado_core.spec import Spec
+
+from core.tests.fixtures import logic_module
+from gateway.request import BaseGatewayRequest
+from gateway.specs import LOCK_STRIPES, SwaggerSpecCache, get_spec, spec_cache
+from gateway.utils import get_swagger_url_by_logic_module
+
+
+CURRENT_PATH = os.path.dirname(os.path.abspath(__file__))
+
+
+def _register_swagger(url: str, **kwargs):
+    with open(os.path.join(CURRENT_PATH, 'fixtures/swagger_documents.json')) as r:
+        swagger_body = r.read()
+    httpretty.register_uri(httpretty.GET, url, body=swagger_body, **kwargs)
+
+
+class TestSwaggerSpecCache:
+
+    def test_lru_eviction(self):
+        cache = SwaggerSpecCache(ttl=60, max_size=2)
+        cache.set('http://a/docs/swagger.json', Mock(Spec))
+        cache.set('http://b/docs/swagger.json', Mock(Spec))
+        cache.get('http://a/docs/swagger.json')
+        cache.set('http://c/docs/swagger.json', Mock(Spec))
+
+        assert len(cache) == 2
+        assert 'http://a/docs/swagger.json' in cache
+        assert 'http://b/docs/swagger.json' not in cache
+
+    def test_keyed_by_config(self):
+        cache = SwaggerSpecCache(ttl=60, max_size=2)
+        spec = Mock(Spec)
+        cache.set('http://a/docs/swagger.json', spec, config={'validate_responses': False})
+
+        assert cache.get('http://a/docs/swagger.json', {'validate_responses': False}).spec is spec
+        assert cache.get('http://a/docs/swagger.json', {'validate_responses': True}) is None
+        assert 'http://a/docs/swagger.json' in cache
+
+        cache.invalidate('http://a/docs/swagger.json')
+        assert 'http://a/docs/swagger.json' not in cache
+
+    def test_locks_are_bounded(self):
+        cache = SwaggerSpecCache(ttl=60, max_size=2)
+        locks = {id(cache.lock(f'http://{i}/docs/swagger.json')) for i in range(100)}
+        assert len(locks) <= LOCK_STRIPES
+        assert cache.lock('http://a/docs/swagger.json') is cache.lock('http://a/docs/swagger.json')
+
+    def test_ttl(self):
+        cache = SwaggerSpecCache(ttl=0, max_size=2)
+        entry = cache.set('http://a/docs/swagger.json', Mock(Spec), etag='"abc"')
+        assert not entry.is_fresh
+        entry.refresh(60)
+        assert entry.is_fresh
+
+
+@pytest.mark.django_db()
+@httpretty.activate
+def test_spec_downloaded_once(logic_module):
+    schema_url = get_swagger_url_by_logic_module(logic_module)
+    _register_swagger(schema_url, adding_headers={'Content-Type': 'application/json'})
+
+    spec1 = get_spec(schema_url, BaseGatewayRequest.SWAGGER_CONFIG)
+    spec2 = get_spec(schema_url, BaseGatewayRequest.SWAGGER_CONFIG)
+
+    assert spec1 is spec2
+    assert len(httpretty.latest_requests()) == 1
+
+
+@pytest.mark.django_db()
+@httpretty.activate
+def test_stale_spec_revalidated_with_etag(logic_module, settings):
+    settings.GATEWAY_SPEC_CACHE_TTL = 0
+    schema_url = get_swagger_url_by_logic_module(logic_module)
+    _register_swagger(schema_url, adding_headers={'Content-Type': 'application/json', 'ETag': '"v1"'})
+
+    spec1 = get_spec(schema_url, BaseGatewayRequest.SWAGGER_CONFIG)
+
+    httpretty.register_uri(httpretty.GET, schema_url, status=304, body='')
+    spec2 = get_spec(schema_url, BaseGatewayRequest.SWAGGER_CONFIG)
+
+    assert spec1 is spec2
+    assert httpretty.last_request().headers['If-None-Match'] == '"v1"'
+
+
+@pytest.mark.django_db()
+@httpretty.activate
+def test_spec_invalidated_on_logic_module_save(logic_module):
+    schema_url = get_swagger_url_by_logic_module(logic_module)
+    _register_swagger(schema_url, adding_headers={'Content-Type': 'application/json'})
+
+    get_spec(schema_url, BaseGatewayRequest.SWAGGER_CONFIG)
+    assert schema_url in spec_cache
+
+    logic_module.docs_endpoint = 'api-docs'
+    logic_module.save()
+    assert schema_url not in spec_cache
+
+
+@pytest.mark.django_db()
+@httpretty.activate
+def test_spec_invalidated_on_logic_module_endpoint_change(logic_module):
+    schema_url = get_swagger_url_by_logic_module(logic_module)
+    _register_swagger(schema_url, adding_headers={'Content-Type': 'application/json'})
+    get_spec(schema_url, BaseGatewayRequest.SWAGGER_CONFIG)
+
+    logic_module.endpoint = 'http://moved.example.com'
+    new_schema_url = get_swagger_url_by_logic_module(logic_module)
+    _register_swagger(new_schema_url, adding_headers={'Content-Type': 'application/json'})
+    get_spec(new_schema_url, BaseGatewayRequest.SWAGGER_CONFIG)
+
+    logic_module.save()
+    assert schema_url not in spec_cache
+    assert new_schema_url not in spec_cache
+
+    get_spec(new_schema_url, BaseGatewayRequest.SWAGGER_CONFIG)
+    logic_module.delete()
+    assert new_schema_url not in spec_cache
@@ -7,14 +7,17 @@ import json
 from unittest.mock import Mock, patch
 import uuid
 
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 import pytest
 from rest_framework.test import APIRequestFactory, force_authenticate
 from rest_framework.exceptions import NotAuthenticated, PermissionDenied
 
 import factories
+from core.models import CoreUser, PERMISSIONS_ORG_ADMIN, PERMISSIONS_VIEW_ONLY
 from gateway.exceptions import GatewayError
-from gateway.utils import GatewayJSONEncoder, validate_object_access, get_swagger_url_by_logic_module, get_swagger_urls, get_swagger_from_url
+from gateway.utils import GatewayJSONEncoder, ObjectAccessValidator, validate_object_access, get_swagger_url_by_logic_module, get_swagger_urls, get_swagger_from_url
 from gateway.views import APIGatewayView
 
 
@@ -71,6 +74,44 @@ class UtilsValidateBuildlyObjectAccessTest(TestCase):
         ret = validate_object_access(request, core_user)
         self.assertIsNone(ret)
 
+    def test_validate_many_org_admin(self):
+        group_org_admin = factories.CoreGroup(name='Org Admin', is_org_level=True, permissions=PERMISSIONS_ORG_ADMIN,
+                                              organization=self.core_user.organization)
+        self.core_user.core_groups.add(group_org_admin)
+        request = self.get_mock_request('/', APIGatewayView, self.core_user)
+        wflvl1 = factories.WorkflowLevel1(organization=self.core_user.organization)
+        wflvl2s = factories.WorkflowLevel2.create_batch(3, workflowlevel1=wflvl1)
+
+        # the admin checks of the user and one query for all objects
+        with self.assertNumQueries(3):
+            ObjectAccessValidator(request).validate_many(wflvl2s)
+
+    def test_validate_many_group_read_permission(self):
+        wflvl1 = factories.WorkflowLevel1(organization=self.core_user.organization)
+        group = factories.CoreGroup(name='WF Reader', permissions=PERMISSIONS_VIEW_ONLY,
+                                    organization=self.core_user.organization)
+        group.workflowlevel1s.add(wflvl1)
+        self.core_user.core_groups.add(group)
+
+        # the number of queries doesn't depend on the number of objects
+        query_counts = []
+        for count in (2, 6):
+            request = self.get_mock_request('/', APIGatewayView, self.core_user)
+            request.user = CoreUser.objects.get(pk=self.core_user.pk)
+            wflvl2s = factories.WorkflowLevel2.create_batch(count, workflowlevel1=wflvl1)
+            with CaptureQueriesContext(connection) as queries:
+                ObjectAccessValidator(request).validate_many(wflvl2s)
+            query_counts.append(len(queries))
+        assert query_counts[0] == query_counts[1]
+
+    def test_validate_many_no_permission(self):
+        request = self.get_mock_request('/', APIGatewayView, self.core_user)
+        wflvl1 = factories.WorkflowLevel1()
+
+        error_message = 'You do not have permission to perform this action.'
+        with self.assertRaisesMessage(PermissionDenied, error_message):
+            ObjectAccessValidator(request).validate_many([wflvl1])
+
 
 def test_json_dump():
     obj = {
@@ -3,9 +3,11 @@ import json
 
 import pytest
 import httpretty
+from django.core.files.uploadedfile import SimpleUploadedFile
 
 import factories
 from core.tests.fixtures import auth_api_client, logic_module
+from gateway.utils import get_etag
 from .fixtures import datamesh
 
 
@@ -44,6 +46,149 @@ def test_make_service_request_data_and_raw(auth_api_client, logic_module, conten
     assert response.get('Content-Type') == content_type
 
 
+@pytest.mark.django_db()
+@httpretty.activate
+def test_make_service_request_streaming(auth_api_client, logic_module, settings):
+    settings.GATEWAY_STREAMING_THRESHOLD = 10
+    settings.GATEWAY_STREAMING_CHUNK_SIZE = 4
+    url = f'/{logic_module.endpoint_name}/thumbnail/1/'
+    content = b'IT IS A LARGE FILE'
+
+    # mock requests
+    with open(os.path.join(CURRENT_PATH, 'fixtures/swagger_documents.json')) as r:
+        swagger_body = r.read()
+    httpretty.register_uri(
+        httpretty.GET,
+        f'{logic_module.endpoint}/docs/swagger.json',
+        body=swagger_body,
+        adding_headers={'Content-Type': 'application/json'}
+    )
+    httpretty.register_uri(
+        httpretty.GET,
+        f'{logic_module.endpoint}/thumbnail/1/',
+        body=content,
+        adding_headers={'Content-Type': 'application/octet-stream',
+                        'Content-Disposition': 'attachment; filename="file.bin"'}
+    )
+
+    # make api request
+    response = auth_api_client.get(url)
+
+    assert response.status_code == 200
+    assert response.streaming
+    assert b''.join(response.streaming_content) == content
+    assert response.get('Content-Type') == 'application/octet-stream'
+    assert response.get('Content-Disposition') == 'attachment; filename="file.bin"'
+    assert response.get('Content-Length') == str(len(content))
+
+
+@pytest.mark.django_db()
+@httpretty.activate
+def test_make_service_request_multipart_upload_streamed(auth_api_client, logic_module):
+    url = f'/{logic_module.endpoint_name}/documents/'
+
+    # mock requests
+    with open(os.path.join(CURRENT_PATH, 'fixtures/swagger_documents.json')) as r:
+        swagger_body = r.read()
+    httpretty.register_uri(
+        httpretty.GET,
+        f'{logic_module.endpoint}/docs/swagger.json',
+        body=swagger_body,
+        adding_headers={'Content-Type': 'application/json'}
+    )
+    httpretty.register_uri(
+        httpretty.POST,
+        f'{logic_module.endpoint}/documents/',
+        status=201,
+        body='{"id": 1}',
+        adding_headers={'Content-Type': 'application/json'}
+    )
+
+    # make api request with two files in one field and another file field
+    response = auth_api_client.post(url, {
+        'name': 'test',
+        'file': [SimpleUploadedFile('a.txt', b'FILE A'), SimpleUploadedFile('b.txt', b'FILE B')],
+        'thumbnail': SimpleUploadedFile('c.png', b'FILE C', content_type='image/png'),
+    }, format='multipart')
+
+    assert response.status_code == 201
+    # the incoming multipart body is forwarded as it is
+    upstream_request = httpretty.last_request()
+    assert upstream_request.headers['Content-Type'].startswith('multipart/form-data; boundary=')
+    assert int(upstream_request.headers['Content-Length']) == len(upstream_request.body)
+    for part in (b'name="name"', b'test', b'filename="a.txt"', b'FILE A', b'filename="b.txt"', b'FILE B',
+                 b'name="thumbnail"; filename="c.png"', b'FILE C'):
+        assert part in upstream_request.body
+
+
+@pytest.mark.django_db()
+@httpretty.activate
+def test_make_service_request_conditional_get(auth_api_client, logic_module):
+    url = f'/{logic_module.endpoint_name}/thumbnail/1/'
+
+    # mock requests
+    with open(os.path.join(CURRENT_PATH, 'fixtures/swagger_documents.json')) as r:
+        swagger_body = r.read()
+    httpretty.register_uri(
+        httpretty.GET,
+        f'{logic_module.endpoint}/docs/swagger.json',
+        body=swagger_body,
+        adding_headers={'Content-Type': 'application/json'}
+    )
+    httpretty.register_uri(
+        httpretty.GET,
+        f'{logic_module.endpoint}/thumbnail/1/',
+        body='{"details": "IT IS A TEST"}',
+        adding_headers={'Content-Type': 'application/json', 'ETag': '"v1"'}
+    )
+
+    # the ETag of the service is relayed
+    response = auth_api_client.get(url)
+    assert response.status_code == 200
+    assert response.get('ETag') == '"v1"'
+
+    # the validator of the client is forwarded to the service and the unchanged content isn't sent again
+    response = auth_api_client.get(url, HTTP_IF_NONE_MATCH='"v1"')
+    assert response.status_code == 304
+    assert response.content == b''
+    assert response.get('ETag') == '"v1"'
+    assert httpretty.last_request().headers['If-None-Match'] == '"v1"'
+
+
+@pytest.mark.django_db()
+@httpretty.activate
+def test_make_service_request_etag_of_content(auth_api_client, logic_module):
+    url = f'/{logic_module.endpoint_name}/thumbnail/1/'
+
+    # mock requests
+    with open(os.path.join(CURRENT_PATH, 'fixtures/swagger_documents.json')) as r:
+        swagger_body = r.read()
+    httpretty.register_uri(
+        httpretty.GET,
+        f'{logic_module.endpoint}/docs/swagger.json',
+        body=swagger_body,
+        adding_headers={'Content-Type': 'application/json'}
+    )
+    httpretty.register_uri(
+        httpretty.GET,
+        f'{logic_module.endpoint}/thumbnail/1/',
+        body='{"details": "IT IS A TEST"}',
+        adding_headers={'Content-Type': 'application/json'}
+    )
+
+    # a service without ETag gets one computed from the content
+    response = auth_api_client.get(url)
+    assert response.status_code == 200
+    etag = response.get('ETag')
+    assert etag == get_etag(response.content)
+
+    response = auth_api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 304
+
+    response = auth_api_client.get(url, HTTP_IF_NONE_MATCH='"outdated"')
+    assert response.status_code == 200
+
+
 @pytest.mark.django_db()
 @httpretty.activate
 def test_make_service_request_to_unexisting_list_endpoint(auth_api_client, logic_module):
@@ -146,12 +291,71 @@ def test_make_service_request_with_datamesh_detailed(auth_api_client, datamesh):
     assert response.status_code == 200
     assert response.has_header('Content-Type')
     assert response.get('Content-Type') == 'application/json'
+    # the joined content gets its own ETag
+    assert response.get('ETag') == get_etag(response.content)
     data = response.json()
     assert relationship.key in data
     assert len(data[relationship.key]) == 1
     assert data[relationship.key][0]['id'] == 1
 
 
+@pytest.mark.django_db()
+@httpretty.activate
+def test_make_service_request_with_datamesh_replaces_service_etag(auth_api_client, datamesh):
+    lm1, lm2, relationship = datamesh
+    factories.JoinRecord(relationship=relationship,
+                         record_id=None, record_uuid='19a7f600-74a0-4123-9be5-dfa69aa172cc',
+                         related_record_id=1, related_record_uuid=None)
+
+    url = f'/{lm1.endpoint_name}/siteprofiles/19a7f600-74a0-4123-9be5-dfa69aa172cc/'
+
+    # mock requests
+    with open(os.path.join(CURRENT_PATH, 'fixtures/swagger_location.json')) as r:
+        swagger_location_body = r.read()
+    with open(os.path.join(CURRENT_PATH, 'fixtures/swagger_documents.json')) as r:
+        swagger_documents_body = r.read()
+    with open(os.path.join(CURRENT_PATH, 'fixtures/data_detail_siteprofile.json')) as r:
+        data_location_body = r.read()
+    with open(os.path.join(CURRENT_PATH, 'fixtures/data_detail_document.json')) as r:
+        data_documents_body = r.read()
+    httpretty.register_uri(
+        httpretty.GET,
+        f'{lm1.endpoint}/docs/swagger.json',
+        body=swagger_location_body,
+        adding_headers={'Content-Type': 'application/json'}
+    )
+    httpretty.register_uri(
+        httpretty.GET,
+        f'{lm2.endpoint}/docs/swagger.json',
+        body=swagger_documents_body,
+        adding_headers={'Content-Type': 'application/json'}
+    )
+    httpretty.register_uri(
+        httpretty.GET,
+        f'{lm1.endpoint}/siteprofiles/19a7f600-74a0-4123-9be5-dfa69aa172cc/',
+        body=data_location_body,
+        adding_headers={'Content-Type': 'application/json', 'ETag': '"v1"',
+                        'Last-Modified': 'Wed, 21 Oct 2015 07:28:00 GMT'}
+    )
+    httpretty.register_uri(
+        httpretty.GET,
+        f'{lm2.endpoint}/documents/1/',
+        body=data_documents_body,
+        adding_headers={'Content-Type': 'application/json'}
+    )
+
+    # the ETag of the service doesn't describe the joined content
+    response = auth_api_client.get(url, {'join': 'true'})
+    assert response.status_code == 200
+    assert response.get('ETag') == get_etag(response.content)
+    assert not response.has_header('Last-Modified')
+    assert relationship.key in response.json()
+
+    # the validator of the service isn't valid for the joined content
+    response = auth_api_client.get(url, {'join': 'true'}, HTTP_IF_NONE_MATCH='"v1"')
+    assert response.status_code == 200
+
+
 @pytest.mark.django_db()
 @httpretty.activate
 def test_make_service_request_with_reverse_datamesh_detailed(auth_api_client, datamesh):
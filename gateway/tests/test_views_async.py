@@ -19,7 +19,7 @@ CURRENT_PATH = os.path.dirname(os.path.abspath(__file__))
     (None, 'application/octet-stream'), ]
 )
 @pytest.mark.django_db()
-@patch('gateway.request.aiohttp.ClientSession')
+@patch('gateway.clients.aiohttp.ClientSession')
 def test_make_service_request_data_and_raw(client_session_mock, auth_api_client, logic_module, content, content_type,
                                            event_loop):
     url = f'/async/{logic_module.endpoint_name}/thumbnail/1/'
@@ -49,7 +49,7 @@ def test_make_service_request_data_and_raw(client_session_mock, auth_api_client,
 
 
 @pytest.mark.django_db()
-@patch('gateway.request.aiohttp.ClientSession')
+@patch('gateway.clients.aiohttp.ClientSession')
 def test_make_service_request_to_unexisting_list_endpoint(client_session_mock, auth_api_client, logic_module,
                                                           event_loop):
 
@@ -75,7 +75,7 @@ def test_make_service_request_to_unexisting_list_endpoint(client_session_mock, a
 
 
 @pytest.mark.django_db()
-@patch('gateway.request.aiohttp.ClientSession')
+@patch('gateway.clients.aiohttp.ClientSession')
 def test_make_service_request_to_unexisting_detail_endpoint(client_session_mock, auth_api_client, logic_module,
                                                             event_loop):
 
@@ -101,7 +101,7 @@ def test_make_service_request_to_unexisting_detail_endpoint(client_session_mock,
 
 
 @pytest.mark.django_db()
-@patch('gateway.request.aiohttp.ClientSession')
+@patch('gateway.clients.aiohttp.ClientSession')
 def test_make_service_request_with_datamesh_detailed(client_session_mock, auth_api_client, datamesh, event_loop):
     lm1, lm2, relationship = datamesh
     factories.JoinRecord(relationship=relationship,
@@ -145,7 +145,7 @@ def test_make_service_request_with_datamesh_detailed(client_session_mock, auth_a
 
 
 @pytest.mark.django_db()
-@patch('gateway.request.aiohttp.ClientSession')
+@patch('gateway.clients.aiohttp.ClientSession')
 def test_make_service_request_with_datamesh_list(client_session_mock, auth_api_client, datamesh, event_loop):
     lm1, lm2, relationship = datamesh
     factories.JoinRecord(relationship=relationship,
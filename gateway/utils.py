@@ -1,5 +1,7 @@
+import hashlib
 import re
-from typing import Dict
+from collections import defaultdict
+from typing import Dict, Iterable, Union
 from uuid import UUID
 
 import datetime
@@ -14,6 +16,7 @@ from workflow import views as wfv
 from workflow import models as wfm
 
 from . import exceptions
+from .registry import logic_module_registry
 from core.models import CoreUser, LogicModule, Organization
 from core.views import CoreUserViewSet, OrganizationViewSet
 
@@ -21,6 +24,8 @@ from core.views import CoreUserViewSet, OrganizationViewSet
 SWAGGER_LOOKUP_FIELD = 'swagger'
 SWAGGER_LOOKUP_FORMAT = 'json'
 SWAGGER_LOOKUP_PATH = 'docs'
+# view action the access to objects is validated for
+OBJECT_ACCESS_ACTION = 'retrieve'
 MODEL_VIEWSETS_DICT = {
     wfm.WorkflowTeam: wfv.WorkflowTeamViewSet,
     wfm.WorkflowLevel2: wfv.WorkflowLevel2ViewSet,
@@ -50,7 +55,7 @@ def get_swagger_urls() -> Dict[str, str]:
     :return: dict
              Key-value pair with service name and OpenAPI schema URL of it
     """
-    modules = LogicModule.objects.all()
+    modules = logic_module_registry.all()
 
     module_urls = dict()
     for module in modules:
@@ -94,6 +99,8 @@ def validate_object_access(request: Request, obj):
             msg=f'{model} not defined for object access lookup.')
     else:
         viewset.request = request
+        # objects are validated for being read (p.e. nested by the Data Mesh)
+        viewset.action = OBJECT_ACCESS_ACTION
         viewset.check_object_permissions(request, obj)
 
 
@@ -107,6 +114,26 @@ class ObjectAccessValidator:
     def validate(self, obj):
         return validate_object_access(self._request, obj)
 
+    def validate_many(self, objs: Iterable[models.Model]) -> None:
+        """
+        Validate the access to many objects.
+        Objects of models with a permission-aware queryset (`visible_to`) are checked with one query per model,
+        only the objects that aren't visible to the user are validated one by one to raise the right exception.
+        """
+        objs_by_model = defaultdict(list)
+        for obj in objs:
+            objs_by_model[obj.__class__].append(obj)
+
+        for model, model_objs in objs_by_model.items():
+            visible_pks = set()
+            visible_to = getattr(model._default_manager, 'visible_to', None)
+            if visible_to is not None:
+                visible_pks = set(visible_to(self._request.user, action=OBJECT_ACCESS_ACTION)
+                                  .filter(pk__in=[obj.pk for obj in model_objs]).values_list('pk', flat=True))
+            for obj in model_objs:
+                if obj.pk not in visible_pks:
+                    validate_object_access(self._request, obj)
+
 
 class GatewayJSONEncoder(json.JSONEncoder):
     """
@@ -130,6 +157,13 @@ class GatewayJSONEncoder(json.JSONEncoder):
         return json.JSONEncoder.default(self, obj)
 
 
+def get_etag(content: Union[str, bytes]) -> str:
+    """ Strong ETag of the response content """
+    if isinstance(content, str):
+        content = content.encode('utf-8')
+    return f'"{hashlib.sha256(content).hexdigest()}"'
+
+
 def valid_uuid4(uuid_string):
     uuid4hex = re.compile('^[a-f0-9]{8}-?[a-f0-9]{4}-?4[a-f0-9]{3}-?[89ab][a-f0-9]{3}-?[a-f0-9]{12}\Z',  # noqa
                           re.I)
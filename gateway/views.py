@@ -1,17 +1,22 @@
 import logging
 
-from django.http import HttpResponse
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import parse_http_date_safe
 from rest_framework import views
 from rest_framework.request import Request
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAuthenticated, SAFE_METHODS
 
+from gateway import cache as gateway_cache
 from gateway import exceptions
 from gateway.permissions import AllowLogicModuleGroup
-from gateway.request import GatewayRequest, AsyncGatewayRequest
+from gateway.request import GatewayRequest, AsyncGatewayRequest, GatewayResponse
 
 
 logger = logging.getLogger(__name__)
 
+FORWARDED_HEADERS = ('Content-Disposition', 'Content-Language', 'ETag', 'Last-Modified', 'Cache-Control')
+
 
 class APIGatewayView(views.APIView):
     """
@@ -55,12 +60,62 @@ class APIGatewayView(views.APIView):
         except exceptions.RequestValidationError as e:
             return HttpResponse(content=e.content, status=e.status, content_type=e.content_type)
 
-        gw_request = self.gateway_request_class(request, **kwargs)
-        gw_response = gw_request.perform()
-
-        return HttpResponse(content=gw_response.content,
-                            status=gw_response.status_code,
-                            content_type=gw_response.headers.get('Content-Type'))
+        cache_key = gateway_cache.get_cache_key(request, **kwargs)
+        gw_response = gateway_cache.get(cache_key) if cache_key else None
+        if gw_response is None:
+            gw_request = self.gateway_request_class(request, **kwargs)
+            gw_response = gw_request.perform()
+            if cache_key:
+                gateway_cache.set(cache_key, gw_response)
+            elif request.method not in SAFE_METHODS:
+                gateway_cache.invalidate(kwargs['service'], kwargs['model'])
+
+        if gw_response.is_streaming:
+            response = self._get_streaming_response(gw_response)
+        else:
+            response = HttpResponse(content=gw_response.content,
+                                    status=gw_response.status_code,
+                                    content_type=gw_response.headers.get('Content-Type'))
+            self._forward_headers(gw_response, response)
+        return self._get_conditional_response(request, gw_response, response)
+
+    def _forward_headers(self, gw_response: GatewayResponse, response: HttpResponse) -> None:
+        for header in FORWARDED_HEADERS:
+            if header in gw_response.headers:
+                response[header] = gw_response.headers[header]
+
+    def _get_conditional_response(self, request: Request, gw_response: GatewayResponse,
+                                  response: HttpResponse) -> HttpResponse:
+        """
+        Respond with 304 if the client already has the current version of the content (If-None-Match/If-Modified-Since)
+        """
+        if request.method not in ('GET', 'HEAD'):
+            # preconditions of write requests are evaluated by the service
+            return response
+        last_modified = gw_response.headers.get('Last-Modified')
+        conditional_response = get_conditional_response(
+            request._request,
+            etag=gw_response.headers.get('ETag'),
+            last_modified=parse_http_date_safe(last_modified) if last_modified else None,
+            response=response,
+        )
+        if conditional_response is not response:
+            # the body isn't sent, release the connection to the service of a streamed response
+            response.close()
+        return conditional_response
+
+    def _get_streaming_response(self, gw_response: GatewayResponse) -> StreamingHttpResponse:
+        """
+        Relay the body of a large service response chunk by chunk together with its content headers
+        """
+        response = StreamingHttpResponse(streaming_content=gw_response.content,
+                                         status=gw_response.status_code,
+                                         content_type=gw_response.headers.get('Content-Type'))
+        self._forward_headers(gw_response, response)
+        # the body is decoded by the HTTP client, so the length is only known for not encoded bodies
+        if 'Content-Length' in gw_response.headers and 'Content-Encoding' not in gw_response.headers:
+            response['Content-Length'] = gw_response.headers['Content-Length']
+        return response
 
     def _validate_incoming_request(self, request: Request, **kwargs: dict) -> None:
         """
@@ -0,0 +1,58 @@
+from typing import Optional
+
+from django.db.models import F, Q, QuerySet
+
+from core.models import CoreGroup, CoreUser
+from core.permissions import PERMISSION_ALL, PERMISSION_BITS, get_effective_permissions
+
+
+class WorkflowLevelQuerySet(QuerySet):
+    """
+    QuerySet of workflow levels that can filter the objects a user has object permissions on.
+    `workflowlevel1_field` is the path from the model to its WorkflowLevel1 (empty for WorkflowLevel1 itself).
+    """
+    workflowlevel1_field = ''
+
+    def visible_to(self, user: CoreUser, action: Optional[str]) -> QuerySet:
+        """
+        Filter the objects that pass `CoreGroupsPermissions.has_object_permission` and
+        `IsOrgMember.has_object_permission` for the view action with one query (no action: only admins pass).
+        """
+        if user.is_anonymous or not user.is_active:
+            return self.none()
+
+        if user.is_global_admin:
+            return self.all()
+
+        if user.organization_id is None:
+            return self.none()
+
+        prefix = f'{self.workflowlevel1_field}__' if self.workflowlevel1_field else ''
+        queryset = self.filter(**{f'{prefix}organization_id': user.organization_id})
+
+        if user.is_org_admin:
+            return queryset
+
+        bit = PERMISSION_BITS.get(action)
+        if bit is None:
+            return self.none()
+
+        if not self.workflowlevel1_field:
+            # Permissions on WorkflowLevel1 itself are defined by Org-level permissions
+            org_permissions = get_effective_permissions(user).org_permissions
+            return queryset if org_permissions & bit else self.none()
+
+        # the user's groups that grant the action on the WorkflowLevel1s they are assigned to
+        groups = user.core_groups.annotate(action_permission=F('permissions').bitand(bit))\
+            .filter(Q(action_permission__gt=0) | Q(permissions__gt=PERMISSION_ALL))
+        workflowlevel1s = CoreGroup.workflowlevel1s.through.objects.filter(coregroup__in=groups)\
+            .values('workflowlevel1_id')
+        return queryset.filter(**{f'{self.workflowlevel1_field}__in': workflowlevel1s})
+
+
+class WorkflowLevel1QuerySet(WorkflowLevelQuerySet):
+    workflowlevel1_field = ''
+
+
+class WorkflowLevel2QuerySet(WorkflowLevelQuerySet):
+    workflowlevel1_field = 'workflowlevel1'
@@ -11,6 +11,7 @@ except ImportError:
     from datetime import datetime as timezone
 
 from core.models import CoreUser, CoreGroup, Organization, ROLE_ORGANIZATION_ADMIN
+from .managers import WorkflowLevel1QuerySet, WorkflowLevel2QuerySet
 
 DEFAULT_PROGRAM_NAME = 'Default program'
 
@@ -75,6 +76,8 @@ class WorkflowLevel1(models.Model):
     sort = models.IntegerField(default=0)  # sort array
     core_groups = models.ManyToManyField(CoreGroup, verbose_name='Core groups', blank=True, related_name='workflowlevel1s', related_query_name='workflowlevel1s')
 
+    objects = WorkflowLevel1QuerySet.as_manager()
+
     class Meta:
         ordering = ('name',)
         verbose_name = "Workflow Level 1"
@@ -116,6 +119,8 @@ class WorkflowLevel2(models.Model):
     type = models.ForeignKey(WorkflowLevelType, null=True, blank=True, on_delete=models.SET_NULL, related_name='workflowlevel2s')
     status = models.ForeignKey(WorkflowLevelStatus, null=True, blank=True, on_delete=models.SET_NULL, related_name='workflowlevel2s')
 
+    objects = WorkflowLevel2QuerySet.as_manager()
+
     class Meta:
         ordering = ('name',)
         verbose_name = "Workflow Level 2"
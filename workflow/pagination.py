@@ -1,4 +1,18 @@
+import datetime
+import json
+import uuid
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections import OrderedDict
+from decimal import Decimal
+from typing import Optional, Tuple
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError as DjangoValidationError
+from django.db import connections
+from django.db.models import F, Q
+from rest_framework.exceptions import NotFound
 from rest_framework.pagination import CursorPagination, PageNumberPagination, LimitOffsetPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 
 
 class StandardResultsSetPagination(PageNumberPagination):
@@ -22,3 +36,186 @@ class DefaultCursorPagination(CursorPagination):
 class DefaultLimitOffsetPagination(LimitOffsetPagination):
     default_limit = 50
     max_limit = 500
+
+
+def _encode_value(value):
+    # the values are compared with the full precision, p.e. the microseconds of a datetime
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, (uuid.UUID, Decimal)):
+        return str(value)
+    raise TypeError(f'{type(value).__name__} is not JSON serializable')
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Keyset (seek) pagination on the ordering of the view with the pk as unique tiebreaker: a page is filtered to the
+    objects after the last object of the previous page instead of skipping an offset, so deep pages are as fast as the
+    first one and no COUNT query is needed. The position is passed in an opaque cursor. A count (exact up to
+    `max_count`, approximated above) is added with `count=true`.
+    Requests without a cursor and page size are paginated by `fallback_class` (not paginated if it's None).
+    """
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+    count_query_param = 'count'
+    max_count = 10000
+    template = None
+    fallback_class = None
+
+    def is_requested(self, request) -> bool:
+        return self.cursor_query_param in request.query_params or self.page_size_query_param in request.query_params
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.fallback = None
+        if not self.is_requested(request):
+            if self.fallback_class is None:
+                return None
+            self.fallback = self.fallback_class()
+            return self.fallback.paginate_queryset(queryset, request, view)
+
+        self.page_size = self.get_page_size(request)
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        position, reverse = self.decode_cursor(request) or (None, False)
+
+        count = request.query_params.get(self.count_query_param)
+        self.count = self.get_count(queryset) if count and (count.lower() == 'true' or count == '1') else None
+
+        annotations = {f'keyset_position_{i}': F(field) for i, (field, _) in enumerate(self.ordering)}
+        queryset = queryset.annotate(**annotations).order_by(*(
+            f'-{field}' if descending != reverse else field for field, descending in self.ordering))
+        if position is not None:
+            if len(position) != len(self.ordering):
+                raise NotFound(self.invalid_cursor_message)
+            try:
+                # the values of a tampered cursor may not be valid for the fields
+                queryset = queryset.filter(self._get_seek_filter(position, reverse))
+                results = list(queryset[:self.page_size + 1])
+            except (TypeError, ValueError, DjangoValidationError):
+                raise NotFound(self.invalid_cursor_message)
+        else:
+            results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        self.page = results[:self.page_size]
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+        return self.page
+
+    def get_ordering(self, request, queryset, view):
+        """ Get the ordering of the (filtered) queryset as (field, descending) pairs, ending with the pk """
+        ordering = queryset.query.order_by or queryset.model._meta.ordering
+        model = queryset.model
+        fields = []
+        for field in ordering:
+            if not isinstance(field, str) or field == '?':
+                continue
+            descending = field.startswith('-')
+            field = field.lstrip('-')
+            if field == model._meta.pk.name:
+                field = 'pk'
+            elif field != 'pk' and self._is_relation(model, field):
+                # ordering by a relation means the ordering of the related model, the pk is used as key instead
+                field = f'{field}__pk'
+            fields.append((field, descending))
+            if field == 'pk':
+                return fields
+        return fields + [('pk', False)]
+
+    def _is_relation(self, model, path: str) -> bool:
+        for attr in path.split('__'):
+            try:
+                field = model._meta.get_field(attr)
+            except FieldDoesNotExist:
+                return False
+            if not field.is_relation:
+                return False
+            model = field.related_model
+        return True
+
+    def _get_seek_filter(self, position: list, reverse: bool) -> Q:
+        """
+        Get the filter of the objects after the position in the ordering. PostgreSQL orders NULL values last in an
+        ascending and first in a descending ordering.
+        """
+        seek_filter, equal = Q(pk__in=[]), Q()
+        for (field, descending), value in zip(self.ordering, position):
+            if value is None:
+                after = Q(**{f'{field}__isnull': False}) if descending != reverse else None
+                equal_value = Q(**{f'{field}__isnull': True})
+            else:
+                after = Q(**{f'{field}__lt': value}) if descending != reverse \
+                    else Q(**{f'{field}__gt': value}) | Q(**{f'{field}__isnull': True})
+                equal_value = Q(**{field: value})
+            if after is not None:
+                seek_filter |= equal & after
+            equal &= equal_value
+        return seek_filter
+
+    def get_count(self, queryset) -> Tuple[int, bool]:
+        """ Get the number of objects and if it's approximated """
+        count = queryset.order_by()[:self.max_count + 1].count()
+        if count <= self.max_count:
+            return count, False
+        if not queryset.query.where:
+            # the estimated number of rows of the table
+            with connections[queryset.db].cursor() as cursor:
+                cursor.execute('SELECT reltuples FROM pg_class WHERE oid = %s::regclass',
+                               [queryset.model._meta.db_table])
+                row = cursor.fetchone()
+            if row and row[0] > self.max_count:
+                return int(row[0]), True
+        return self.max_count, True
+
+    def decode_cursor(self, request) -> Optional[Tuple[list, bool]]:
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            cursor = json.loads(urlsafe_b64decode(encoded.encode('ascii')))
+            return list(cursor['p']), bool(cursor.get('r'))
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, position: list, reverse: bool) -> str:
+        cursor = {'p': position, 'r': 1} if reverse else {'p': position}
+        encoded = urlsafe_b64encode(json.dumps(cursor, default=_encode_value).encode('ascii')).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def _get_position(self, instance) -> list:
+        return [getattr(instance, f'keyset_position_{i}') for i in range(len(self.ordering))]
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self._get_position(self.page[-1]), False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self._get_position(self.page[0]), True)
+
+    def get_paginated_response(self, data):
+        if self.fallback is not None:
+            return self.fallback.get_paginated_response(data)
+        response = OrderedDict()
+        if self.count is not None:
+            response['count'], response['count_is_approximate'] = self.count
+        response['next'] = self.get_next_link()
+        response['previous'] = self.get_previous_link()
+        response['results'] = data
+        return Response(response)
+
+    def get_schema_fields(self, view):
+        fields = super().get_schema_fields(view)
+        if self.fallback_class is not None:
+            fields += self.fallback_class().get_schema_fields(view)
+        return fields
+
+
+class KeysetLimitOffsetPagination(KeysetPagination):
+    """ Keyset pagination if requested with a cursor or page size, limit offset pagination otherwise """
+    fallback_class = DefaultLimitOffsetPagination
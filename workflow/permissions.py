@@ -1,12 +1,11 @@
 import logging
-from collections import defaultdict
 
 from rest_framework import permissions
 from rest_framework.relations import ManyRelatedField
 from django.http import QueryDict
 
-from core.models import PERMISSIONS_VIEW_ONLY
-from core.permissions import merge_permissions, has_permission
+from core.models import PERMISSIONS_NO_ACCESS, PERMISSIONS_VIEW_ONLY
+from core.permissions import get_effective_permissions, has_permission
 from workflow.models import WorkflowLevel1, WorkflowLevel2
 
 
@@ -56,30 +55,11 @@ class CoreGroupsPermissions(permissions.BasePermission):
         if request.user.is_global_admin:
             return True
 
-        # TODO: check if we can optimize following query using 'through' M2M Models
-        user_groups = request.user.core_groups.prefetch_related('workflowlevel1s', 'workflowlevel2s')
-
-        # sort up permissions into more convenient way (default is read-only '0100')
-        viewonly_display_permissions = '{0:04b}'.format(PERMISSIONS_VIEW_ONLY)
-        global_permissions, org_permissions = viewonly_display_permissions, viewonly_display_permissions
-        wl1_permissions = defaultdict(lambda: viewonly_display_permissions)
-        wl2_permissions = defaultdict(lambda: viewonly_display_permissions)
-        for group in user_groups:
-            if group.is_global:
-                global_permissions = merge_permissions(global_permissions, group.display_permissions)
-            elif group.is_org_level:
-                org_permissions = merge_permissions(org_permissions, group.display_permissions)
-            else:
-                for wl1 in group.workflowlevel1s.all():
-                    wl1_permissions[wl1.pk] = merge_permissions(wl1_permissions[wl1.pk], group.display_permissions)
-                for wl2 in group.workflowlevel2s.all():
-                    wl2_permissions[wl2.pk] = merge_permissions(wl2_permissions[wl2.pk], group.display_permissions)
+        # permissions of the user's groups are compiled once per request (default is read-only '0100')
+        effective_permissions = get_effective_permissions(request.user)
 
         action = view.action
-        if has_permission(global_permissions, action):
-            return True
-
-        if has_permission(org_permissions, action):
+        if effective_permissions.has_permission(action, default=PERMISSIONS_VIEW_ONLY):
             return True
 
         if action in 'create':
@@ -98,7 +78,7 @@ class CoreGroupsPermissions(permissions.BasePermission):
                     wflvl1 = [wflvl1]
 
                 for item in wflvl1:
-                    if has_permission(wl1_permissions[item.pk], action):
+                    if effective_permissions.has_wl1_permission(item.pk, action, default=PERMISSIONS_VIEW_ONLY):
                         return True
 
                 # TODO: Check WorkflowLevel2 permissions
@@ -143,17 +123,17 @@ class CoreGroupsPermissions(permissions.BasePermission):
         if request.user.is_org_admin:
             return True
 
+        effective_permissions = get_effective_permissions(request.user)
         if model_cls is WorkflowLevel1:
             # Permissions on WorkflowLevel1 itself are defined by Org-level permissions
-            groups = request.user.core_groups.filter(is_org_level=True)
+            permissions_ = effective_permissions.org_permissions
         elif hasattr(obj, 'workflowlevel1'):
-            groups = request.user.core_groups.all().intersection(obj.workflowlevel1.core_groups.all())
+            wl1_pk = getattr(obj, 'workflowlevel1_id', None) or obj.workflowlevel1.pk
+            permissions_ = effective_permissions.wl1_permissions.get(wl1_pk, PERMISSIONS_NO_ACCESS)
         else:
             return True
 
         if hasattr(view, 'action'):
-            for group in groups:
-                if has_permission(group.display_permissions, view.action):
-                    return True
+            return has_permission(permissions_, view.action)
 
         return False
@@ -0,0 +1,52 @@
+import pytest
+
+import factories
+from core.models import PERMISSIONS_ORG_ADMIN, PERMISSIONS_VIEW_ONLY, PERMISSIONS_WORKFLOW_TEAM
+from workflow.models import WorkflowLevel1, WorkflowLevel2
+
+
+@pytest.mark.django_db()
+class TestVisibleTo:
+
+    @pytest.fixture(autouse=True)
+    def workflow_levels(self, db):
+        self.org = factories.Organization(name='Test Org')
+        self.user = factories.CoreUser(organization=self.org)
+        self.wfl1 = factories.WorkflowLevel1(organization=self.org)
+        self.wfl2 = factories.WorkflowLevel2(workflowlevel1=self.wfl1)
+        other_wfl1 = factories.WorkflowLevel1(organization=self.org)
+        self.other_wfl2 = factories.WorkflowLevel2(workflowlevel1=other_wfl1)
+        factories.WorkflowLevel2(workflowlevel1=factories.WorkflowLevel1(organization=factories.Organization()))
+
+    def test_superuser(self):
+        superuser = factories.CoreUser(is_superuser=True)
+        assert WorkflowLevel2.objects.visible_to(superuser, 'retrieve').count() == 3
+
+    def test_org_admin(self):
+        group = factories.CoreGroup(organization=self.org, is_org_level=True, permissions=PERMISSIONS_ORG_ADMIN)
+        self.user.core_groups.add(group)
+        assert set(WorkflowLevel2.objects.visible_to(self.user, 'destroy')) == {self.wfl2, self.other_wfl2}
+
+    def test_workflowlevel1_groups(self, django_assert_num_queries):
+        group = factories.CoreGroup(organization=self.org, permissions=PERMISSIONS_WORKFLOW_TEAM)
+        group.workflowlevel1s.add(self.wfl1)
+        self.user.core_groups.add(group)
+
+        user = type(self.user).objects.get(pk=self.user.pk)
+        visible_to = WorkflowLevel2.objects.visible_to(user, 'update')
+        # admin checks of the user are done before, the permission rules are part of the query
+        with django_assert_num_queries(1):
+            assert list(visible_to) == [self.wfl2]
+        assert not WorkflowLevel2.objects.visible_to(user, 'destroy').exists()
+        assert not WorkflowLevel2.objects.visible_to(user, None).exists()
+
+    def test_workflowlevel1_org_level_permissions(self):
+        group = factories.CoreGroup(organization=self.org, is_org_level=True, permissions=PERMISSIONS_VIEW_ONLY)
+        self.user.core_groups.add(group)
+
+        assert WorkflowLevel1.objects.visible_to(self.user, 'retrieve').count() == 2
+        assert not WorkflowLevel1.objects.visible_to(self.user, 'update').exists()
+
+    def test_inactive_user(self):
+        self.user.is_active = False
+        assert not WorkflowLevel1.objects.visible_to(self.user, 'retrieve').exists()
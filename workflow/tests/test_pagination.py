@@ -0,0 +1,131 @@
+import json
+from base64 import urlsafe_b64encode
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import pytest
+from django.utils import timezone
+from rest_framework.reverse import reverse
+
+import factories
+from core.models import CoreUser
+from core.tests.fixtures import org, org_member, TEST_USER_DATA
+from core.views import CoreUserViewSet
+from datamesh.tests.fixtures import relationship_with_10_records
+from datamesh.views import JoinRecordViewSet
+from workflow.models import WorkflowLevel2
+from workflow.views import WorkflowLevel2ViewSet
+
+
+def _encode_cursor(position: list) -> str:
+    return urlsafe_b64encode(json.dumps({'p': position}).encode('ascii')).decode('ascii')
+
+
+def _get_pages(view, request_factory, user, url, session=None, **params):
+    """ Get the results of the pages by following the next links, and back by following the previous links """
+    def get(url, params=None):
+        request = request_factory.get(url, params)
+        request.user = user
+        request.session = session or {}
+        return view(request)
+
+    response = get(url, params)
+    assert response.status_code == 200
+    pages = [response.data['results']]
+    assert response.data['previous'] is None
+    while response.data['next']:
+        response = get(response.data['next'])
+        pages.append(response.data['results'])
+
+    previous_pages = [response.data['results']]
+    while response.data['previous']:
+        response = get(response.data['previous'])
+        previous_pages.insert(0, response.data['results'])
+    assert previous_pages == pages
+    return pages
+
+
+@pytest.mark.django_db()
+class TestKeysetPagination:
+
+    @pytest.fixture(autouse=True)
+    def workflow_levels(self, db):
+        self.superuser = factories.CoreUser(is_superuser=True)
+        start_date = timezone.make_aware(datetime(2020, 1, 1, 12, 0, 0, 123456))
+        for i in range(7):
+            # names and start dates with ties and nulls
+            factories.WorkflowLevel2(name=f'wfl2 {i // 2}',
+                                     start_date=None if i % 3 == 0 else start_date + timedelta(microseconds=i // 2))
+        self.view = WorkflowLevel2ViewSet.as_view({'get': 'list'})
+        self.url = reverse('workflowlevel2-list')
+
+    @pytest.mark.parametrize('ordering', ('name', '-name', 'start_date', '-start_date'))
+    def test_pages(self, request_factory, ordering):
+        pages = _get_pages(self.view, request_factory, self.superuser, self.url, page_size=2, ordering=ordering)
+        assert [len(page) for page in pages] == [2, 2, 2, 1]
+
+        expected = [str(pk) for pk in WorkflowLevel2.objects.order_by(ordering, 'pk').values_list('pk', flat=True)]
+        assert [wfl2['id'] for page in pages for wfl2 in page] == expected
+
+    def test_count(self, request_factory):
+        request = request_factory.get(self.url, {'page_size': 2, 'count': 'true'})
+        request.user = self.superuser
+        response = self.view(request)
+        assert response.data['count'] == 7
+        assert response.data['count_is_approximate'] is False
+
+        with patch('workflow.pagination.KeysetPagination.max_count', 5):
+            response = self.view(request)
+        assert response.data['count'] >= 5
+        assert response.data['count_is_approximate'] is True
+
+    def test_invalid_cursor(self, request_factory):
+        request = request_factory.get(self.url, {'cursor': 'invalid'})
+        request.user = self.superuser
+        assert self.view(request).status_code == 404
+
+    @pytest.mark.parametrize('position', (['2020-13-45', 'abc'], [None, 'abc'], [[1], {}]))
+    def test_tampered_cursor(self, request_factory, position):
+        request = request_factory.get(self.url, {'cursor': _encode_cursor(position), 'ordering': 'start_date'})
+        request.user = self.superuser
+        assert self.view(request).status_code == 404
+
+    def test_limit_offset_without_cursor(self, request_factory):
+        request = request_factory.get(self.url, {'limit': 2, 'offset': 2})
+        request.user = self.superuser
+        response = self.view(request)
+        assert response.data['count'] == 7
+        assert len(response.data['results']) == 2
+
+
+@pytest.mark.django_db()
+def test_coreuser_pages(request_factory, org_member):
+    for first_name in ('Bob', 'Alice', 'Bob', ''):
+        factories.CoreUser(organization=org_member.organization, first_name=first_name)
+    view = CoreUserViewSet.as_view({'get': 'list'})
+
+    pages = _get_pages(view, request_factory, org_member, reverse('coreuser-list'), page_size=2)
+    assert [len(page) for page in pages] == [2, 2, 1]
+    expected = list(CoreUser.objects.order_by('first_name', 'pk').values_list('pk', flat=True))
+    assert [user['id'] for page in pages for user in page] == expected
+
+    # lists without a cursor or page size aren't paginated
+    request = request_factory.get(reverse('coreuser-list'))
+    request.user = org_member
+    assert len(view(request).data) == 5
+
+    # the values of a tampered cursor are invalid for the fields
+    request = request_factory.get(reverse('coreuser-list'), {'cursor': _encode_cursor(['x', 'abc'])})
+    request.user = org_member
+    assert view(request).status_code == 404
+
+
+@pytest.mark.django_db()
+def test_joinrecord_pages(request_factory, relationship_with_10_records):
+    view = JoinRecordViewSet.as_view({'get': 'list'})
+    superuser = factories.CoreUser(is_superuser=True)
+
+    session = {'jwt_organization_uuid': str(TEST_USER_DATA['organization_uuid'])}
+    pages = _get_pages(view, request_factory, superuser, reverse('joinrecord-list'), session, page_size=3)
+    assert [len(page) for page in pages] == [3, 3, 3, 1]
+    assert len({record['join_record_uuid'] for page in pages for record in page}) == 10
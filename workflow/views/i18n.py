@@ -1,12 +1,13 @@
 from rest_framework import viewsets
 import django_filters
 
+from core.eager_loading import EagerLoadingMixin
 from workflow.models import Internationalization
 from workflow.serializers import InternationalizationSerializer
 from workflow.permissions import IsSuperUserOrReadOnly
 
 
-class InternationalizationViewSet(viewsets.ModelViewSet):
+class InternationalizationViewSet(EagerLoadingMixin, viewsets.ModelViewSet):
     """
     title:
     Translations for the application
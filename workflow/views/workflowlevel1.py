@@ -4,14 +4,16 @@ from rest_framework import status, viewsets, filters
 from rest_framework.response import Response
 import django_filters
 
+from core.eager_loading import EagerLoadingMixin
 from core.permissions import IsOrgMember
+from core.streaming import StreamingListMixin
 from workflow.models import WorkflowLevel1
 from workflow.serializers import WorkflowLevel1Serializer
 from workflow.permissions import CoreGroupsPermissions
 from workflow.pagination import DefaultCursorPagination
 
 
-class WorkflowLevel1ViewSet(viewsets.ModelViewSet):
+class WorkflowLevel1ViewSet(EagerLoadingMixin, StreamingListMixin, viewsets.ModelViewSet):
     """
     Workflow Level 1 is the primary building block for creating relational lists, navigation or generic use case objects
     in the application core.  A Workflow level 1 can have multiple related workflow level 2's and be associated with a
@@ -52,8 +54,7 @@ class WorkflowLevel1ViewSet(viewsets.ModelViewSet):
                 serializer = self.get_serializer(page, many=True)
                 return self.get_paginated_response(serializer.data)
 
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+        return self.get_list_response(queryset)
 
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
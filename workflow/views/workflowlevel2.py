@@ -4,15 +4,17 @@ from rest_framework import viewsets, filters
 from rest_framework.response import Response
 import django_filters
 
+from core.eager_loading import EagerLoadingMixin
 from core.permissions import IsOrgMember
+from core.streaming import StreamingListMixin
 from workflow.filters import WorkflowLevel2Filter
 from workflow.models import WorkflowLevel2, WorkflowLevel2Sort, WorkflowTeam, ROLE_ORGANIZATION_ADMIN
 from workflow.serializers import WorkflowLevel2Serializer, WorkflowLevel2SortSerializer
 from workflow.permissions import CoreGroupsPermissions
-from workflow.pagination import DefaultLimitOffsetPagination
+from workflow.pagination import KeysetLimitOffsetPagination
 
 
-class WorkflowLevel2ViewSet(viewsets.ModelViewSet):
+class WorkflowLevel2ViewSet(EagerLoadingMixin, StreamingListMixin, viewsets.ModelViewSet):
     """
     title:
     Workflow Level 2 is the secondary building block for creating relational lists, navigation or generic use case
@@ -45,8 +47,7 @@ class WorkflowLevel2ViewSet(viewsets.ModelViewSet):
 
         all_results = request.GET.get('all')
         if all_results and (all_results.lower() == 'true' or all_results == '1'):
-            serializer = self.get_serializer(queryset, many=True)
-            return Response(serializer.data)
+            return self.get_list_response(queryset)
         else:
             page = self.paginate_queryset(queryset)
             if page is not None:
@@ -71,10 +72,10 @@ class WorkflowLevel2ViewSet(viewsets.ModelViewSet):
     queryset = WorkflowLevel2.objects.all()
     permission_classes = (CoreGroupsPermissions, IsOrgMember)
     serializer_class = WorkflowLevel2Serializer
-    pagination_class = DefaultLimitOffsetPagination
+    pagination_class = KeysetLimitOffsetPagination
 
 
-class WorkflowLevel2SortViewSet(viewsets.ModelViewSet):
+class WorkflowLevel2SortViewSet(EagerLoadingMixin, viewsets.ModelViewSet):
     """
     title:
     Workflow Level 2 sort is a JSON Array storage for the sort and ordering of workflow levels per organization
@@ -1,11 +1,12 @@
 from rest_framework import viewsets, filters
 
+from core.eager_loading import EagerLoadingMixin
 from workflow.models import WorkflowLevelStatus
 from workflow.pagination import DefaultLimitOffsetPagination
 from workflow.serializers import WorkflowLevelStatusSerializer
 
 
-class WorkflowLevelStatusViewSet(viewsets.ModelViewSet):
+class WorkflowLevelStatusViewSet(EagerLoadingMixin, viewsets.ModelViewSet):
     """
     title:
     Workflow Level Status keeps dynamic Statuses for Workflowlevel2s.
@@ -1,11 +1,12 @@
 from rest_framework import viewsets, filters
 
+from core.eager_loading import EagerLoadingMixin
 from workflow.models import WorkflowLevelType
 from workflow.pagination import DefaultCursorPagination
 from workflow.serializers import WorkflowLevelTypeSerializer
 
 
-class WorkflowLevelTypeViewSet(viewsets.ModelViewSet):
+class WorkflowLevelTypeViewSet(EagerLoadingMixin, viewsets.ModelViewSet):
     """
     title:
     Workflow Level Type keeps dynamic Types for Workflowlevel2s.
@@ -1,15 +1,16 @@
 # TODO: remove this as a part of permissions cleaning refactoring
 from rest_framework import viewsets
-from rest_framework.response import Response
 import django_filters
 
+from core.eager_loading import EagerLoadingMixin
 from core.models import ROLE_ORGANIZATION_ADMIN
+from core.streaming import StreamingListMixin
 from workflow.models import WorkflowTeam
 from workflow.serializers import WorkflowTeamSerializer, WorkflowTeamListFullSerializer
 from workflow.permissions import CoreGroupsPermissions
 
 
-class WorkflowTeamViewSet(viewsets.ModelViewSet):
+class WorkflowTeamViewSet(EagerLoadingMixin, StreamingListMixin, viewsets.ModelViewSet):
     """
     title:
     Workflow Team is the the permissions and access control for each workflow
@@ -29,6 +30,11 @@ class WorkflowTeamViewSet(viewsets.ModelViewSet):
     Create a new workflow team instance.
     """
     def list(self, request, *args, **kwargs):
+        # the serializer class defines which relations are loaded with the queryset
+        nested = request.GET.get('nested_models')
+        if nested is not None and (nested.lower() == 'true' or nested == '1'):
+            self.serializer_class = WorkflowTeamListFullSerializer
+
         # Use this queryset or the django-filters lib will not work
         queryset = self.filter_queryset(self.get_queryset())
         if not request.user.is_superuser:
@@ -42,12 +48,7 @@ class WorkflowTeamViewSet(viewsets.ModelViewSet):
                     workflow_user=request.user).values_list('workflowlevel1__id', flat=True)
                 queryset = queryset.filter(workflowlevel1__in=wflvl1_ids)
 
-        nested = request.GET.get('nested_models')
-        if nested is not None and (nested.lower() == 'true' or nested == '1'):
-            self.serializer_class = WorkflowTeamListFullSerializer
-
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+        return self.get_list_response(queryset)
 
     filterset_fields = ('workflowlevel1__organization__organization_uuid',)
     filter_backends = (django_filters.rest_framework.DjangoFilterBackend,)